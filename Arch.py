@@ -1,25 +1,19 @@
 from __future__ import annotations
 from typing import Optional
+from .ps2.cache import AddressCache
 from .ps2.decode import convert_to_pseudo, decode
 from .ps2.instruction import Instruction, InstructionType
-from .ps2.ee.il import get_branch_cond_expr
-from .ps2.ee.registers import registers as EERegisters
 from .ps2.ee.registers import HI_REG, LO_REG, PC_REG, SA_REG, RA_REG, SP_REG, ZERO_REG
 from .ps2.ee.registers import CALLER_SAVED_REGS as EE_CALLER_SAVED_REGS
 from .ps2.ee.registers import CALLEE_SAVED_REGS as EE_CALLEE_SAVED_REGS
 from .ps2.ee.registers import INT_ARG_REGS, INT_RETURN_REG, HIGH_INT_RETURN_REG, GLOBAL_POINTER_REG
-from .ps2.fpu.registers import registers as FPURegisters
-from .ps2.fpu.registers import c_registers as FPUCRegisters
 from .ps2.fpu.registers import CALLER_SAVED_REGS as FPU_CALLER_SAVED_REGS
 from .ps2.fpu.registers import CALLEE_SAVED_REGS as FPU_CALLEE_SAVED_REGS
 from .ps2.fpu.registers import FLOAT_ARG_REGS, FLOAT_RETURN_REG
-from .ps2.vu0.registers import i_registers as VU0IRegisters
-from .ps2.vu0.registers import f_registers as VU0FRegisters
-from .ps2.vu0.registers import c_registers as VU0CRegisters
-from .ps2.vu0.decode import component_bits_to_string, component_id_to_string
-from .ps2.cop0.registers import registers as COP0Registers
+from .ps2.registers import registers as PS2Registers
 from .ps2.fpu.registers import CONDITION_FLAG as FPU_CONDITION_FLAG
 from .ps2.intrinsics import PS2Intrinsic
+from .util import lazy_import
 from binaryninja import lowlevelil, IntrinsicInfo, Type
 from binaryninja.architecture import Architecture
 from binaryninja.callingconvention import CallingConvention
@@ -28,6 +22,12 @@ from binaryninja.function import RegisterInfo, InstructionInfo, InstructionTextT
 from binaryninja.lowlevelil import LowLevelILConst, LowLevelILInstruction, LowLevelILLabel, LowLevelILOperation, \
     LowLevelILSetReg, LowLevelILIf, LowLevelILCall, LowLevelILReg, LLIL_TEMP
 
+# Only needed once instructions are lifted or displayed, the indirect call pass
+# holds each view's call targets
+ee_il = lazy_import(".ps2.ee.il", __package__)
+vu0_decode = lazy_import(".ps2.vu0.decode", __package__)
+indirect_calls = lazy_import(".analysis.indirect_calls", __package__)
+
 class PS2CdeclCall(CallingConvention):
     caller_saved_regs = EE_CALLER_SAVED_REGS + FPU_CALLER_SAVED_REGS
     callee_saved_regs = EE_CALLEE_SAVED_REGS + FPU_CALLEE_SAVED_REGS
@@ -46,7 +46,7 @@ class EmotionEngine(Architecture):
     max_instr_length = 12 # 8 is needed for branches, but up to 12 can be consumed for li.s construct
     WANT_PSEUDO_OP = True
 
-    regs = EERegisters | COP0Registers | FPURegisters | FPUCRegisters | VU0IRegisters | VU0FRegisters | VU0CRegisters
+    regs = PS2Registers
     flags = [FPU_CONDITION_FLAG]
     intrinsics = {
         PS2Intrinsic.DI: IntrinsicInfo([],  []),
@@ -57,11 +57,40 @@ class EmotionEngine(Architecture):
     link_register = RA_REG
     operand_separator = ', '
 
+    # Per-address results, dropped by the view when bytes are patched
+    decode_cache = AddressCache()
+    info_cache = AddressCache()
+    text_cache = AddressCache()
+
+    @classmethod
+    def invalidate(cls, start: int, end: int) -> None:
+        for cache in (cls.decode_cache, cls.info_cache, cls.text_cache):
+            cache.invalidate(start, end)
+
+    @classmethod
+    def invalidate_from(cls, start: int) -> None:
+        for cache in (cls.decode_cache, cls.info_cache, cls.text_cache):
+            cache.invalidate_from(start)
+
+    def _decode(self, data: bytes, addr: int) -> Instruction:
+        # Cached instructions are shared, callers must not modify them
+        instruction = EmotionEngine.decode_cache.get(addr, data)
+        if instruction is None:
+            instruction = decode(data, addr)
+            instruction.arch = EmotionEngine
+            EmotionEngine.decode_cache.put(addr, data, instruction)
+        return instruction
+
     def get_instruction_info(self, data: bytes, addr: int):
         if len(data) < 4:
             return None
 
-        instruction = decode(data[0:4], addr)
+        data = data[0:4]
+        result = EmotionEngine.info_cache.get(addr, data)
+        if result is not None:
+            return result
+
+        instruction = self._decode(data, addr)
         IT = InstructionType
 
         result = InstructionInfo()
@@ -79,10 +108,12 @@ class EmotionEngine(Architecture):
                     if instruction.reg1 == EmotionEngine.link_register:
                         result.add_branch(BranchType.FunctionReturn)
                     else:
+                        # Jump tables are handed to each view's functions as indirect branches
                         result.add_branch(BranchType.UnresolvedBranch)
                 case "jal":
                     result.add_branch(BranchType.CallDestination, instruction.branch_dest)
                 case "jalr":
+                    # Resolved targets belong to a view, they're only applied when lifting
                     result.add_branch(BranchType.CallDestination)
                 case "b" | "j":
                     result.add_branch(BranchType.UnconditionalBranch, instruction.branch_dest)
@@ -98,18 +129,15 @@ class EmotionEngine(Architecture):
                     result.add_branch(BranchType.TrueBranch, instruction.branch_dest)
                     result.add_branch(BranchType.FalseBranch, addr + 8)
 
+        EmotionEngine.info_cache.put(addr, data, result)
         return result
     
     def _get_instruction_name(self, instruction: Instruction) -> str:
         name = instruction.name
 
-        # cop2 vaddx
-        if instruction.broadcast_component is not None:
-            name += component_id_to_string(instruction.broadcast_component)
-
-        # cop2 vaddx.xyz
-        if instruction.destination_components is not None:
-            name += f".{component_bits_to_string(instruction.destination_components)}"
+        # cop2 vaddx, vaddx.xyz
+        if instruction.broadcast_component is not None or instruction.destination_components is not None:
+            name = vu0_decode.display_name(name, instruction.broadcast_component, instruction.destination_components)
 
         if instruction.type == InstructionType.Branch:
             if instruction.cop_branch_type is not None:
@@ -128,6 +156,12 @@ class EmotionEngine(Architecture):
         if len(data) < 4:
             return None
 
+        # Pseudo-ops read up to max_instr_length bytes
+        data = data[0:self.max_instr_length]
+        cached = EmotionEngine.text_cache.get(addr, data)
+        if cached is not None and cached[0] == EmotionEngine.WANT_PSEUDO_OP:
+            return cached[1]
+
         if EmotionEngine.WANT_PSEUDO_OP:
             # Converts instruction properties to that of a psuedo-operation
             # e.g. beq zero, zero -> b or addiu v0, zero, 1 -> li v0, 1
@@ -157,9 +191,9 @@ class EmotionEngine(Architecture):
                     # note: no cop2 instruction with both source0 and dest components
                     # no broadcast components should land here
                     if instruction.source0_component is not None:
-                        register_name += component_id_to_string(instruction.source0_component)
+                        register_name = vu0_decode.register_with_component(register_name, instruction.source0_component)
                     elif instruction.destination_components is not None:
-                        register_name += component_bits_to_string(instruction.destination_components)
+                        register_name = vu0_decode.register_with_components(register_name, instruction.destination_components)
 
                     tokens.append(InstructionTextToken(InstructionTextTokenType.RegisterToken, register_name))
 
@@ -171,11 +205,11 @@ class EmotionEngine(Architecture):
                     # note: no cop2 instruction with both source1 and dest components
                     # it's possible to have the broadcast component on reg2 ie vclip
                     if instruction.broadcast_component is not None and instruction.reg3 is None:
-                        register_name += component_id_to_string(instruction.broadcast_component)
+                        register_name = vu0_decode.register_with_component(register_name, instruction.broadcast_component)
                     elif instruction.source1_component is not None:
-                        register_name += component_id_to_string(instruction.source1_component)
+                        register_name = vu0_decode.register_with_component(register_name, instruction.source1_component)
                     elif instruction.destination_components is not None:
-                        register_name += component_bits_to_string(instruction.destination_components)
+                        register_name = vu0_decode.register_with_components(register_name, instruction.destination_components)
 
 
                     tokens.append(InstructionTextToken(InstructionTextTokenType.RegisterToken, register_name))
@@ -185,9 +219,9 @@ class EmotionEngine(Architecture):
                     register_name = instruction.reg3
 
                     if instruction.broadcast_component is not None:
-                        register_name += component_id_to_string(instruction.broadcast_component)
+                        register_name = vu0_decode.register_with_component(register_name, instruction.broadcast_component)
                     elif instruction.destination_components is not None:
-                        register_name += component_bits_to_string(instruction.destination_components)
+                        register_name = vu0_decode.register_with_components(register_name, instruction.destination_components)
 
                     tokens.append(InstructionTextToken(InstructionTextTokenType.RegisterToken, register_name))
                 if instruction.operand is not None:
@@ -222,16 +256,25 @@ class EmotionEngine(Architecture):
             # Remove spaces from instruction only text
             del tokens[1]
 
+        EmotionEngine.text_cache.put(addr, data, (EmotionEngine.WANT_PSEUDO_OP, (tokens, length)))
         return tokens, length
     
+    def _lift(self, instruction: Instruction, addr: int, il: 'lowlevelil.LowLevelILFunction') -> None:
+        function = il.source_function
+        if instruction.name == "jalr" and function is not None:
+            targets = indirect_calls.get_call_targets(function.view, addr)
+            if targets is not None and len(targets) == 1:
+                il.append(il.call(il.const_pointer(4, targets[0])))
+                return
+        instruction.il_func(instruction, addr, il)
+
     def get_instruction_low_level_il(self, data: bytes, addr: int, il: 'lowlevelil.LowLevelILFunction') -> Optional[int]:
         if len(data) < 4:
             return None
         
         length = 4
 
-        instruction1 = decode(data[0:4], addr)        
-        instruction1.arch = EmotionEngine
+        instruction1 = self._decode(data[0:4], addr)
         if instruction1.il_func is None:
             il.append(il.unimplemented())
             return 4
@@ -240,14 +283,13 @@ class EmotionEngine(Architecture):
         if len(data) >= 8 and \
             instruction1.type == InstructionType.Branch and \
             instruction1.name not in ["eret", "syscall"]:
-            instruction2 = decode(data[4:8], addr + 4)
-            instruction2.arch = EmotionEngine
+            instruction2 = self._decode(data[4:8], addr + 4)
             length += 4
 
             if instruction1.is_likely:
                 # Likely branches
                 # Only do the branch delay slot if the branch condition is true
-                cond = get_branch_cond_expr(instruction1, addr, il)
+                cond = ee_il.get_branch_cond_expr(instruction1, addr, il)
 
                 t = LowLevelILLabel()
                 f = LowLevelILLabel()
@@ -292,7 +334,7 @@ class EmotionEngine(Architecture):
                         clobbered = delayed.dest
             
                 il.set_current_address(addr)
-                instruction1.il_func(instruction1, addr, il)
+                self._lift(instruction1, addr, il)
 
                 if clobbered is not None:
                     lifted = None
@@ -324,6 +366,6 @@ class EmotionEngine(Architecture):
                             il.replace_expr(nop, il.set_reg(delayed.size, temp, il.reg(delayed.size, delayed.dest)))
                             il.set_current_address(addr)
         else:
-            instruction1.il_func(instruction1, addr, il)
+            self._lift(instruction1, addr, il)
         
         return length
@@ -1,9 +1,11 @@
 from .Arch import EmotionEngine, PS2CdeclCall
 from .elf_view import PS2ExecutableView
+from .commands import register_commands
 from binaryninja.architecture import Architecture
 
 EmotionEngine.register()
 PS2ExecutableView.register()
+register_commands()
 
 EE = Architecture[EmotionEngine.name]
 cdecl = PS2CdeclCall(EE, "__cdecl")
@@ -0,0 +1,281 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from binaryninja import BinaryView, log_info, log_warn, user_directory
+from binaryninja.enums import SymbolType
+from binaryninja.types import Symbol
+
+# Sidecar cache of analysis seeds, keyed by a hash of the loaded segment contents.
+# Identical builds (or the same executable pulled from a disc dump) hash the same
+# so the second open can skip rediscovering everything.
+
+SEED_CACHE_VERSION = 3
+SEED_CACHE_ENV = "PS2BN_SEED_CACHE"
+
+# Metadata keys the analysis passes store their results under
+GP_METADATA_KEY = "ps2.gp"
+JUMP_TABLES_METADATA_KEY = "ps2.jump_tables"
+FUNCTION_TABLES_METADATA_KEY = "ps2.function_tables"
+STRINGS_METADATA_KEY = "ps2.strings"
+SYSCALLS_METADATA_KEY = "ps2.syscalls"
+
+# Pass results carried in the seeds as stored, keyed by address. The passes load
+# them from the view metadata instead of scanning again.
+SEEDED_RESULT_KEYS = (FUNCTION_TABLES_METADATA_KEY, STRINGS_METADATA_KEY, SYSCALLS_METADATA_KEY)
+
+class AnalysisSeeds:
+    function_starts: List[int]
+    jump_tables: Dict[int, List[int]]
+    """
+    jr address -> branch targets
+    """
+    gp: Optional[int]
+    symbols: Dict[int, str]
+    user_symbols: Dict[int, str]
+    """
+    Names the user gave, applied as user symbols again
+    """
+    results: Dict[str, Dict[str, object]]
+    """
+    metadata key -> stored result of the pass, see SEEDED_RESULT_KEYS
+    """
+    data_vars: Dict[int, Tuple[str, str, bool]]
+    """
+    address -> (type before the name, type after the name, whether it's auto)
+    Only collected for a range, see collect_range
+    """
+    comments: Dict[int, str]
+    data_refs: List[Tuple[int, int]]
+    """
+    (from, to) of the data xrefs leaving the range, applied as auto refs
+    """
+
+    def __init__(self):
+        self.function_starts = []
+        self.jump_tables = {}
+        self.gp = None
+        self.symbols = {}
+        self.user_symbols = {}
+        self.results = {}
+        self.data_vars = {}
+        self.comments = {}
+        self.data_refs = []
+
+    def to_json(self) -> dict:
+        return {
+            "version": SEED_CACHE_VERSION,
+            "function_starts": self.function_starts,
+            "jump_tables": [[addr, targets] for addr, targets in self.jump_tables.items()],
+            "gp": self.gp,
+            "symbols": [[addr, name] for addr, name in self.symbols.items()],
+            "user_symbols": [[addr, name] for addr, name in self.user_symbols.items()],
+            "results": self.results,
+            "data_vars": [[addr, *var] for addr, var in self.data_vars.items()],
+            "comments": [[addr, comment] for addr, comment in self.comments.items()],
+            "data_refs": [list(ref) for ref in self.data_refs],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> Optional[AnalysisSeeds]:
+        if data.get("version") != SEED_CACHE_VERSION:
+            return None
+
+        seeds = cls()
+        seeds.function_starts = list(data["function_starts"])
+        seeds.jump_tables = {addr: list(targets) for addr, targets in data["jump_tables"]}
+        seeds.gp = data["gp"]
+        seeds.symbols = {addr: name for addr, name in data["symbols"]}
+        seeds.user_symbols = {addr: name for addr, name in data["user_symbols"]}
+        seeds.results = dict(data["results"])
+        seeds.data_vars = {addr: (before, after, auto) for addr, before, after, auto in data["data_vars"]}
+        seeds.comments = {addr: comment for addr, comment in data["comments"]}
+        seeds.data_refs = [(source, target) for source, target in data["data_refs"]]
+        return seeds
+
+    def restrict(self, start: int, end: int) -> AnalysisSeeds:
+        """
+        The seeds within [start, end), e.g. those belonging to one overlay.
+        """
+        seeds = AnalysisSeeds()
+        seeds.function_starts = [addr for addr in self.function_starts if start <= addr < end]
+        seeds.jump_tables = {addr: targets for addr, targets in self.jump_tables.items() if start <= addr < end}
+        seeds.gp = self.gp
+        seeds.symbols = {addr: name for addr, name in self.symbols.items() if start <= addr < end}
+        seeds.user_symbols = {addr: name for addr, name in self.user_symbols.items() if start <= addr < end}
+        seeds.results = {
+            key: {addr: value for addr, value in result.items() if start <= int(addr) < end}
+            for key, result in self.results.items()
+        }
+        seeds.data_vars = {addr: var for addr, var in self.data_vars.items() if start <= addr < end}
+        seeds.comments = {addr: comment for addr, comment in self.comments.items() if start <= addr < end}
+        seeds.data_refs = [(source, target) for source, target in self.data_refs if start <= source < end]
+        return seeds
+
+class SeedHasher:
+    """
+    Accumulates segment placement and contents into a cache key.
+    """
+    def __init__(self):
+        self.__hash = hashlib.sha256()
+
+    def add_segment(self, virtual_address: int, memory_size: int, contents: bytes) -> None:
+        self.__hash.update(virtual_address.to_bytes(4, "little"))
+        self.__hash.update(memory_size.to_bytes(4, "little"))
+        self.__hash.update(len(contents).to_bytes(4, "little"))
+        self.__hash.update(contents)
+
+    def hexdigest(self) -> str:
+        return self.__hash.hexdigest()
+
+class SeedCache:
+    directory: str
+
+    def __init__(self, directory: Optional[str] = None):
+        if directory is None:
+            directory = os.environ.get(SEED_CACHE_ENV)
+        if directory is None:
+            directory = os.path.join(user_directory(), "ps2-bn", "seeds")
+        self.directory = directory
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def load(self, digest: str) -> Optional[AnalysisSeeds]:
+        try:
+            with open(self._path(digest), "r") as f:
+                return AnalysisSeeds.from_json(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log_warn(f"Ignoring unreadable seed cache entry {digest}: {e}")
+            return None
+
+    def store(self, digest: str, seeds: AnalysisSeeds) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write to a temporary file first so a concurrent reader on a shared
+        # host never sees a partially written entry
+        path = self._path(digest)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(seeds.to_json(), f)
+        os.replace(temp_path, path)
+
+def _query_metadata(view: BinaryView, key: str):
+    try:
+        return view.query_metadata(key)
+    except KeyError:
+        return None
+
+def collect_seeds(view: BinaryView) -> AnalysisSeeds:
+    seeds = AnalysisSeeds()
+    seeds.function_starts = sorted(function.start for function in view.functions)
+
+    for symbol_type in (SymbolType.FunctionSymbol, SymbolType.DataSymbol):
+        for symbol in view.get_symbols_of_type(symbol_type):
+            if symbol.auto:
+                seeds.symbols[symbol.address] = symbol.name
+            else:
+                seeds.user_symbols[symbol.address] = symbol.name
+
+    seeds.gp = _query_metadata(view, GP_METADATA_KEY)
+
+    jump_tables = _query_metadata(view, JUMP_TABLES_METADATA_KEY)
+    if jump_tables is not None:
+        seeds.jump_tables = {int(addr): list(targets) for addr, targets in jump_tables.items()}
+
+    for key in SEEDED_RESULT_KEYS:
+        result = _query_metadata(view, key)
+        if result is not None:
+            seeds.results[key] = result
+
+    return seeds
+
+def collect_range(view: BinaryView, start: int, end: int) -> AnalysisSeeds:
+    """
+    The seeds within [start, end) along with everything else analysis and the user
+    put there: data variables, comments and the data xrefs leaving the range.
+    """
+    seeds = collect_seeds(view).restrict(start, end)
+
+    for addr, var in view.data_vars.items():
+        if start <= addr < end:
+            seeds.data_vars[addr] = (var.type.get_string_before_name(), var.type.get_string_after_name(), var.auto)
+
+    for addr, comment in view.address_comments.items():
+        if start <= addr < end:
+            seeds.comments[addr] = comment
+    for function in view.functions:
+        if start <= function.start < end:
+            seeds.comments.update(function.comments)
+
+    # Refs are word aligned, they come from instructions and pointer sized data
+    for addr in range(start, end, 4):
+        seeds.data_refs.extend((addr, target) for target in view.get_data_refs_from(addr))
+
+    return seeds
+
+def forget_range(view: BinaryView, start: int, end: int) -> None:
+    """
+    Removes the stored pass results for [start, end) from the view metadata.
+    """
+    for key in SEEDED_RESULT_KEYS:
+        stored = _query_metadata(view, key)
+        if stored is None:
+            continue
+        kept = {addr: value for addr, value in stored.items() if not start <= int(addr) < end}
+        if len(kept) != len(stored):
+            view.store_metadata(key, kept, True)
+
+def apply_seeds(view: BinaryView, seeds: AnalysisSeeds) -> None:
+    executable = [s for s in view.segments if s.executable]
+    functions = set(seeds.function_starts)
+
+    for addr in seeds.function_starts:
+        view.add_function(addr)
+
+    def symbol_type(addr: int) -> SymbolType:
+        if addr not in functions and not any(s.start <= addr < s.end for s in executable):
+            return SymbolType.DataSymbol
+        return SymbolType.FunctionSymbol
+
+    for addr, name in seeds.symbols.items():
+        view.define_auto_symbol(Symbol(symbol_type(addr), addr, name))
+    for addr, name in seeds.user_symbols.items():
+        view.define_user_symbol(Symbol(symbol_type(addr), addr, name))
+
+    for addr, (before, after, auto) in seeds.data_vars.items():
+        try:
+            var_type, _ = view.parse_type_string(f"{before} __seed{after}")
+        except SyntaxError as e:
+            log_warn(f"Couldn't restore the data variable at {hex(addr)}: {e}")
+            continue
+        if auto:
+            view.define_auto_data_var(addr, var_type)
+        else:
+            view.define_user_data_var(addr, var_type)
+
+    for addr, comment in seeds.comments.items():
+        view.set_comment_at(addr, comment)
+
+    for source, target in seeds.data_refs:
+        view.add_data_ref(source, target)
+
+    if seeds.gp is not None:
+        view.store_metadata(GP_METADATA_KEY, seeds.gp, True)
+
+    if seeds.jump_tables:
+        jump_tables = _query_metadata(view, JUMP_TABLES_METADATA_KEY) or {}
+        jump_tables.update({str(addr): targets for addr, targets in seeds.jump_tables.items()})
+        view.store_metadata(JUMP_TABLES_METADATA_KEY, jump_tables, True)
+
+    for key, result in seeds.results.items():
+        stored = _query_metadata(view, key) or {}
+        stored.update(result)
+        view.store_metadata(key, stored, True)
+
+    log_info(f"Applied cached seeds: {len(seeds.function_starts)} functions, "
+             f"{len(seeds.symbols) + len(seeds.user_symbols)} symbols, {len(seeds.jump_tables)} jump tables")
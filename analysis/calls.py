@@ -0,0 +1,49 @@
+from typing import List, Set
+
+from binaryninja import BinaryView, log_info
+
+from .segments import AddressRanges, executable_segments, match_words, segment_words
+
+OPCODE_MASK = 0xFC000000
+JAL = 0x0C000000
+TARGET_MASK = 0x03FFFFFF
+
+def jal_targets(start: int, words) -> Set[int]:
+    """
+    Destination of every jal in words, which are loaded at start.
+    """
+    sites = match_words(words, OPCODE_MASK, (JAL,))
+
+    # Same as decode(): the target keeps the top 4 bits of the delay slot address
+    first_region = (start + 4) & 0xF0000000
+    last_region = (start + len(words) * 4) & 0xF0000000
+    if first_region == last_region:
+        return {first_region | ((words[i] & TARGET_MASK) << 2) for i in sites}
+
+    return {((start + i * 4 + 4) & 0xF0000000) | ((words[i] & TARGET_MASK) << 2) for i in sites}
+
+def find_jal_targets(view: BinaryView) -> List[int]:
+    """
+    Collects the destination of every jal in the executable segments, keeping only
+    those that land in an executable segment directly or through a mirror.
+    """
+    executable = AddressRanges.executable(view)
+    targets = set()
+
+    for segment in executable_segments(view):
+        targets.update(jal_targets(segment.start, segment_words(view, segment)))
+
+    resolved = (executable.resolve(target) for target in targets)
+    return sorted({target for target in resolved if target is not None})
+
+def seed_jal_targets(view: BinaryView) -> int:
+    """
+    Adds a function at every jal target found by find_jal_targets, returns the number found.
+    """
+    targets = find_jal_targets(view)
+
+    for addr in targets:
+        view.add_function(addr)
+
+    log_info(f"Seeded {len(targets)} function starts from jal targets")
+    return len(targets)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+
+from binaryninja import BinaryView, log_info
+
+from .segments import AddressRanges, executable_segments, segment_words
+from .xrefs import add_data_refs
+
+# Pending lui halves are dropped once they're this many instructions old
+MAX_PAIR_DISTANCE = 64
+
+_ADDIU_OPS = frozenset([0x08, 0x09, 0x18, 0x19]) # addi, addiu, daddi, daddiu
+_ORI = 0x0D
+_LUI = 0x0F
+_MEMORY_OPS = frozenset([
+    0x1A, 0x1B, 0x1E, 0x1F, 0x20, 0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27,
+    0x28, 0x29, 0x2A, 0x2B, 0x2C, 0x2D, 0x2E, 0x31, 0x36, 0x37, 0x39, 0x3E, 0x3F,
+])
+_LOAD_OPS = frozenset([0x1A, 0x1B, 0x1E, 0x20, 0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x37])
+# I-type instructions writing rt
+_WRITES_RT = frozenset([0x0A, 0x0B, 0x0C, 0x0E]) | _LOAD_OPS
+_BRANCH_OPS = frozenset([0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x14, 0x15, 0x16, 0x17])
+_SPECIAL = 0x00
+_MMI = 0x1C
+_COP1 = 0x11
+_COP2 = 0x12
+
+def _sign_extend_16_bit(i: int) -> int:
+    return i - 0x10000 if i & 0x8000 else i
+
+class ConstantPairIndex:
+    """
+    Every 32-bit address materialized by a lui followed by addiu/ori or a memory
+    access, and the instruction which completes it.
+    """
+    references: Dict[int, List[int]]
+    """
+    address -> completing instructions
+    """
+    completions: Dict[int, int]
+    """
+    completing instruction -> address
+    """
+
+    def __init__(self):
+        self.references = {}
+        self.completions = {}
+
+    def add(self, source: int, target: int) -> None:
+        self.completions[source] = target
+        self.references.setdefault(target, []).append(source)
+
+    def references_to(self, target: int) -> List[int]:
+        return self.references.get(target, [])
+
+    def pairs(self) -> List[Tuple[int, int]]:
+        return list(self.completions.items())
+
+    def index_words(self, start: int, words) -> None:
+        # (high half, instruction index) for each register with a pending lui
+        pending: List[Optional[Tuple[int, int]]] = [None] * 32
+        block_end = -1
+
+        for i, word in enumerate(words):
+            if i == block_end:
+                # Past a branch delay slot, the halves may come from another path
+                pending = [None] * 32
+
+            op = word >> 26
+            rs = (word >> 21) & 0x1F
+            rt = (word >> 16) & 0x1F
+
+            if op == _LUI:
+                pending[rt] = ((word & 0xFFFF) << 16, i)
+                continue
+
+            high = pending[rs]
+            if high is not None and i - high[1] > MAX_PAIR_DISTANCE:
+                pending[rs] = high = None
+
+            if high is not None and (op in _ADDIU_OPS or op in _MEMORY_OPS):
+                self.add(start + i * 4, (high[0] + _sign_extend_16_bit(word & 0xFFFF)) & 0xFFFFFFFF)
+            elif high is not None and op == _ORI:
+                self.add(start + i * 4, high[0] | (word & 0xFFFF))
+
+            # Forget registers overwritten by this instruction
+            if op in _ADDIU_OPS or op == _ORI or op in _WRITES_RT:
+                pending[rt] = None
+            elif op == _SPECIAL or op == _MMI:
+                pending[(word >> 11) & 0x1F] = None
+                if op == _SPECIAL and word & 0x3F in (0x08, 0x09):
+                    # jr, jalr
+                    block_end = i + 2
+            elif op in (_COP1, _COP2) and rs in (0x00, 0x01, 0x02):
+                # mfc, qmfc2, cfc
+                pending[rt] = None
+            elif op in _BRANCH_OPS:
+                block_end = i + 2
+                if op == 0x03:
+                    pending[31] = None
+
+def build_constant_index(view: BinaryView) -> ConstantPairIndex:
+    """
+    Builds the index with one linear pass over each executable segment.
+    """
+    index = ConstantPairIndex()
+    for segment in executable_segments(view):
+        index.index_words(segment.start, segment_words(view, segment))
+    return index
+
+def _mapped_pairs(view: BinaryView, index: ConstantPairIndex) -> List[Tuple[int, int]]:
+    # Mirrored pointers (kseg0/kseg1, uncached RAM) refer to the address they alias
+    mapped = AddressRanges.mapped(view)
+    pairs = []
+    for source, target in index.pairs():
+        target = mapped.resolve(target)
+        if target is not None:
+            pairs.append((source, target))
+    return pairs
+
+def apply_constant_data_refs(view: BinaryView, index: ConstantPairIndex) -> int:
+    """
+    Adds a data xref from every completing instruction whose address is inside a
+    mapped segment or a mirror of one. These stand in for code xrefs, which only
+    analysis of the lifted IL adds as auto references.
+    """
+    count = add_data_refs(view, _mapped_pairs(view, index))
+    log_info(f"Added {count} lui pair references")
+    return count
@@ -0,0 +1,95 @@
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from binaryninja import BinaryView
+
+from .segments import executable_segments, segment_words
+from ..ps2.decode import decode
+
+UNDEFINED_NAME = "(undefined)"
+
+class OpcodeHistogram:
+    """
+    Per-mnemonic instruction counts over the executable segments, and which of
+    those mnemonics lift to il.unimplemented().
+    """
+    counts: Counter
+    """
+    mnemonic -> number of instructions
+    """
+    unimplemented: set
+    """
+    mnemonics decoded without an il_func
+    """
+    total: int
+
+    def __init__(self):
+        self.counts = Counter()
+        self.unimplemented = set()
+        self.total = 0
+
+    def add_words(self, words) -> None:
+        # Count raw words first so each distinct encoding is only decoded once
+        for word, count in Counter(words).items():
+            instruction = decode(word.to_bytes(4, "little"), 0)
+            name = instruction.name or UNDEFINED_NAME
+
+            self.counts[name] += count
+            self.total += count
+            if instruction.name is not None and instruction.il_func is None:
+                self.unimplemented.add(name)
+
+    def ranked(self) -> List[Tuple[str, int]]:
+        return self.counts.most_common()
+
+    def unimplemented_ranked(self) -> List[Tuple[str, int]]:
+        return [(name, count) for name, count in self.ranked() if name in self.unimplemented]
+
+    def lifted_fraction(self) -> float:
+        if self.total == 0:
+            return 1.0
+        unlifted = sum(self.counts[name] for name in self.unimplemented) + self.counts[UNDEFINED_NAME]
+        return 1.0 - unlifted / self.total
+
+    def to_json(self) -> Dict:
+        return {
+            "total": self.total,
+            "lifted_fraction": self.lifted_fraction(),
+            "counts": dict(self.ranked()),
+            "unimplemented": dict(self.unimplemented_ranked()),
+        }
+
+    def report(self, limit: int = 50) -> str:
+        lines = [
+            f"{self.total} instructions, {len(self.counts)} mnemonics, "
+            f"{self.lifted_fraction():.2%} lifted",
+            "",
+            "Unimplemented mnemonics by frequency:",
+        ]
+        for name, count in self.unimplemented_ranked()[:limit]:
+            lines.append(f"  {name:<12} {count:>9} {count / self.total:8.3%}")
+
+        undefined = self.counts[UNDEFINED_NAME]
+        if undefined:
+            lines.append(f"  {UNDEFINED_NAME:<12} {undefined:>9} {undefined / self.total:8.3%}")
+
+        lines += ["", "All mnemonics by frequency:"]
+        for name, count in self.ranked()[:limit]:
+            marker = "" if name not in self.unimplemented and name != UNDEFINED_NAME else " *"
+            lines.append(f"  {name:<12} {count:>9} {count / self.total:8.3%}{marker}")
+
+        return "\n".join(lines)
+
+def build_histogram(view: BinaryView) -> OpcodeHistogram:
+    """
+    Counts every word in the executable segments by mnemonic.
+    Data embedded in code is counted too, which shows up under undefined or rare mnemonics.
+    """
+    histogram = OpcodeHistogram()
+    for segment in executable_segments(view):
+        histogram.add_words(segment_words(view, segment))
+    return histogram
+
+def show_coverage_report(view: BinaryView) -> None:
+    histogram = build_histogram(view)
+    view.show_plain_text_report("PS2 Opcode Coverage", histogram.report())
@@ -0,0 +1,140 @@
+from itertools import compress
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from binaryninja import BinaryView, Type, log_info
+from binaryninja.enums import SymbolType
+from binaryninja.types import Symbol
+
+from .cache import FUNCTION_TABLES_METADATA_KEY
+from .segments import data_segments, read_words, segment_words
+from .xrefs import add_data_refs
+from ..ps2.memory_map import canonicalize
+
+# Finds C++ vtables and state machine tables: runs of aligned words in the data
+# segments which all point at plausible function starts. A null word is allowed
+# between two entries, for pure virtuals and the delta/index slots older GCC
+# vtables interleave with the function pointers.
+
+# Shorter runs are too likely to be a pair of unrelated pointers
+MIN_TABLE_ENTRIES = 3
+# Null words tolerated between two entries
+MAX_GAP = 1
+
+class FunctionTable:
+    __slots__ = ["addr", "length", "entries"]
+
+    addr: int
+    length: int
+    """
+    Words in the table, including nulls between entries
+    """
+    entries: List[Tuple[int, int]]
+    """
+    (address, target) of each entry in order, without the nulls
+    """
+
+    def __init__(self, addr: int, length: int, entries: List[Tuple[int, int]]):
+        self.addr = addr
+        self.length = length
+        self.entries = entries
+
+def _aliases(starts: Iterable[int]) -> Set[int]:
+    # Pointers may use any mirror of the code, e.g. kseg0 addresses into RAM
+    aliases = set()
+    for start in starts:
+        aliases.add(start)
+        for region in range(16):
+            alias = (region << 28) | (start & 0x0FFFFFFF)
+            if canonicalize(alias) == start:
+                aliases.add(alias)
+    return aliases
+
+def plausible_starts(view: BinaryView) -> Set[int]:
+    """
+    Known functions, which include the prologue matches once the view is seeded,
+    with every address mirroring them.
+    """
+    return _aliases(function.start for function in view.functions)
+
+def table_runs(start: int, words, starts: Set[int]) -> List[FunctionTable]:
+    """
+    Runs of at least MIN_TABLE_ENTRIES words found in starts, which are loaded at start.
+    The membership test over the whole segment runs in C, only the hits are walked.
+    """
+    hits = list(compress(range(len(words)), map(starts.__contains__, words)))
+
+    tables = []
+    first = 0
+    for i in range(1, len(hits) + 1):
+        if i < len(hits):
+            gap = hits[i] - hits[i - 1] - 1
+            if gap == 0 or (gap <= MAX_GAP and not any(words[hits[i - 1] + 1:hits[i]])):
+                continue
+
+        run = hits[first:i]
+        if len(run) >= MIN_TABLE_ENTRIES:
+            entries = [(start + j * 4, words[j]) for j in run]
+            tables.append(FunctionTable(entries[0][0], run[-1] - run[0] + 1, entries))
+        first = i
+
+    return tables
+
+def find_function_tables(view: BinaryView) -> List[FunctionTable]:
+    starts = plausible_starts(view)
+    tables = []
+
+    for segment in data_segments(view):
+        words = segment_words(view, segment)
+        tables.extend(table_runs(segment.start, words, starts))
+
+    return tables
+
+def _load_function_tables(view: BinaryView) -> Optional[List[FunctionTable]]:
+    # Stored tables (e.g. from the seed cache) only need their entries read again
+    try:
+        stored = view.query_metadata(FUNCTION_TABLES_METADATA_KEY)
+    except KeyError:
+        return None
+
+    tables = []
+    for addr, length in stored.items():
+        addr = int(addr)
+        words = read_words(view, addr, length * 4)
+        entries = [(addr + i * 4, word) for i, word in enumerate(words) if word]
+        tables.append(FunctionTable(addr, length, entries))
+    return tables
+
+def annotate_function_tables(view: BinaryView, rescan: bool = False) -> int:
+    """
+    Defines every function pointer table as an array of pointers, with data refs to
+    its targets, and adds the targets which aren't functions yet. Tables are cached
+    in the view metadata, rescan looks for them again. Returns the number of tables.
+    """
+    tables = None if rescan else _load_function_tables(view)
+    if tables is None:
+        tables = find_function_tables(view)
+        stored: Dict[str, int] = {str(table.addr): table.length for table in tables}
+        view.store_metadata(FUNCTION_TABLES_METADATA_KEY, stored, True)
+
+    pointer = Type.pointer(view.arch, Type.void())
+    refs = []
+    targets = set()
+
+    for table in tables:
+        view.define_auto_data_var(table.addr, Type.array(pointer, table.length))
+        if view.get_symbol_at(table.addr) is None:
+            view.define_auto_symbol(Symbol(SymbolType.DataSymbol, table.addr, f"ftable_{table.addr:08x}"))
+
+        # Entries may point through a mirror, the refs go to the canonical function
+        entries = [(addr, canonicalize(target)) for addr, target in table.entries]
+        refs.extend(entries)
+        targets.update(target for _, target in entries)
+
+    add_data_refs(view, refs)
+
+    known = {function.start for function in view.functions}
+    for target in sorted(targets - known):
+        view.add_function(target)
+
+    log_info(f"Found {len(tables)} function pointer tables with {len(targets)} targets")
+    return len(tables)
@@ -0,0 +1,150 @@
+from typing import Iterable, List, Optional, Tuple
+
+from binaryninja import BinaryView, Type, log_info
+from binaryninja.variable import ConstantRegisterValue
+
+from .cache import GP_METADATA_KEY
+from .segments import AddressRanges, executable_segments, match_words, segment_words
+from .xrefs import add_data_refs
+from ..elf import ElfSymbol
+
+GP_SYMBOL = "_gp"
+
+# crt0 sets up $gp within its first few instructions
+ENTRY_SCAN_WORDS = 64
+
+IMM_MASK = 0xFFFF0000
+LUI_GP = 0x3C1C0000 # lui $gp, N
+ADDIU_GP_GP = 0x279C0000 # addiu $gp, $gp, N
+ORI_GP_GP = 0x379C0000 # ori $gp, $gp, N
+
+OPCODE_BASE_MASK = 0xFFE00000
+GP_BASE = 28 << 21
+
+# opcode -> access size, 0 for address computations
+GP_RELATIVE_OPCODES = {
+    0x09: 0,  # addiu
+    0x19: 0,  # daddiu
+    0x1E: 16, # lq
+    0x1F: 16, # sq
+    0x20: 1,  # lb
+    0x21: 2,  # lh
+    0x23: 4,  # lw
+    0x24: 1,  # lbu
+    0x25: 2,  # lhu
+    0x27: 4,  # lwu
+    0x28: 1,  # sb
+    0x29: 2,  # sh
+    0x2B: 4,  # sw
+    0x31: 4,  # lwc1
+    0x36: 16, # lqc2
+    0x37: 8,  # ld
+    0x39: 4,  # swc1
+    0x3E: 16, # sqc2
+    0x3F: 8,  # sd
+}
+
+def _sign_extend_16_bit(i: int) -> int:
+    return i - 0x10000 if i & 0x8000 else i
+
+def find_gp_from_entry(view: BinaryView, entry_point: int) -> Optional[int]:
+    data = view.read(entry_point, ENTRY_SCAN_WORDS * 4)
+    words = [int.from_bytes(data[i:i + 4], "little") for i in range(0, len(data) & ~3, 4)]
+
+    high = None
+    for word in words:
+        if word & IMM_MASK == LUI_GP:
+            high = (word & 0xFFFF) << 16
+        elif high is not None and word & IMM_MASK == ADDIU_GP_GP:
+            return (high + _sign_extend_16_bit(word & 0xFFFF)) & 0xFFFFFFFF
+        elif high is not None and word & IMM_MASK == ORI_GP_GP:
+            return high | (word & 0xFFFF)
+    return None
+
+def find_gp(view: BinaryView, entry_point: int, symbols: Iterable[ElfSymbol] = ()) -> Optional[int]:
+    """
+    Uses a cached value if there is one, then looks for the _gp symbol,
+    then the $gp setup in crt0.
+    """
+    try:
+        return view.query_metadata(GP_METADATA_KEY)
+    except KeyError:
+        pass
+
+    for symbol in symbols:
+        if symbol.name == GP_SYMBOL:
+            return symbol.value
+
+    return find_gp_from_entry(view, entry_point)
+
+def set_gp(view: BinaryView, gp: int) -> None:
+    view.store_metadata(GP_METADATA_KEY, gp, True)
+
+    # Don't stomp on a value the user picked
+    if not view.user_global_pointer_value_set:
+        view.set_user_global_pointer_value(ConstantRegisterValue(gp))
+
+def _access_type(size: int) -> Type:
+    if size == 16:
+        return Type.array(Type.int(4, False), 4)
+    return Type.int(size, False)
+
+def find_gp_references(view: BinaryView, gp: int) -> List[Tuple[int, int, int]]:
+    """
+    Returns (instruction, target, access size) for every $gp relative access
+    landing in a mapped segment.
+    """
+    mapped = AddressRanges.mapped(view)
+    values = [(opcode << 26) | GP_BASE for opcode in GP_RELATIVE_OPCODES]
+    refs = []
+
+    for segment in executable_segments(view):
+        words = segment_words(view, segment)
+        for i in match_words(words, OPCODE_BASE_MASK, values):
+            word = words[i]
+            opcode = word >> 26
+            size = GP_RELATIVE_OPCODES[opcode]
+
+            # Skip the $gp setup itself
+            if size == 0 and (word >> 16) & 0x1F == 28:
+                continue
+
+            target = mapped.resolve((gp + _sign_extend_16_bit(word & 0xFFFF)) & 0xFFFFFFFF)
+            if target is not None:
+                refs.append((segment.start + i * 4, target, size))
+
+    return refs
+
+def apply_gp_references(view: BinaryView, gp: int) -> int:
+    """
+    Adds data xrefs and sized data variables for every $gp relative access, returns
+    the number of references.
+    """
+    refs = find_gp_references(view, gp)
+
+    sizes = {}
+    for _, target, size in refs:
+        if size and target not in sizes:
+            sizes[target] = size
+
+    for target, size in sizes.items():
+        if view.get_data_var_at(target) is None:
+            view.define_auto_data_var(target, _access_type(size))
+
+    count = add_data_refs(view, ((source, target) for source, target, _ in refs))
+    log_info(f"Added {count} $gp relative references")
+    return count
+
+def discover_gp(view: BinaryView, entry_point: int, symbols: Iterable[ElfSymbol] = ()) -> Optional[int]:
+    """
+    Finds $gp, sets it for the view and adds the $gp relative references.
+    """
+    gp = find_gp(view, entry_point, symbols)
+    if gp is None:
+        log_info("Couldn't determine $gp")
+        return None
+
+    log_info(f"Found $gp = {hex(gp)}")
+    set_gp(view, gp)
+    apply_gp_references(view, gp)
+    return gp
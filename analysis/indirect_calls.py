@@ -0,0 +1,497 @@
+from __future__ import annotations
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+from binaryninja import BinaryView, log_info
+from binaryninja.function import Function
+
+from .cache import GP_METADATA_KEY
+from .segments import AddressRanges, function_digest, match_words, read_words
+from .xrefs import add_data_refs
+from ..ps2.decode import decode
+from ..ps2.ee.registers import CALLER_SAVED_REGS, GLOBAL_POINTER_REG, ZERO_REG
+from ..ps2.instruction import Instruction, InstructionType
+
+# Resolves the register of a jalr with a small forward value-set analysis over
+# the containing function. Covers the idioms compilers emit for calls through
+# pointers the binary itself holds:
+#   lui    $t9, %hi(func)               ; constant address
+#   addiu  $t9, $t9, %lo(func)
+#   jalr   $t9
+#
+#   lui    $at, %hi(table)              ; function pointer table
+#   sll    $v0, $v0, 2
+#   addu   $v0, $v0, $at
+#   lw     $v0, %lo(table)($v0)
+#   jalr   $v0
+#
+#   lw     $v0, %gp_rel(callback)($gp)  ; initialized function pointer
+#   jalr   $v0
+
+INDIRECT_CALLS_METADATA_KEY = "ps2.indirect_calls"
+
+JALR_MASK = 0xFC00003F
+JALR = 0x00000009
+
+# Largest set of constants kept per register before it becomes unknown
+MAX_VALUES = 8
+# Upper bound for function pointer tables
+MAX_TABLE_ENTRIES = 256
+# Times a block is revisited before its state is given up on
+MAX_VISITS = 8
+
+M32 = 0xFFFFFFFF
+
+class _ScaledIndex:
+    """
+    An unknown index shifted left by 2, i.e. a word offset
+    """
+    __slots__ = []
+
+    def __repr__(self) -> str:
+        return "index * 4"
+
+SCALED_INDEX = _ScaledIndex()
+
+class Strided:
+    """
+    One of bases plus an unknown word offset, the address of a table entry
+    """
+    __slots__ = ["bases"]
+
+    bases: FrozenSet[int]
+
+    def __init__(self, bases: FrozenSet[int]):
+        self.bases = bases
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Strided) and other.bases == self.bases
+
+    def __hash__(self) -> int:
+        return hash(self.bases)
+
+    def __repr__(self) -> str:
+        return f"{{{', '.join(hex(base) for base in sorted(self.bases))}}} + index * 4"
+
+# A register's abstract value, None when it isn't known
+Value = Optional[Union[FrozenSet[int], _ScaledIndex, Strided]]
+State = Dict[str, Value]
+
+_LOADS = frozenset(["lw", "lwu"])
+_STORES = frozenset(["sb", "sh", "sw", "sd", "sq", "swl", "swr", "sdl", "sdr", "swc1", "sqc2"])
+_CALLS = frozenset(["jal", "jalr"])
+
+SESSION_KEY = "ps2.indirect_calls"
+
+# {jalr address: targets}
+Calls = Dict[int, Tuple[int, ...]]
+
+class CallTargetRegistry:
+    """
+    A view's resolved jalr targets, kept in its session data so views loaded at the
+    same addresses never see each other's targets.
+    """
+    __slots__ = ["targets", "sites", "results"]
+
+    targets: Calls
+    sites: Dict[int, FrozenSet[int]]
+    """
+    function start -> the jalrs registered for it
+    """
+    results: Dict[Tuple[int, str], Tuple[Calls, Dict[int, int]]]
+    """
+    (function start, digest) -> (calls, words the analysis loaded)
+    """
+
+    def __init__(self):
+        self.targets = {}
+        self.sites = {}
+        self.results = {}
+
+    def replace(self, start: int, calls: Calls) -> Calls:
+        """
+        Registers a function's calls in place of those registered for it before,
+        returns the previous ones.
+        """
+        previous = {addr: self.targets.pop(addr) for addr in self.sites.pop(start, ()) if addr in self.targets}
+        self.targets.update(calls)
+        if calls:
+            self.sites[start] = frozenset(calls)
+        return previous
+
+def call_target_registry(view: BinaryView) -> CallTargetRegistry:
+    """
+    The view's registry, dropped along with its session data when the view is closed.
+    """
+    registry = view.session_data.get(SESSION_KEY)
+    if registry is None:
+        registry = CallTargetRegistry()
+        view.session_data[SESSION_KEY] = registry
+    return registry
+
+def get_call_targets(view: BinaryView, addr: int) -> Optional[Tuple[int, ...]]:
+    return call_target_registry(view).targets.get(addr)
+
+def _constants(values: FrozenSet[int]) -> Value:
+    return values if len(values) <= MAX_VALUES else None
+
+def join(a: Value, b: Value) -> Value:
+    if a == b:
+        return a
+    if isinstance(a, frozenset) and isinstance(b, frozenset):
+        return _constants(a | b)
+    if isinstance(a, Strided) and isinstance(b, Strided):
+        bases = a.bases | b.bases
+        return Strided(bases) if len(bases) <= MAX_VALUES else None
+    return None
+
+def join_states(a: State, b: State) -> State:
+    return {reg: value for reg in a.keys() & b.keys() if (value := join(a[reg], b[reg])) is not None}
+
+def _add(a: Value, b: Value) -> Value:
+    if isinstance(a, frozenset) and isinstance(b, frozenset):
+        return _constants(frozenset((x + y) & M32 for x in a for y in b))
+    if isinstance(a, frozenset) and b is SCALED_INDEX:
+        return Strided(a)
+    if a is SCALED_INDEX and isinstance(b, frozenset):
+        return Strided(b)
+    if isinstance(a, Strided) and b == frozenset([0]):
+        return a
+    if a == frozenset([0]) and isinstance(b, Strided):
+        return b
+    return None
+
+def _offset(value: Value, offset: int) -> Value:
+    if isinstance(value, frozenset):
+        return frozenset((x + offset) & M32 for x in value)
+    if isinstance(value, Strided):
+        return Strided(frozenset((x + offset) & M32 for x in value.bases))
+    return None
+
+class ValueSetAnalysis:
+    """
+    Forward analysis of the integer registers over a function's basic blocks.
+    Loads are read from the view, which assumes pointers hold their initial value.
+    """
+    __slots__ = ["view", "executable", "mapped", "gp", "calls", "reads"]
+
+    view: BinaryView
+    executable: AddressRanges
+    mapped: AddressRanges
+    gp: Optional[int]
+    calls: Dict[int, Value]
+    """
+    jalr address -> value of its register, joined over every visit
+    """
+    reads: Dict[int, int]
+    """
+    address -> word, every word the loads read, results only hold while these do
+    """
+
+    def __init__(self, view: BinaryView, executable: AddressRanges, mapped: AddressRanges, gp: Optional[int]):
+        self.view = view
+        self.executable = executable
+        self.mapped = mapped
+        self.gp = gp
+        self.calls = {}
+        self.reads = {}
+
+    def unknown_state(self) -> State:
+        return {ZERO_REG: frozenset([0])}
+
+    def entry_state(self) -> State:
+        state = self.unknown_state()
+        if self.gp is not None:
+            state[GLOBAL_POINTER_REG] = frozenset([self.gp])
+        return state
+
+    def _read_word(self, addr: int) -> Optional[int]:
+        addr = self.mapped.resolve(addr)
+        if addr is None or addr & 3:
+            return None
+        words = read_words(self.view, addr, 4)
+        if not words:
+            return None
+        self.reads[addr] = words[0]
+        return words[0]
+
+    def _read_table(self, base: int) -> List[int]:
+        # Entries up to the first one which isn't a code pointer
+        addr = self.mapped.resolve(base)
+        if addr is None or addr & 3:
+            return []
+
+        targets = []
+        for i, target in enumerate(read_words(self.view, addr, MAX_TABLE_ENTRIES * 4)):
+            # The word ending the table counts too
+            self.reads[addr + i * 4] = target
+            if target & 3 or self.executable.resolve(target) is None:
+                break
+            targets.append(target)
+        return targets
+
+    def _load(self, address: Value) -> Value:
+        if isinstance(address, frozenset):
+            values = {self._read_word(addr) for addr in address}
+            if None in values:
+                return None
+            return _constants(frozenset(values))
+
+        if isinstance(address, Strided):
+            targets = set()
+            for base in address.bases:
+                targets.update(self._read_table(base))
+            # Tables can be larger than MAX_VALUES, they're only ever called through
+            return frozenset(targets) or None
+
+        return None
+
+    def step(self, instruction: Instruction, state: State) -> None:
+        name = instruction.name
+        get = state.get
+
+        match name:
+            case "lui":
+                value = frozenset([(instruction.operand << 16) & M32])
+            case "addiu" | "daddiu" | "addi" | "daddi":
+                value = _offset(get(instruction.reg2), instruction.operand)
+            case "ori":
+                base = get(instruction.reg2)
+                value = frozenset(x | instruction.operand for x in base) if isinstance(base, frozenset) else None
+            case "addu" | "daddu" | "add" | "dadd":
+                value = _add(get(instruction.reg2), get(instruction.reg3))
+            case "or":
+                a, b = get(instruction.reg2), get(instruction.reg3)
+                if a == frozenset([0]):
+                    value = b
+                elif b == frozenset([0]):
+                    value = a
+                elif isinstance(a, frozenset) and isinstance(b, frozenset):
+                    value = _constants(frozenset(x | y for x in a for y in b))
+                else:
+                    value = None
+            case "sll":
+                source = get(instruction.reg2)
+                if isinstance(source, frozenset):
+                    value = frozenset((x << instruction.operand) & M32 for x in source)
+                else:
+                    value = SCALED_INDEX if instruction.operand == 2 else None
+            case _ if name in _LOADS:
+                value = self._load(_offset(get(instruction.reg2), instruction.operand))
+            case _:
+                if instruction.type == InstructionType.Branch or name in _STORES:
+                    return
+                value = None
+
+        reg = instruction.reg1
+        if reg is None or reg == ZERO_REG:
+            return
+        if value is None:
+            state.pop(reg, None)
+        else:
+            state[reg] = value
+
+    def run_block(self, start: int, end: int, state: State) -> State:
+        words = read_words(self.view, start, end - start)
+        call_pending = False
+
+        for i, word in enumerate(words):
+            addr = start + i * 4
+            instruction = decode(word.to_bytes(4, "little"), addr)
+
+            if instruction.name == "jalr":
+                value = state.get(instruction.reg1)
+                previous = self.calls.get(addr, value)
+                self.calls[addr] = join(previous, value)
+
+            self.step(instruction, state)
+
+            if call_pending:
+                # The delay slot has run, the callee may clobber everything it doesn't save
+                for reg in CALLER_SAVED_REGS:
+                    state.pop(reg, None)
+                call_pending = False
+            call_pending = instruction.name in _CALLS
+
+        if call_pending:
+            for reg in CALLER_SAVED_REGS:
+                state.pop(reg, None)
+        return state
+
+    def run(self, function: Function) -> Dict[int, Value]:
+        blocks = {block.start: block for block in function.basic_blocks}
+        entry = {function.start: self.entry_state()}
+        states: Dict[int, State] = dict(entry)
+        visits: Dict[int, int] = {}
+        worklist = [function.start]
+
+        while worklist:
+            start = worklist.pop()
+            block = blocks.get(start)
+            if block is None:
+                continue
+
+            visits[start] = visits.get(start, 0) + 1
+            out = self.run_block(block.start, block.end, dict(states[start]))
+
+            for edge in block.outgoing_edges:
+                target = edge.target.start
+                if target not in states:
+                    states[target] = out
+                else:
+                    joined = join_states(states[target], out)
+                    if visits.get(target, 0) >= MAX_VISITS:
+                        # Given up on, every register becomes unknown. No join changes
+                        # that, so the block runs once more and its jalrs are unknown
+                        joined = self.unknown_state()
+                    if joined == states[target]:
+                        continue
+                    states[target] = joined
+
+                if target not in worklist:
+                    worklist.append(target)
+
+        return self.calls
+
+    def resolve(self, value: Value) -> Tuple[int, ...]:
+        """
+        The code addresses among the possible values of a jalr register
+        """
+        if not isinstance(value, frozenset):
+            return ()
+        return tuple(sorted(target for target in value if not target & 3 and target in self.executable))
+
+def _has_jalr(view: BinaryView, function: Function) -> bool:
+    for block in function.basic_blocks:
+        words = read_words(view, block.start, block.end - block.start)
+        if match_words(words, JALR_MASK, (JALR,)):
+            return True
+    return False
+
+def _view_results(view: BinaryView) -> Dict[int, Tuple[str, Calls, Dict[int, int]]]:
+    try:
+        stored = view.query_metadata(INDIRECT_CALLS_METADATA_KEY)
+    except KeyError:
+        return {}
+    return {
+        int(start): (
+            entry["digest"],
+            {int(addr): tuple(targets) for addr, targets in entry["calls"].items()},
+            {int(addr): word for addr, word in entry["reads"].items()},
+        )
+        for start, entry in stored.items()
+    }
+
+def _gp(view: BinaryView) -> Optional[int]:
+    try:
+        return view.query_metadata(GP_METADATA_KEY)
+    except KeyError:
+        return None
+
+def _reads_hold(view: BinaryView, reads: Dict[int, int]) -> bool:
+    for addr, word in reads.items():
+        words = read_words(view, addr, 4)
+        if not words or words[0] != word:
+            return False
+    return True
+
+def load_indirect_calls(view: BinaryView) -> int:
+    """
+    Registers call targets already stored in the view metadata, before analysis
+    has found the functions to check them against.
+    """
+    registry = call_target_registry(view)
+    count = 0
+    for start, (_, calls, _) in _view_results(view).items():
+        registry.replace(start, calls)
+        count += len(calls)
+    return count
+
+def analyze_function(view: BinaryView, function: Function, analysis: ValueSetAnalysis,
+                     digest: str) -> Tuple[Calls, Dict[int, int]]:
+    """
+    Resolved jalr targets within a function and the words the analysis loaded,
+    memoized by its digest for as long as those words hold.
+    """
+    registry = call_target_registry(view)
+    key = (function.start, digest)
+    cached = registry.results.get(key)
+    if cached is not None and _reads_hold(view, cached[1]):
+        return cached
+
+    analysis.calls = {}
+    analysis.reads = {}
+    calls = analysis.run(function)
+    resolved = {addr: targets for addr, value in calls.items() if (targets := analysis.resolve(value))}
+
+    registry.results[key] = (resolved, analysis.reads)
+    return registry.results[key]
+
+def _annotate(view: BinaryView, previous: Calls, calls: Calls) -> None:
+    # Only a single target fits the lifted call, the rest are cross-referenced
+    for addr, targets in previous.items():
+        if len(targets) > 1 and calls.get(addr) != targets:
+            view.set_comment_at(addr, "")
+            for target in targets:
+                view.remove_data_ref(addr, target)
+
+    for addr, targets in calls.items():
+        for target in targets:
+            if not view.get_functions_at(target):
+                view.add_function(target)
+        if len(targets) > 1 and previous.get(addr) != targets:
+            view.set_comment_at(addr, "Calls " + ", ".join(hex(target) for target in targets))
+            add_data_refs(view, ((addr, target) for target in targets))
+
+def resolve_indirect_calls(view: BinaryView) -> int:
+    """
+    Resolves the jalr targets of every function, registers them in the view's
+    registry and stores them in the view metadata. Targets become functions and the
+    functions whose calls changed are reanalyzed. Returns the number of calls resolved.
+    """
+    executable = AddressRanges.executable(view)
+    mapped = AddressRanges.mapped(view)
+    gp = _gp(view)
+    analysis = ValueSetAnalysis(view, executable, mapped, gp)
+    registry = call_target_registry(view)
+
+    stored = _view_results(view)
+    results = {}
+    count = 0
+
+    functions = list(view.functions)
+    for function in functions:
+        calls: Calls = {}
+        if _has_jalr(view, function):
+            # The loads and $gp relative accesses depend on $gp
+            digest = function_digest(view, function, gp)
+            previous = stored.get(function.start)
+            if previous is not None and previous[0] == digest and _reads_hold(view, previous[2]):
+                registry.results[(function.start, digest)] = (previous[1], previous[2])
+                calls, reads = previous[1], previous[2]
+            else:
+                calls, reads = analyze_function(view, function, analysis, digest)
+            results[function.start] = (digest, calls, reads)
+
+        # Sites which no longer resolve are dropped, so they aren't lifted as calls
+        previous = registry.replace(function.start, calls)
+        _annotate(view, previous, calls)
+        if previous != calls:
+            function.reanalyze()
+        count += len(calls)
+
+    # Functions which are gone keep nothing registered
+    starts = {function.start for function in functions}
+    for start in [start for start in registry.sites if start not in starts]:
+        _annotate(view, registry.replace(start, {}), {})
+
+    view.store_metadata(INDIRECT_CALLS_METADATA_KEY, {
+        str(start): {
+            "digest": digest,
+            "calls": {str(addr): list(targets) for addr, targets in calls.items()},
+            "reads": {str(addr): word for addr, word in reads.items()},
+        }
+        for start, (digest, calls, reads) in results.items()
+    }, True)
+
+    log_info(f"Resolved {count} indirect calls")
+    return count
@@ -0,0 +1,291 @@
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from binaryninja import BinaryView, log_info
+from binaryninja.function import Function
+
+from .cache import JUMP_TABLES_METADATA_KEY
+from .segments import AddressRanges, executable_segments, match_words, segment_words
+from ..ps2.decode import decode
+from ..ps2.instruction import Instruction, InstructionType
+
+# Recognizes the switch idiom GCC emits for the EE:
+#   sltiu  $at, $v0, N          ; bounds check
+#   beqz   $at, default
+#   lui    $at, %hi(table)
+#   sll    $v0, $v0, 2
+#   addu   $v0, $v0, $at        ; (or addiu $at, $at, %lo(table) before it)
+#   lw     $v0, %lo(table)($v0)
+#   jr     $v0
+
+JR_MASK = 0xFC1FFFFF
+JR = 0x00000008
+JR_RA = 0x03E00008
+
+# Instructions scanned backwards from the jr
+WINDOW = 24
+# Upper bound for tables without a recognizable bounds check
+MAX_TABLE_ENTRIES = 1024
+
+_LOADS = frozenset(["lb", "lbu", "lh", "lhu", "lw", "lwu", "ld", "lq", "ldl", "ldr", "lwl", "lwr"])
+_BLOCK_ENDS = frozenset(["j", "jal", "jalr", "jr", "eret", "syscall"])
+
+SESSION_KEY = "ps2.jump_tables"
+
+class JumpTableRegistry:
+    """
+    A view's resolved jump tables. Kept in the view's session data so views loaded
+    at the same addresses never see each other's tables.
+    """
+    __slots__ = ["tables", "sites", "function_tables"]
+
+    tables: Dict[int, Tuple[int, ...]]
+    """
+    jr address -> targets
+    """
+    sites: Optional[List[int]]
+    """
+    Sorted jr addresses, built on first use
+    """
+    function_tables: Dict[int, Dict[int, Tuple[int, ...]]]
+    """
+    function start -> {jr address: targets}
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.sites = None
+        self.function_tables = {}
+
+    def register(self, addr: int, targets: Tuple[int, ...]) -> None:
+        self.tables[addr] = targets
+        self.sites = None
+        self.function_tables.clear()
+
+    def forget(self, start: int, end: int) -> Dict[int, Tuple[int, ...]]:
+        removed = {addr: targets for addr, targets in self.tables.items() if start <= addr < end}
+        for addr in removed:
+            del self.tables[addr]
+        self.sites = None
+        self.function_tables.clear()
+        return removed
+
+def jump_table_registry(view: BinaryView) -> JumpTableRegistry:
+    """
+    The view's registry, dropped along with its session data when the view is closed.
+    """
+    registry = view.session_data.get(SESSION_KEY)
+    if registry is None:
+        registry = JumpTableRegistry()
+        view.session_data[SESSION_KEY] = registry
+    return registry
+
+def get_jump_table(view: BinaryView, addr: int) -> Optional[Tuple[int, ...]]:
+    return jump_table_registry(view).tables.get(addr)
+
+def register_jump_table(view: BinaryView, addr: int, targets: Tuple[int, ...]) -> None:
+    jump_table_registry(view).register(addr, targets)
+
+def _writes(instruction: Instruction, reg: str) -> bool:
+    if instruction.reg1 != reg:
+        return False
+    if instruction.type == InstructionType.GenericInt:
+        return True
+    return instruction.type == InstructionType.LoadStore and instruction.name in _LOADS
+
+def _find_writer(instructions: List[Instruction], end: int, reg: str) -> int:
+    # Index of the last instruction before end writing reg, -1 if there is none
+    # or a call/jump comes first
+    for i in range(end - 1, -1, -1):
+        instruction = instructions[i]
+        if instruction.name in _BLOCK_ENDS:
+            return -1
+        if _writes(instruction, reg):
+            return i
+    return -1
+
+def _resolve_constant(instructions: List[Instruction], end: int, reg: str, depth: int = 0) -> Optional[int]:
+    i = _find_writer(instructions, end, reg)
+    if i < 0 or depth > 4:
+        return None
+
+    instruction = instructions[i]
+    match instruction.name:
+        case "lui":
+            return (instruction.operand << 16) & 0xFFFFFFFF
+        case "addiu" | "daddiu" | "addi" | "daddi":
+            base = _resolve_constant(instructions, i, instruction.reg2, depth + 1)
+            if base is not None:
+                return (base + instruction.operand) & 0xFFFFFFFF
+        case "ori":
+            base = _resolve_constant(instructions, i, instruction.reg2, depth + 1)
+            if base is not None:
+                return base | instruction.operand
+    return None
+
+def _resolve_index(instructions: List[Instruction], end: int, reg: str) -> Optional[Tuple[int, str]]:
+    # Finds sll reg, index, 2, returns its position and the unscaled index register
+    i = _find_writer(instructions, end, reg)
+    if i < 0:
+        return None
+
+    instruction = instructions[i]
+    if instruction.name == "sll" and instruction.operand == 2:
+        return i, instruction.reg2
+    return None
+
+def _find_bound(instructions: List[Instruction], end: int, index_reg: str) -> Optional[int]:
+    for i in range(end - 1, -1, -1):
+        instruction = instructions[i]
+        if instruction.name == "sltiu" and instruction.reg2 == index_reg:
+            return instruction.operand
+        if _writes(instruction, index_reg) or instruction.name in _BLOCK_ENDS:
+            return None
+    return None
+
+def recognize_jump_table(view: BinaryView, addr: int, executable: AddressRanges) -> Optional[Tuple[int, ...]]:
+    """
+    Matches the switch idiom ending in the jr at addr, returns its deduplicated targets.
+    """
+    start = addr - WINDOW * 4
+    while start < addr and start not in executable:
+        start += 4
+
+    data = view.read(start, addr + 4 - start)
+    instructions = [decode(data[i:i + 4], start + i) for i in range(0, len(data) & ~3, 4)]
+    if not instructions or instructions[-1].name != "jr":
+        return None
+
+    jr = len(instructions) - 1
+    load = _find_writer(instructions, jr, instructions[jr].reg1)
+    if load < 0 or instructions[load].name != "lw":
+        return None
+
+    table_offset = instructions[load].operand
+    address = _find_writer(instructions, load, instructions[load].reg2)
+    if address < 0 or instructions[address].name not in ("addu", "daddu"):
+        return None
+
+    table = None
+    index = None
+    sources = (instructions[address].reg2, instructions[address].reg3)
+    for base_reg, index_reg in (sources, sources[::-1]):
+        index = _resolve_index(instructions, address, index_reg)
+        if index is not None:
+            table = _resolve_constant(instructions, address, base_reg)
+            break
+
+    if table is None or index is None:
+        return None
+
+    table = (table + table_offset) & 0xFFFFFFFF
+    count = _find_bound(instructions, index[0], index[1])
+    # The immediate is sign extended, a negative one bounds nothing
+    if count is None or count <= 0 or count > MAX_TABLE_ENTRIES:
+        count = MAX_TABLE_ENTRIES
+
+    entries = view.read(table, count * 4)
+    targets = []
+    for i in range(0, len(entries) & ~3, 4):
+        target = int.from_bytes(entries[i:i + 4], "little")
+        if target & 3 or target not in executable:
+            break
+        targets.append(target)
+
+    if not targets:
+        return None
+
+    return tuple(dict.fromkeys(targets))
+
+def resolve_jump_tables(view: BinaryView) -> int:
+    """
+    Recognizes every jump table in the executable segments and records them in the
+    view metadata and its registry. Returns the number resolved.
+    """
+    executable = AddressRanges.executable(view)
+    resolved = {}
+
+    for segment in executable_segments(view):
+        words = segment_words(view, segment)
+        for i in match_words(words, JR_MASK, (JR,)):
+            if words[i] == JR_RA:
+                continue
+
+            addr = segment.start + i * 4
+            targets = recognize_jump_table(view, addr, executable)
+            if targets is not None:
+                resolved[addr] = targets
+
+    for addr, targets in resolved.items():
+        register_jump_table(view, addr, targets)
+
+    if resolved:
+        stored = {str(addr): list(targets) for addr, targets in _view_jump_tables(view).items()}
+        stored.update({str(addr): list(targets) for addr, targets in resolved.items()})
+        view.store_metadata(JUMP_TABLES_METADATA_KEY, stored, True)
+
+    log_info(f"Resolved {len(resolved)} jump tables")
+    return len(resolved)
+
+def _view_jump_tables(view: BinaryView) -> Dict[int, List[int]]:
+    try:
+        stored = view.query_metadata(JUMP_TABLES_METADATA_KEY)
+    except KeyError:
+        return {}
+    return {int(addr): targets for addr, targets in stored.items()}
+
+def load_jump_tables(view: BinaryView) -> int:
+    """
+    Registers jump tables already stored in the view metadata (e.g. from the seed cache).
+    """
+    stored = _view_jump_tables(view)
+    for addr, targets in stored.items():
+        register_jump_table(view, addr, tuple(targets))
+    return len(stored)
+
+def forget_jump_tables(view: BinaryView, start: int, end: int) -> Dict[int, Tuple[int, ...]]:
+    """
+    Unregisters and removes from the view metadata every jump table whose jr lies in
+    [start, end), e.g. when the code there is swapped out. Returns the removed tables.
+    """
+    removed = jump_table_registry(view).forget(start, end)
+
+    stored = _view_jump_tables(view)
+    kept = {str(addr): list(targets) for addr, targets in stored.items() if not start <= addr < end}
+    if len(kept) != len(stored):
+        view.store_metadata(JUMP_TABLES_METADATA_KEY, kept, True)
+
+    return removed
+
+def function_jump_tables(function: Function) -> Dict[int, Tuple[int, ...]]:
+    """
+    Jump tables within a function, cached per function start.
+    """
+    registry = jump_table_registry(function.view)
+    cached = registry.function_tables.get(function.start)
+    if cached is not None:
+        return cached
+
+    if registry.sites is None:
+        registry.sites = sorted(registry.tables)
+    sites = registry.sites
+
+    tables = {}
+    for block in function.basic_blocks:
+        i = bisect_left(sites, block.start)
+        while i < len(sites) and sites[i] < block.end:
+            tables[sites[i]] = registry.tables[sites[i]]
+            i += 1
+
+    registry.function_tables[function.start] = tables
+    return tables
+
+def apply_jump_tables(view: BinaryView) -> None:
+    """
+    Hands each function its tables as indirect branches. The architecture is never
+    given the view, so the tables can't be resolved through InstructionInfo.
+    """
+    for function in view.functions:
+        for addr, targets in function_jump_tables(function).items():
+            function.set_auto_indirect_branches(addr, [(view.arch, target) for target in targets])
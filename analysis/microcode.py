@@ -0,0 +1,113 @@
+from typing import Dict, List, Optional
+
+from binaryninja import BinaryView, Type, log_info
+from binaryninja.enums import SectionSemantics, SymbolType
+from binaryninja.types import Symbol
+
+from .segments import data_segments, match_words, read_words, segment_words
+from ..ps2.vif import VIF_CMD_MASK, VifCommand, vif_immediate, vif_num
+from ..ps2.vu1.decode import MicroInstruction, decode_pairs, format_pair
+
+MICROPROGRAMS_METADATA_KEY = "ps2.microprograms"
+
+MPG = VifCommand.MPG << 24
+
+# Random data decodes as a valid pair often enough that a couple of bad pairs
+# are tolerated, beyond that the MPG match was a coincidence
+MAX_INVALID_FRACTION = 1 / 32
+
+class MicroProgram:
+    """
+    VU microcode uploaded by a VIF MPG command: count pairs at addr, loaded to
+    vu_addr (in bytes) in micro memory.
+    """
+    __slots__ = ["addr", "vu_addr", "count", "pairs"]
+
+    addr: int
+    vu_addr: int
+    count: int
+    pairs: List[MicroInstruction]
+
+    def __init__(self, addr: int, vu_addr: int, count: int, pairs: List[MicroInstruction]):
+        self.addr = addr
+        self.vu_addr = vu_addr
+        self.count = count
+        self.pairs = pairs
+
+    @property
+    def length(self) -> int:
+        return self.count * 8
+
+    def disassemble(self) -> List[str]:
+        return [format_pair(pair, self.vu_addr + i * 8) for i, pair in enumerate(self.pairs)]
+
+def find_microprograms(view: BinaryView) -> List[MicroProgram]:
+    """
+    Scans data segments for MPG VIFcodes followed by a payload which decodes as
+    microcode.
+    """
+    programs = []
+
+    for segment in data_segments(view):
+        words = segment_words(view, segment)
+        end = 0
+        for i in match_words(words, VIF_CMD_MASK, (MPG,)):
+            # Payloads are doubleword aligned, which the VIFcode is padded with NOPs to meet
+            start = i + 1
+            if start < end or (segment.start + start * 4) & 7:
+                continue
+
+            code = words[i]
+            count = vif_num(code)
+            if start + count * 2 > len(words):
+                continue
+
+            pairs = decode_pairs(words[start:start + count * 2])
+            invalid = sum(1 for pair in pairs if not pair.valid)
+            if invalid > count * MAX_INVALID_FRACTION:
+                continue
+
+            programs.append(MicroProgram(segment.start + start * 4, vif_immediate(code) * 8, count, pairs))
+            end = start + count * 2
+
+    return programs
+
+def _load_microprograms(view: BinaryView) -> Optional[List[MicroProgram]]:
+    try:
+        stored = view.query_metadata(MICROPROGRAMS_METADATA_KEY)
+    except KeyError:
+        return None
+
+    programs = []
+    for addr, (vu_addr, count) in stored.items():
+        words = read_words(view, int(addr), count * 8)
+        programs.append(MicroProgram(int(addr), vu_addr, count, decode_pairs(words)))
+    return programs
+
+def annotate_microprograms(view: BinaryView) -> int:
+    """
+    Gives every microprogram its own section and symbol, types it as an array of
+    instruction pairs and comments each pair with its disassembly. Programs are
+    cached in the view metadata.
+    """
+    programs = _load_microprograms(view)
+    if programs is None:
+        programs = find_microprograms(view)
+        stored: Dict[str, List[int]] = {
+            str(program.addr): [program.vu_addr, program.count] for program in programs
+        }
+        view.store_metadata(MICROPROGRAMS_METADATA_KEY, stored, True)
+
+    for program in programs:
+        name = f"vu1_microprogram_{program.addr:x}"
+        view.add_auto_section(f".vu1_{program.addr:x}", program.addr, program.length,
+                              SectionSemantics.ReadOnlyDataSectionSemantics)
+        view.define_auto_symbol(Symbol(SymbolType.DataSymbol, program.addr, name))
+        view.define_auto_data_var(program.addr, Type.array(Type.int(8, False), program.count))
+
+        view.set_comment_at(program.addr - 4, f"MPG {program.count} pairs to {hex(program.vu_addr)}")
+        for i, text in enumerate(program.disassemble()):
+            view.set_comment_at(program.addr + i * 8, f"{hex(program.vu_addr + i * 8)}: {text}")
+
+    log_info(f"Found {len(programs)} VU microprograms")
+    return len(programs)
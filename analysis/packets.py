@@ -0,0 +1,497 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from enum import Enum, auto, unique
+from struct import error as StructError, unpack_from
+from typing import Dict, List, Optional, Tuple
+
+from binaryninja import BinaryView, Type, log_info
+from binaryninja.enums import SymbolType
+from binaryninja.types import Symbol
+
+from .microcode import MicroProgram
+from .segments import data_segments, match_words, read_words
+from ..ps2.dma import DMA_CALL_DEPTH, DMA_TAG_RESERVED_MASK, DmaTagId, dma_addr, dma_id, dma_qwc, dma_spr
+from ..ps2.gif import gif_data_length, gif_eop, gif_format, gif_nloop, gif_prim, gif_register_names
+from ..ps2.vif import (
+    VifCommand,
+    is_unpack,
+    is_vif_command,
+    unpack_formats,
+    vif_cmd,
+    vif_immediate,
+    vif_num,
+    vif_payload_length,
+)
+from ..ps2.vu1.decode import decode_pairs
+
+# Prebuilt DMA source chains: DMAtags whose data is a VIF stream, which in turn
+# carries microcode (MPG), VU data (UNPACK) and GIF packets (DIRECT). Segments
+# are read once and walked through memoryviews, fields are unpacked in place.
+
+DMA_CHAINS_METADATA_KEY = "ps2.dma_chains"
+SESSION_KEY = "ps2.packets"
+
+# Chains looping back on themselves never reach an END
+MAX_TAGS = 4096
+# Fewer tags than this, or only VIF NOPs, is most likely not a chain
+MIN_TAGS = 2
+
+@unique
+class PacketKind(Enum):
+    DmaTag = auto()
+    VifCode = auto()
+    VifData = auto()
+    """
+    STMASK, STROW and STCOL operands
+    """
+    MicroCode = auto()
+    UnpackData = auto()
+    GifTag = auto()
+    GifData = auto()
+
+class Packet:
+    """
+    One parsed element: code is the tag or VIFcode which introduced it, target
+    the VU memory address payloads are written to.
+    """
+    __slots__ = ["addr", "length", "kind", "code", "target"]
+
+    addr: int
+    length: int
+    kind: PacketKind
+    code: int
+    target: Optional[int]
+
+    def __init__(self, addr: int, length: int, kind: PacketKind, code: int, target: Optional[int] = None):
+        self.addr = addr
+        self.length = length
+        self.kind = kind
+        self.code = code
+        self.target = target
+
+    @property
+    def end(self) -> int:
+        return self.addr + self.length
+
+    def describe(self) -> str:
+        match self.kind:
+            case PacketKind.DmaTag:
+                id = dma_id(self.code)
+                text = f"DMAtag {id.name} qwc={dma_qwc(self.code)}"
+                if id not in (DmaTagId.CNT, DmaTagId.RET, DmaTagId.END):
+                    text += f" addr={hex(dma_addr(self.code))}"
+                return text
+            case PacketKind.VifCode:
+                return _describe_vif_code(self.code)
+            case PacketKind.MicroCode:
+                return f"MPG data, {self.length // 8} pairs to {hex(self.target)}"
+            case PacketKind.UnpackData:
+                return f"UNPACK data to {hex(self.target)}"
+            case PacketKind.GifTag:
+                tag = self.code
+                text = f"GIFtag {gif_format(tag).name} nloop={gif_nloop(tag)} regs={gif_register_names(tag, self.target)}"
+                if tag & (1 << 46):
+                    text += f" prim={hex(gif_prim(tag))}"
+                if gif_eop(tag):
+                    text += " eop"
+                return text
+            case PacketKind.GifData:
+                return "GIF data"
+            case _:
+                return f"{VifCommand(vif_cmd(self.code)).name} data"
+
+def _describe_vif_code(code: int) -> str:
+    cmd = vif_cmd(code)
+    imm = vif_immediate(code)
+    if is_unpack(cmd):
+        text = f"UNPACK {unpack_formats[cmd & 0xF]} num={vif_num(code)} to {hex((imm & 0x3FF) * 16)}"
+        if imm & 0x4000:
+            text += " usn"
+        if imm & 0x8000:
+            text += " +tops"
+        return text
+
+    name = VifCommand(cmd).name
+    match cmd:
+        case VifCommand.STCYCL:
+            return f"{name} cl={imm & 0xFF} wl={imm >> 8}"
+        case VifCommand.MPG:
+            return f"{name} {vif_num(code)} pairs to {hex(imm * 8)}"
+        case VifCommand.MSCAL | VifCommand.MSCALF:
+            return f"{name} {hex(imm * 8)}"
+        case VifCommand.DIRECT | VifCommand.DIRECTHL:
+            return f"{name} qwc={imm or 0x10000}"
+        case VifCommand.OFFSET | VifCommand.BASE | VifCommand.ITOP | VifCommand.STMOD | VifCommand.MARK:
+            return f"{name} {hex(imm)}"
+        case _:
+            return name
+
+class SegmentBuffers:
+    """
+    The contents of every file backed segment, each read with a single
+    BinaryView.read and sliced through memoryviews from then on.
+    """
+    __slots__ = ["starts", "ends", "buffers"]
+
+    def __init__(self, view: BinaryView):
+        segments = sorted((segment for segment in view.segments if segment.data_length), key=lambda s: s.start)
+        self.starts = [segment.start for segment in segments]
+        self.ends = [segment.start + segment.data_length for segment in segments]
+        self.buffers = [memoryview(view.read(segment.start, segment.data_length)) for segment in segments]
+
+    def locate(self, addr: int, length: int) -> Optional[Tuple[memoryview, int]]:
+        """
+        (buffer, offset) holding [addr, addr + length), None if no segment does.
+        """
+        i = bisect_right(self.starts, addr) - 1
+        if i < 0 or addr + length > self.ends[i]:
+            return None
+        return self.buffers[i], addr - self.starts[i]
+
+    def words(self, start: int) -> array:
+        buffer = self.buffers[self.starts.index(start)]
+        words = array("I")
+        words.frombytes(buffer[:len(buffer) & ~3])
+        if sys.byteorder != "little":
+            words.byteswap()
+        return words
+
+class GifStream:
+    """
+    Splits DIRECT payloads into GIFtags and their data, packets may continue
+    across VIFcodes.
+    """
+    __slots__ = ["packets", "pending", "tag"]
+
+    def __init__(self, packets: List[Packet]):
+        self.packets = packets
+        self.pending = 0
+        self.tag = 0
+
+    def feed(self, addr: int, buffer: memoryview, offset: int, length: int) -> bool:
+        """
+        False if a GIFtag doesn't fit in the data, e.g. in the VIF half of a DMA tag
+        """
+        pos = 0
+        while pos < length:
+            if self.pending:
+                n = min(self.pending, length - pos)
+                self.packets.append(Packet(addr + pos, n, PacketKind.GifData, self.tag))
+                self.pending -= n
+                pos += n
+                continue
+
+            if length - pos < 16:
+                return False
+            tag, regs = unpack_from("<QQ", buffer, offset + pos)
+            self.packets.append(Packet(addr + pos, 16, PacketKind.GifTag, tag, regs))
+            self.tag = tag
+            self.pending = gif_data_length(tag)
+            pos += 16
+        return True
+
+class VifStream:
+    """
+    Parses the VIF stream carried by a DMA chain. Commands and their data run
+    on across DMA packets, so the stream is fed one packet at a time.
+    """
+    __slots__ = ["packets", "gif", "cl", "wl", "pending", "code", "target", "commands"]
+
+    def __init__(self, packets: List[Packet]):
+        self.packets = packets
+        self.gif = GifStream(packets)
+        self.cl = 1
+        self.wl = 1
+        self.pending = 0
+        self.code = 0
+        self.target = 0
+        # VIFcodes other than NOP
+        self.commands = 0
+
+    def feed(self, addr: int, buffer: memoryview, offset: int, length: int) -> bool:
+        """
+        False if the data isn't a well formed VIF stream
+        """
+        pos = 0
+        while pos < length:
+            if self.pending:
+                n = min(self.pending, length - pos)
+                if not self._payload(addr + pos, buffer, offset + pos, n):
+                    return False
+                self.pending -= n
+                pos += n
+                continue
+
+            code = unpack_from("<I", buffer, offset + pos)[0]
+            cmd = vif_cmd(code)
+            if not is_vif_command(cmd):
+                return False
+
+            self.packets.append(Packet(addr + pos, 4, PacketKind.VifCode, code))
+            pos += 4
+            if cmd != VifCommand.NOP:
+                self.commands += 1
+
+            imm = vif_immediate(code)
+            if cmd == VifCommand.STCYCL:
+                self.cl = imm & 0xFF
+                self.wl = imm >> 8
+            elif cmd == VifCommand.MPG:
+                # Microcode is doubleword aligned, GIF data quadword aligned
+                if (addr + pos) & 7:
+                    return False
+                self.target = imm * 8
+            elif cmd in (VifCommand.DIRECT, VifCommand.DIRECTHL):
+                if (addr + pos) & 15:
+                    return False
+            elif is_unpack(cmd):
+                self.target = (imm & 0x3FF) * 16
+
+            self.code = code
+            self.pending = vif_payload_length(code, self.cl, self.wl)
+        return True
+
+    def _payload(self, addr: int, buffer: memoryview, offset: int, length: int) -> bool:
+        cmd = vif_cmd(self.code)
+        if cmd == VifCommand.MPG:
+            self.packets.append(Packet(addr, length, PacketKind.MicroCode, self.code, self.target))
+            self.target += length
+        elif cmd in (VifCommand.DIRECT, VifCommand.DIRECTHL):
+            return self.gif.feed(addr, buffer, offset, length)
+        elif is_unpack(cmd):
+            self.packets.append(Packet(addr, length, PacketKind.UnpackData, self.code, self.target))
+        else:
+            self.packets.append(Packet(addr, length, PacketKind.VifData, self.code))
+        return True
+
+    @property
+    def complete(self) -> bool:
+        return not self.pending and not self.gif.pending
+
+def walk_chain(buffers: SegmentBuffers, addr: int) -> Optional[List[Packet]]:
+    """
+    Follows the DMA source chain starting with the tag at addr and parses the VIF
+    stream it transfers. None when it doesn't look like a chain.
+    """
+    try:
+        return _walk_chain(buffers, addr)
+    except StructError:
+        # Data running past the end of its segment
+        return None
+
+def _walk_chain(buffers: SegmentBuffers, addr: int) -> Optional[List[Packet]]:
+    packets: List[Packet] = []
+    vif = VifStream(packets)
+    stack: List[int] = []
+    tags = 0
+
+    while True:
+        tags += 1
+        if tags > MAX_TAGS:
+            return None
+
+        located = buffers.locate(addr, 16)
+        if located is None:
+            return None
+        buffer, offset = located
+
+        tag = unpack_from("<Q", buffer, offset)[0]
+        if tag & DMA_TAG_RESERVED_MASK:
+            return None
+        id = dma_id(tag)
+        qwc = dma_qwc(tag)
+        packets.append(Packet(addr, 8, PacketKind.DmaTag, tag))
+
+        # The upper half of the tag goes to the VIF
+        if not vif.feed(addr + 8, buffer, offset + 8, 8):
+            return None
+
+        if id in (DmaTagId.REF, DmaTagId.REFS, DmaTagId.REFE):
+            if dma_spr(tag):
+                return None
+            data = dma_addr(tag)
+            following = addr + 16
+        else:
+            data = addr + 16
+            following = data + qwc * 16
+
+        if qwc:
+            located = buffers.locate(data, qwc * 16)
+            if located is None:
+                return None
+            if not vif.feed(data, located[0], located[1], qwc * 16):
+                return None
+
+        match id:
+            case DmaTagId.CNT | DmaTagId.REF | DmaTagId.REFS:
+                addr = following
+            case DmaTagId.NEXT:
+                addr = dma_addr(tag)
+            case DmaTagId.CALL:
+                if len(stack) == DMA_CALL_DEPTH:
+                    return None
+                stack.append(following)
+                addr = dma_addr(tag)
+            case DmaTagId.RET if stack:
+                addr = stack.pop()
+            case _:
+                break
+
+    if tags < MIN_TAGS or not vif.commands or not vif.complete:
+        return None
+    return packets
+
+class PacketIndex:
+    """
+    Every parsed packet sorted by address, for lookups from the UI
+    """
+    __slots__ = ["chains", "packets", "starts"]
+
+    chains: List[int]
+    """
+    Addresses of the first tag of each chain
+    """
+    packets: List[Packet]
+    starts: List[int]
+
+    def __init__(self, chains: Dict[int, List[Packet]]):
+        self.chains = sorted(chains)
+        # Chains may share REF data or CALLed subchains
+        distinct = {(packet.addr, packet.kind): packet for packets in chains.values() for packet in packets}
+        self.packets = sorted(distinct.values(), key=lambda packet: packet.addr)
+        self.starts = [packet.addr for packet in self.packets]
+
+    def __len__(self) -> int:
+        return len(self.packets)
+
+    def at(self, addr: int) -> Optional[Packet]:
+        """
+        The packet containing addr
+        """
+        i = bisect_right(self.starts, addr) - 1
+        if i < 0:
+            return None
+        packet = self.packets[i]
+        return packet if addr < packet.end else None
+
+    def in_range(self, start: int, end: int) -> List[Packet]:
+        return self.packets[bisect_left(self.starts, start):bisect_left(self.starts, end)]
+
+    def of_kind(self, kind: PacketKind) -> List[Packet]:
+        return [packet for packet in self.packets if packet.kind == kind]
+
+    def microprograms(self, view: BinaryView) -> List[MicroProgram]:
+        """
+        MPG payloads, each contiguous piece as its own program
+        """
+        programs = []
+        for packet in self.of_kind(PacketKind.MicroCode):
+            count = packet.length // 8
+            pairs = decode_pairs(read_words(view, packet.addr, packet.length))
+            programs.append(MicroProgram(packet.addr, packet.target, count, pairs))
+        return programs
+
+    def unpack_targets(self) -> List[Tuple[int, int, str]]:
+        """
+        (data address, VU memory address, format) for every UNPACK
+        """
+        return [(packet.addr, packet.target, unpack_formats[vif_cmd(packet.code) & 0xF])
+                for packet in self.of_kind(PacketKind.UnpackData)]
+
+def find_dma_chains(view: BinaryView, buffers: Optional[SegmentBuffers] = None) -> Dict[int, List[Packet]]:
+    """
+    Tries every quadword aligned candidate tag in the data segments which isn't
+    already part of a chain.
+    """
+    if buffers is None:
+        buffers = SegmentBuffers(view)
+    chains = {}
+    # Quadwords belonging to chains found so far
+    claimed = set()
+
+    for segment in data_segments(view):
+        if not segment.data_length:
+            continue
+        words = buffers.words(segment.start)
+        # Word index of the first quadword aligned address
+        first = (-segment.start & 15) >> 2
+        for i in match_words(words, DMA_TAG_RESERVED_MASK, (0,)):
+            if (i - first) & 3:
+                continue
+            addr = segment.start + i * 4
+            if addr in claimed:
+                continue
+
+            packets = walk_chain(buffers, addr)
+            if packets is None:
+                continue
+            chains[addr] = packets
+            for packet in packets:
+                claimed.update(range(packet.addr & ~15, packet.end, 16))
+
+    return chains
+
+def _load_chains(view: BinaryView, buffers: SegmentBuffers) -> Optional[Dict[int, List[Packet]]]:
+    try:
+        heads = view.query_metadata(DMA_CHAINS_METADATA_KEY)
+    except KeyError:
+        return None
+
+    chains = {}
+    for addr in heads:
+        packets = walk_chain(buffers, addr)
+        if packets is not None:
+            chains[addr] = packets
+    return chains
+
+def packet_index(view: BinaryView) -> PacketIndex:
+    """
+    The view's packet index, built on first use. Chain heads are kept in the view
+    metadata so reopening a database only walks the known chains.
+    """
+    index = view.session_data.get(SESSION_KEY)
+    if index is not None:
+        return index
+
+    buffers = SegmentBuffers(view)
+    chains = _load_chains(view, buffers)
+    if chains is None:
+        chains = find_dma_chains(view, buffers)
+        view.store_metadata(DMA_CHAINS_METADATA_KEY, sorted(chains), True)
+
+    index = PacketIndex(chains)
+    view.session_data[SESSION_KEY] = index
+    return index
+
+def annotate_packets(view: BinaryView) -> int:
+    """
+    Names each chain, types the tags and comments every tag, VIFcode and payload
+    """
+    index = packet_index(view)
+
+    for addr in index.chains:
+        view.define_auto_symbol(Symbol(SymbolType.DataSymbol, addr, f"dma_chain_{addr:x}"))
+
+    for packet in index.packets:
+        match packet.kind:
+            case PacketKind.DmaTag:
+                view.define_auto_data_var(packet.addr, Type.int(8, False))
+            case PacketKind.VifCode:
+                view.define_auto_data_var(packet.addr, Type.int(4, False))
+            case PacketKind.GifTag:
+                view.define_auto_data_var(packet.addr, Type.array(Type.int(8, False), 2))
+            case PacketKind.GifData:
+                # The tag's comment covers its data
+                continue
+        view.set_comment_at(packet.addr, packet.describe())
+
+    log_info(f"Parsed {len(index.chains)} DMA chains, {len(index)} packets")
+    return len(index.chains)
+
+def describe_packet(view: BinaryView, addr: int) -> None:
+    packet = packet_index(view).at(addr)
+    if packet is None:
+        log_info(f"{hex(addr)} is not part of a DMA chain")
+        return
+    log_info(f"{hex(packet.addr)}-{hex(packet.end)}: {packet.describe()}")
@@ -0,0 +1,88 @@
+from typing import List
+
+from binaryninja import BinaryView, log_info
+
+from .segments import executable_segments, match_words, segment_words
+
+# Words are classified by masking out the fields that vary between functions
+# (immediates, offsets) and comparing against the encoding of the idiom.
+
+IMM_SIGN_MASK = 0xFFFF8000
+ADDIU_SP_SP_NEG  = 0x27BD8000 # addiu  $sp, $sp, -N
+DADDIU_SP_SP_NEG = 0x67BD8000 # daddiu $sp, $sp, -N
+
+IMM_MASK = 0xFFFF0000
+RA_SAVES = (
+    0xAFBF0000, # sw $ra, N($sp)
+    0xFFBF0000, # sd $ra, N($sp)
+    0x7FBF0000, # sq $ra, N($sp)
+)
+LUI_GP = 0x3C1C0000 # lui $gp, N
+GP_LO_SETUPS = (
+    0x279C0000, # addiu $gp, $gp, N
+    0x379C0000, # ori   $gp, $gp, N
+)
+
+JR_RA = 0x03E00008
+NOP = 0x00000000
+
+# How far after the stack adjustment the $ra spill may be scheduled
+RA_SAVE_WINDOW = 8
+
+def _follows_function_end(words, i: int) -> bool:
+    # Start of the segment, right after jr $ra + delay slot, or after alignment padding
+    if i == 0:
+        return True
+    if i >= 2 and words[i - 2] == JR_RA:
+        return True
+    return words[i - 1] == NOP and (i < 2 or words[i - 2] in (NOP, JR_RA))
+
+def prologue_indices(words) -> List[int]:
+    """
+    Indices of the words starting a prologue idiom, without decoding.
+    """
+    starts = []
+    if not words:
+        return starts
+
+    sp_adjusts = match_words(words, IMM_SIGN_MASK, (ADDIU_SP_SP_NEG, DADDIU_SP_SP_NEG))
+    ra_saves = set(match_words(words, IMM_MASK, RA_SAVES))
+    gp_setups = match_words(words, IMM_MASK, (LUI_GP,))
+    gp_lo_setups = set(match_words(words, IMM_MASK, GP_LO_SETUPS))
+
+    for i in sp_adjusts:
+        # Non-leaf functions spill $ra shortly after the stack adjustment,
+        # leaf functions need to sit on a function boundary instead
+        if not ra_saves.isdisjoint(range(i + 1, i + 1 + RA_SAVE_WINDOW)) or \
+                _follows_function_end(words, i):
+            starts.append(i)
+
+    for i in gp_setups:
+        if i + 1 in gp_lo_setups and _follows_function_end(words, i):
+            starts.append(i)
+
+    return starts
+
+def find_prologues(view: BinaryView) -> List[int]:
+    """
+    Scans executable segments for EE function prologue idioms.
+    """
+    starts = []
+
+    for segment in executable_segments(view):
+        words = segment_words(view, segment)
+        starts.extend(segment.start + i * 4 for i in prologue_indices(words))
+
+    return sorted(set(starts))
+
+def seed_prologues(view: BinaryView) -> int:
+    """
+    Adds a function at every prologue found by find_prologues, returns the number found.
+    """
+    starts = find_prologues(view)
+
+    for addr in starts:
+        view.add_function(addr)
+
+    log_info(f"Seeded {len(starts)} function starts from prologues")
+    return len(starts)
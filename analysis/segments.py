@@ -0,0 +1,87 @@
+import hashlib
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import compress
+from typing import Iterable, List, Optional, Sequence
+
+from binaryninja import BinaryView
+from binaryninja.binaryview import Segment
+from binaryninja.function import Function
+
+from ..ps2.memory_map import canonicalize
+
+def executable_segments(view: BinaryView) -> List[Segment]:
+    return [segment for segment in view.segments if segment.executable]
+
+def data_segments(view: BinaryView) -> List[Segment]:
+    return [segment for segment in view.segments if not segment.executable]
+
+def read_words(view: BinaryView, start: int, length: int) -> array:
+    """
+    Reads a range as little endian 32-bit words with a single read
+    """
+    data = view.read(start, length & ~3)
+    words = array("I")
+    words.frombytes(data[:len(data) & ~3])
+    if sys.byteorder != "little":
+        words.byteswap()
+    return words
+
+def segment_words(view: BinaryView, segment: Segment) -> array:
+    # Only the file backed part of a segment holds code
+    return read_words(view, segment.start, segment.data_length)
+
+def match_words(words: Sequence[int], mask: int, values: Iterable[int]) -> List[int]:
+    """
+    Returns the indices of every word where (word & mask) is one of values.
+    The whole sweep runs in C through map/compress rather than a per-word python loop.
+    """
+    values = frozenset(values)
+    return list(compress(range(len(words)), map(values.__contains__, map(mask.__and__, words))))
+
+class AddressRanges:
+    """
+    Sorted, non-overlapping [start, end) ranges with bisect lookups
+    """
+    __slots__ = ["starts", "ends"]
+
+    def __init__(self, ranges: Iterable[Sequence[int]]):
+        ranges = sorted((start, end) for start, end in ranges if end > start)
+        self.starts = [start for start, _ in ranges]
+        self.ends = [end for _, end in ranges]
+
+    def __contains__(self, addr: int) -> bool:
+        i = bisect_right(self.starts, addr) - 1
+        return i >= 0 and addr < self.ends[i]
+
+    def resolve(self, addr: int) -> Optional[int]:
+        """
+        addr if it's in range, otherwise the address it mirrors if that is, e.g. a
+        kseg0 pointer into RAM. None when neither is.
+        """
+        if addr in self:
+            return addr
+        addr = canonicalize(addr)
+        return addr if addr in self else None
+
+    @classmethod
+    def executable(cls, view: BinaryView) -> "AddressRanges":
+        return cls((segment.start, segment.end) for segment in executable_segments(view))
+
+    @classmethod
+    def mapped(cls, view: BinaryView) -> "AddressRanges":
+        return cls((segment.start, segment.end) for segment in view.segments)
+
+def function_digest(view: BinaryView, function: Function, *extra: object) -> str:
+    """
+    Hash of a function's basic blocks and their contents, plus anything else its
+    analysis depends on. Unchanged functions hash the same across sessions.
+    """
+    hasher = hashlib.sha1()
+    for value in extra:
+        hasher.update(str(value).encode())
+    for block in sorted(function.basic_blocks, key=lambda block: block.start):
+        hasher.update(block.start.to_bytes(4, "little"))
+        hasher.update(view.read(block.start, block.end - block.start))
+    return hasher.hexdigest()
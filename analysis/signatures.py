@@ -0,0 +1,207 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from binaryninja import BinaryView, log_info, log_warn, user_directory
+from binaryninja.enums import SymbolType
+from binaryninja.types import Symbol
+
+from .segments import executable_segments, segment_words
+from ..ps2.decode import decode
+from ..ps2.instruction import Instruction, InstructionType
+from ..ps2.ee.registers import GP_REG
+
+# Functions are identified by a hash of their first PREFIX_WORDS instructions with
+# every field the linker relocates masked out, so the same library function hashes
+# the same no matter where it ended up.
+
+SIGNATURE_DATABASE_VERSION = 1
+PREFIX_WORDS = 16
+MIN_PREFIX_WORDS = 4
+
+JUMP_TARGET_MASK = 0xFC000000
+IMMEDIATE_MASK = 0xFFFF0000
+JR_RA = 0x03E00008
+
+_ADDRESS_ARITHMETIC = frozenset(["addiu", "daddiu", "addi", "daddi", "ori"])
+
+@lru_cache(maxsize=1 << 16)
+def _decode_word(word: int) -> Instruction:
+    # Nothing used here depends on the address, so decoding can be shared by word
+    return decode(word.to_bytes(4, "little"), 0)
+
+def mask_words(words: Sequence[int]) -> List[int]:
+    masked = []
+    # Registers holding a lui'd high half, whose low half gets relocated too
+    relocated = {GP_REG}
+
+    for word in words:
+        instruction = _decode_word(word)
+
+        if instruction.name in ("j", "jal"):
+            word &= JUMP_TARGET_MASK
+        elif instruction.name == "lui":
+            word &= IMMEDIATE_MASK
+            relocated.add(instruction.reg1)
+        elif instruction.reg2 in relocated and \
+                (instruction.type == InstructionType.LoadStore or instruction.name in _ADDRESS_ARITHMETIC):
+            word &= IMMEDIATE_MASK
+
+        masked.append(word)
+
+    return masked
+
+def function_prefix(words: Sequence[int], start: int) -> Optional[List[int]]:
+    """
+    The first PREFIX_WORDS words from start, cut short after jr $ra and its delay slot.
+    """
+    prefix = list(words[start:start + PREFIX_WORDS])
+    if JR_RA in prefix:
+        prefix = prefix[:prefix.index(JR_RA) + 2]
+
+    if len(prefix) < MIN_PREFIX_WORDS:
+        return None
+    return prefix
+
+def signature_hash(words: Sequence[int]) -> str:
+    data = b"".join(word.to_bytes(4, "little") for word in mask_words(words))
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+class SignatureDatabase:
+    signatures: Dict[str, Optional[str]]
+    """
+    hash -> function name, None when several functions share the hash
+    """
+
+    def __init__(self):
+        self.signatures = {}
+
+    def add(self, signature: str, name: str) -> None:
+        existing = self.signatures.get(signature, name)
+        self.signatures[signature] = name if existing == name else None
+
+    def lookup(self, signature: str) -> Optional[str]:
+        return self.signatures.get(signature)
+
+    def merge(self, other: SignatureDatabase) -> None:
+        for signature, name in other.signatures.items():
+            if name is None:
+                self.signatures[signature] = None
+            else:
+                self.add(signature, name)
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({
+                "version": SIGNATURE_DATABASE_VERSION,
+                "prefix_words": PREFIX_WORDS,
+                "signatures": self.signatures,
+            }, f, indent=1, sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str) -> Optional[SignatureDatabase]:
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        if data.get("version") != SIGNATURE_DATABASE_VERSION or data.get("prefix_words") != PREFIX_WORDS:
+            log_warn(f"Skipping incompatible signature database {path}")
+            return None
+
+        database = cls()
+        database.signatures = data["signatures"]
+        return database
+
+def signature_directories() -> List[str]:
+    return [
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "signatures"),
+        os.path.join(user_directory(), "ps2-bn", "signatures"),
+    ]
+
+def load_signature_databases(directories: Optional[Iterable[str]] = None) -> SignatureDatabase:
+    """
+    Merges every *.json database found in the signature directories.
+    """
+    database = SignatureDatabase()
+
+    for directory in directories or signature_directories():
+        if not os.path.isdir(directory):
+            continue
+
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+
+            try:
+                loaded = SignatureDatabase.load(os.path.join(directory, filename))
+            except (OSError, ValueError, KeyError) as e:
+                log_warn(f"Failed to load signature database {filename}: {e}")
+                continue
+
+            if loaded is not None:
+                database.merge(loaded)
+
+    return database
+
+def _function_signatures(view: BinaryView, starts: Iterable[int]) -> Dict[int, str]:
+    # Read each executable segment once and slice the prefixes out of it
+    starts = sorted(set(starts))
+    signatures = {}
+
+    for segment in executable_segments(view):
+        words = None
+        for start in starts:
+            if not segment.start <= start < segment.start + segment.data_length:
+                continue
+
+            if words is None:
+                words = segment_words(view, segment)
+
+            prefix = function_prefix(words, (start - segment.start) // 4)
+            if prefix is not None:
+                signatures[start] = signature_hash(prefix)
+
+    return signatures
+
+def _has_default_name(view: BinaryView, addr: int) -> bool:
+    symbol = view.get_symbol_at(addr)
+    return symbol is None or (symbol.auto and symbol.name.startswith("sub_"))
+
+def match_signatures(view: BinaryView, database: Optional[SignatureDatabase] = None) -> int:
+    """
+    Names every unnamed function whose signature is in the database, returns the number named.
+    """
+    if database is None:
+        database = load_signature_databases()
+
+    if not database.signatures:
+        return 0
+
+    starts = [function.start for function in view.functions]
+    named = 0
+
+    for start, signature in _function_signatures(view, starts).items():
+        name = database.lookup(signature)
+        if name is not None and _has_default_name(view, start):
+            view.define_auto_symbol(Symbol(SymbolType.FunctionSymbol, start, name))
+            named += 1
+
+    log_info(f"Named {named} functions from signatures")
+    return named
+
+def build_signature_database(view: BinaryView) -> SignatureDatabase:
+    """
+    Creates a database from every named function in the view.
+    """
+    names = {}
+    for function in view.functions:
+        if not _has_default_name(view, function.start):
+            names[function.start] = function.name
+
+    database = SignatureDatabase()
+    for start, signature in _function_signatures(view, names).items():
+        database.add(signature, names[start])
+
+    return database
@@ -0,0 +1,183 @@
+import re
+from typing import Dict, List, Optional, Set
+
+from binaryninja import BinaryView, Type, log_info
+
+from .cache import STRINGS_METADATA_KEY
+from .constants import ConstantPairIndex, build_constant_index
+from .segments import AddressRanges
+
+# Finds NUL terminated ASCII and Shift-JIS strings. The byte classes are matched by
+# a compiled regex, which runs in C over each chunk rather than per byte in python:
+#   ASCII:                 09 0A 0D 20-7E
+#   half-width katakana:   A1-DF
+#   double-byte lead byte: 81-9F E0-FC, followed by a trail byte 40-7E 80-FC
+
+_CHARACTER = rb"(?:[\x09\x0A\x0D\x20-\x7E\xA1-\xDF]|[\x81-\x9F\xE0-\xFC][\x40-\x7E\x80-\xFC])"
+
+# Strings referenced by a lui pair are kept down to this many characters
+MIN_REFERENCED_LENGTH = 2
+# Unreferenced ones need to be this many bytes, short runs turn up in any data
+MIN_LENGTH = 6
+# Longest string kept, in characters
+MAX_LENGTH = 0x1000
+# Bytes of a string of MAX_LENGTH double-byte characters and its terminator
+MAX_STRING_BYTES = 2 * MAX_LENGTH + 1
+
+CHUNK_SIZE = 0x100000
+
+# Microsoft's superset, which has the NEC and IBM extensions games use
+SHIFT_JIS = "cp932"
+
+# Maximal runs, the terminator and the lengths are checked per run. Bounding the
+# repeat and requiring the NUL in the pattern makes every failed start rescan the
+# rest of a long unterminated run.
+_RUN = re.compile(_CHARACTER + rb"+")
+
+class FoundString:
+    __slots__ = ["addr", "length", "shift_jis", "referenced"]
+
+    addr: int
+    length: int
+    """
+    Bytes, without the terminator
+    """
+    shift_jis: bool
+    referenced: bool
+    """
+    Whether a lui pair in the code points at it
+    """
+
+    def __init__(self, addr: int, length: int, shift_jis: bool, referenced: bool):
+        self.addr = addr
+        self.length = length
+        self.shift_jis = shift_jis
+        self.referenced = referenced
+
+def scan_strings(view: BinaryView, start: int, length: int, referenced: Set[int],
+                 referenced_only: bool = False) -> List[FoundString]:
+    """
+    Strings in [start, start + length), read CHUNK_SIZE bytes at a time. Each chunk
+    overlaps the next by MAX_STRING_BYTES so strings across the boundary are still found.
+    """
+    strings = []
+    end = start + length
+    chunk = start
+    # End of the last run, the next chunk continues from there when it crossed the boundary
+    resume = start
+    # Whether the last run went on past the data read, the next chunk starts inside it
+    truncated = False
+    # Last byte of the previous chunk, for runs starting at a chunk boundary
+    before: Optional[int] = None
+
+    while chunk < end:
+        chunk_end = min(chunk + CHUNK_SIZE, end)
+        data_end = min(chunk_end + MAX_STRING_BYTES, end)
+        data = view.read(chunk, data_end - chunk)
+
+        for match in _RUN.finditer(data, max(resume - chunk, 0)):
+            if match.start() >= chunk_end - chunk:
+                break
+
+            addr = chunk + match.start()
+            continued = truncated and addr == resume
+            resume = chunk + match.end()
+            truncated = match.end() == len(data) and data_end < end
+            if continued or match.end() == len(data) or data[match.end()] != 0:
+                continue
+
+            text = match.group()
+            is_referenced = addr in referenced
+            if referenced_only and not is_referenced:
+                continue
+            if len(text) < MIN_LENGTH and not is_referenced:
+                continue
+            # Each character is one or two bytes
+            if len(text) < MIN_REFERENCED_LENGTH or len(text) > 2 * MAX_LENGTH:
+                continue
+            previous = data[match.start() - 1] if match.start() > 0 else before
+            if previous is not None and previous >= 0x80 and not is_referenced:
+                # Likely the tail of a longer run that failed to match
+                continue
+
+            characters = len(text)
+            shift_jis = not text.isascii()
+            if shift_jis:
+                try:
+                    characters = len(text.decode(SHIFT_JIS))
+                except UnicodeDecodeError:
+                    continue
+            if not MIN_REFERENCED_LENGTH <= characters <= MAX_LENGTH:
+                continue
+
+            strings.append(FoundString(addr, len(text), shift_jis, is_referenced))
+
+        before = data[chunk_end - chunk - 1] if len(data) >= chunk_end - chunk else None
+        chunk = chunk_end
+
+    return strings
+
+def referenced_addresses(view: BinaryView, index: ConstantPairIndex) -> Set[int]:
+    """
+    Every address a lui pair materializes, mirrors resolved to the mapped address.
+    """
+    mapped = AddressRanges.mapped(view)
+    resolved = (mapped.resolve(target) for target in index.references)
+    return {target for target in resolved if target is not None}
+
+def find_strings(view: BinaryView, index: Optional[ConstantPairIndex] = None) -> List[FoundString]:
+    """
+    Strings in the file backed part of every segment. Strings in executable segments
+    are only kept when code references them, since single segment executables put
+    .rodata next to the code.
+    """
+    if index is None:
+        index = build_constant_index(view)
+    referenced = referenced_addresses(view, index)
+
+    strings = []
+    for segment in view.segments:
+        if segment.data_length == 0:
+            continue
+        strings.extend(scan_strings(view, segment.start, segment.data_length, referenced, segment.executable))
+    return strings
+
+def _load_strings(view: BinaryView) -> Optional[List[FoundString]]:
+    try:
+        stored = view.query_metadata(STRINGS_METADATA_KEY)
+    except KeyError:
+        return None
+    return [
+        FoundString(int(addr), length, bool(shift_jis), bool(referenced))
+        for addr, (length, shift_jis, referenced) in stored.items()
+    ]
+
+def _store_strings(view: BinaryView, strings: List[FoundString]) -> None:
+    stored: Dict[str, list] = {
+        str(string.addr): [string.length, string.shift_jis, string.referenced] for string in strings
+    }
+    view.store_metadata(STRINGS_METADATA_KEY, stored, True)
+
+def annotate_strings(view: BinaryView, rescan: bool = False) -> int:
+    """
+    Defines every string found as a char array, with the decoded text as a comment
+    for Shift-JIS ones. Strings are cached in the view metadata, rescan looks for
+    them again. Returns the number of strings defined.
+    """
+    strings = None if rescan else _load_strings(view)
+    if strings is None:
+        strings = find_strings(view, getattr(view, "constant_index", None))
+        _store_strings(view, strings)
+
+    char = Type.char()
+
+    for string in strings:
+        view.define_auto_data_var(string.addr, Type.array(char, string.length + 1))
+        if string.shift_jis:
+            text = view.read(string.addr, string.length).decode(SHIFT_JIS)
+            view.set_comment_at(string.addr, text)
+
+    shift_jis = sum(1 for string in strings if string.shift_jis)
+    referenced = sum(1 for string in strings if string.referenced)
+    log_info(f"Defined {len(strings)} strings ({shift_jis} Shift-JIS, {referenced} referenced by code)")
+    return len(strings)
@@ -0,0 +1,100 @@
+from typing import Dict, Optional, Sequence
+
+from binaryninja import BinaryView, log_info
+from binaryninja.enums import SymbolType
+from binaryninja.types import Symbol
+
+from .cache import SYSCALLS_METADATA_KEY
+from .segments import executable_segments, match_words, segment_words
+from ..ps2.syscalls import get_name
+
+SYSCALL_MASK = 0xFC00003F
+SYSCALL = 0x0000000C
+
+IMM_MASK = 0xFFFF0000
+LI_V1 = (
+    0x24030000, # addiu  $v1, $zero, N
+    0x64030000, # daddiu $v1, $zero, N
+)
+ORI_V1 = 0x34030000 # ori $v1, $zero, N
+
+JR_RA = 0x03E00008
+V1 = 3
+
+# How many instructions before the syscall the number may be loaded
+BACK_SCAN = 4
+
+# I-type opcodes writing rt, and those ending a basic block
+_WRITES_RT = frozenset([0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x0E, 0x0F, 0x18, 0x19, 0x1A, 0x1B,
+                        0x1E, 0x20, 0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x37])
+_BRANCHES = frozenset([0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x14, 0x15, 0x16, 0x17])
+
+def _is_li_v1(word: int) -> bool:
+    return word & IMM_MASK in LI_V1 or word & IMM_MASK == ORI_V1
+
+def _syscall_number(words: Sequence[int], i: int) -> Optional[int]:
+    # Walk back from the syscall at i until $v1 is written
+    for j in range(i - 1, max(i - 1 - BACK_SCAN, -1), -1):
+        word = words[j]
+        if word & IMM_MASK in LI_V1:
+            value = word & 0xFFFF
+            return value - 0x10000 if value & 0x8000 else value
+        if word & IMM_MASK == ORI_V1:
+            return word & 0xFFFF
+
+        op = word >> 26
+        if op in _BRANCHES or (op == 0 and word & 0x3E == 0x08):
+            # branch, jump, jr or jalr
+            return None
+        if op in _WRITES_RT and (word >> 16) & 0x1F == V1:
+            return None
+        if op in (0x00, 0x1C) and (word >> 11) & 0x1F == V1:
+            return None
+    return None
+
+def find_syscalls(view: BinaryView) -> Dict[int, int]:
+    """
+    Returns syscall address -> syscall number for every site whose number could be resolved.
+    """
+    sites = {}
+
+    for segment in executable_segments(view):
+        words = segment_words(view, segment)
+        for i in match_words(words, SYSCALL_MASK, (SYSCALL,)):
+            number = _syscall_number(words, i)
+            if number is not None:
+                sites[segment.start + i * 4] = number
+
+    return sites
+
+def _load_syscalls(view: BinaryView) -> Optional[Dict[int, int]]:
+    try:
+        stored = view.query_metadata(SYSCALLS_METADATA_KEY)
+    except KeyError:
+        return None
+    return {int(addr): number for addr, number in stored.items()}
+
+def annotate_syscalls(view: BinaryView) -> int:
+    """
+    Comments every resolved syscall site and names kernel wrapper stubs
+    (li $v1, N; syscall; jr $ra; nop). Sites are cached in the view metadata.
+    """
+    sites = _load_syscalls(view)
+    if sites is None:
+        sites = find_syscalls(view)
+        view.store_metadata(SYSCALLS_METADATA_KEY, {str(addr): number for addr, number in sites.items()}, True)
+
+    stubs = 0
+    for addr, number in sites.items():
+        name = get_name(number)
+        view.set_comment_at(addr, f"{name} ({hex(number)})")
+
+        stub = view.read(addr - 4, 12)
+        if len(stub) == 12 and _is_li_v1(int.from_bytes(stub[0:4], "little")) and \
+                int.from_bytes(stub[8:12], "little") == JR_RA:
+            view.define_auto_symbol(Symbol(SymbolType.FunctionSymbol, addr - 4, name))
+            view.add_function(addr - 4)
+            stubs += 1
+
+    log_info(f"Annotated {len(sites)} syscall sites, named {stubs} kernel stubs")
+    return len(sites)
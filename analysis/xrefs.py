@@ -0,0 +1,14 @@
+from typing import Iterable, Tuple
+
+from binaryninja import BinaryView
+
+def add_data_refs(view: BinaryView, refs: Iterable[Tuple[int, int]]) -> int:
+    """
+    Adds an auto data xref for every (from, to) pair, returns the number added.
+    These don't need a function at the source so they can be added before analysis.
+    """
+    count = 0
+    for source, target in refs:
+        view.add_data_ref(source, target)
+        count += 1
+    return count
@@ -0,0 +1,268 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import traceback
+from enum import Enum, unique
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows, memory limits aren't enforced
+    resource = None
+
+from .disc import is_disc_image, read_boot_executable
+from .elf_view import is_ps2_executable
+
+# Headless analysis of a directory of PS2 executables and disc images, e.g.
+#   python -m <plugin package>.batch builds/ -o results/ -j 8 --timeout 1800 --memory 8192
+# Each file is analysed in its own process, which writes <name>.json with the
+# functions, timings and opcode coverage to the output directory.
+
+DEFAULT_TIMEOUT = 30 * 60
+DEFAULT_MEMORY_MB = 8 * 1024
+# Seconds between checks on the running workers
+POLL_INTERVAL = 0.25
+# Bytes read to check a file's ELF header
+ELF_HEADER_SIZE = 0x40
+
+BUNDLE_VERSION = 1
+
+@unique
+class Status(Enum):
+    Analyzed = "analyzed"
+    Failed = "failed"
+    TimedOut = "timed out"
+    Crashed = "crashed"
+
+@unique
+class InputKind(Enum):
+    Executable = "executable"
+    Disc = "disc"
+
+class _BytesReader:
+    """
+    read(offset, length) over bytes, for the header checks which expect a BinaryView
+    """
+    __slots__ = ["data"]
+
+    data: bytes
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self.data[offset:offset + length]
+
+class Task:
+    __slots__ = ["path", "kind", "bundle"]
+
+    path: str
+    kind: InputKind
+    bundle: str
+    """
+    Path of the result bundle
+    """
+
+    def __init__(self, path: str, kind: InputKind, bundle: str):
+        self.path = path
+        self.kind = kind
+        self.bundle = bundle
+
+def classify(path: str) -> Optional[InputKind]:
+    """
+    Whether path is a PS2 executable, a disc image, or neither
+    """
+    try:
+        with open(path, "rb") as file:
+            if is_ps2_executable(_BytesReader(file.read(ELF_HEADER_SIZE))):
+                return InputKind.Executable
+            if is_disc_image(file):
+                return InputKind.Disc
+    except OSError:
+        pass
+    return None
+
+def find_tasks(directory: str, output: str) -> List[Task]:
+    tasks = []
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            kind = classify(path)
+            if kind is None:
+                continue
+
+            name = os.path.relpath(path, directory).replace(os.sep, "_")
+            tasks.append(Task(path, kind, os.path.join(output, name + ".json")))
+    return tasks
+
+def _write_bundle(path: str, bundle: Dict) -> None:
+    # Written beside and renamed so a killed worker never leaves half a bundle
+    temp = path + ".tmp"
+    with open(temp, "w") as file:
+        json.dump(bundle, file, indent=1)
+    os.replace(temp, path)
+
+def _limit_memory(megabytes: int) -> None:
+    if resource is None or megabytes <= 0:
+        return
+    limit = megabytes * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _analyze(task: Task, sqlite: bool) -> Dict:
+    # Imported here so only the workers load the core
+    import binaryninja
+    from .analysis.coverage import build_histogram
+    from .export import export_sqlite
+
+    bundle = {"version": BUNDLE_VERSION, "path": task.path, "kind": task.kind.value}
+    start = time.perf_counter()
+
+    path = task.path
+    temp = None
+    if task.kind == InputKind.Disc:
+        name, data = read_boot_executable(task.path)
+        bundle["executable"] = name
+        if not is_ps2_executable(_BytesReader(data)):
+            raise ValueError(f"{name} isn't a PS2 executable")
+
+        temp = tempfile.NamedTemporaryFile(suffix="_" + name, delete=False)
+        temp.write(data)
+        temp.close()
+        path = temp.name
+
+    try:
+        view = binaryninja.load(path, update_analysis=False)
+        if view is None or view.view_type != "PS2 ELF":
+            raise ValueError(f"{path} didn't open as a PS2 executable")
+
+        loaded = time.perf_counter()
+        view.update_analysis_and_wait()
+        analyzed = time.perf_counter()
+
+        bundle["timing"] = {
+            "load": loaded - start,
+            "analysis": analyzed - loaded,
+        }
+        bundle["functions"] = [
+            {"address": function.start, "name": function.name, "size": function.total_bytes}
+            for function in view.functions
+        ]
+        bundle["coverage"] = build_histogram(view).to_json()
+
+        if sqlite:
+            export_sqlite(view, os.path.splitext(task.bundle)[0] + ".sqlite")
+
+        view.file.close()
+        bundle["timing"]["total"] = time.perf_counter() - start
+    finally:
+        if temp is not None:
+            os.unlink(temp.name)
+
+    return bundle
+
+def _worker(task: Task, memory: int, sqlite: bool) -> None:
+    _limit_memory(memory)
+    try:
+        bundle = _analyze(task, sqlite)
+        bundle["status"] = Status.Analyzed.value
+    except Exception as e:
+        bundle = {
+            "version": BUNDLE_VERSION,
+            "path": task.path,
+            "kind": task.kind.value,
+            "status": Status.Failed.value,
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(),
+        }
+    _write_bundle(task.bundle, bundle)
+
+def _failure_bundle(task: Task, status: Status, elapsed: float, error: str) -> Dict:
+    return {
+        "version": BUNDLE_VERSION,
+        "path": task.path,
+        "kind": task.kind.value,
+        "status": status.value,
+        "error": error,
+        "timing": {"total": elapsed},
+    }
+
+def run(tasks: List[Task], jobs: int, timeout: float, memory: int, sqlite: bool = False) -> Dict[str, str]:
+    """
+    Analyses every task with at most jobs worker processes, killing those which run
+    past timeout seconds. Returns task path -> status.
+    """
+    # The core isn't fork safe, workers start from a fresh interpreter
+    context = multiprocessing.get_context("spawn")
+    pending = list(reversed(tasks))
+    running: Dict[multiprocessing.Process, tuple] = {}
+    statuses = {}
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            task = pending.pop()
+            if os.path.exists(task.bundle):
+                os.unlink(task.bundle)
+            process = context.Process(target=_worker, args=(task, memory, sqlite), daemon=True)
+            process.start()
+            running[process] = (task, time.monotonic())
+
+        time.sleep(POLL_INTERVAL)
+
+        for process, (task, started) in list(running.items()):
+            elapsed = time.monotonic() - started
+            if process.is_alive():
+                if elapsed < timeout:
+                    continue
+                process.kill()
+                process.join()
+                _write_bundle(task.bundle, _failure_bundle(task, Status.TimedOut, elapsed,
+                                                           f"Killed after {timeout:.0f}s"))
+            else:
+                process.join()
+                if process.exitcode != 0 or not os.path.exists(task.bundle):
+                    # Out of memory in the core, or a crash, before a bundle was written
+                    _write_bundle(task.bundle, _failure_bundle(task, Status.Crashed, elapsed,
+                                                               f"Exit code {process.exitcode}"))
+
+            del running[process]
+            with open(task.bundle) as file:
+                statuses[task.path] = json.load(file)["status"]
+            print(f"[{len(statuses)}/{len(tasks)}] {task.path}: {statuses[task.path]} ({elapsed:.1f}s)", flush=True)
+
+    return statuses
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse a directory of PS2 executables and disc images")
+    parser.add_argument("directory")
+    parser.add_argument("-o", "--output", default="results", help="Directory for the result bundles")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds per file")
+    parser.add_argument("--memory", type=int, default=DEFAULT_MEMORY_MB,
+                        help="Address space limit per worker in MiB, 0 for none")
+    parser.add_argument("--sqlite", action="store_true", help="Also export each file to SQLite")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    tasks = find_tasks(args.directory, args.output)
+    print(f"Found {len(tasks)} executables and disc images in {args.directory}", flush=True)
+
+    start = time.monotonic()
+    statuses = run(tasks, max(args.jobs, 1), args.timeout, args.memory, args.sqlite)
+
+    summary = {
+        "elapsed": time.monotonic() - start,
+        "statuses": statuses,
+    }
+    _write_bundle(os.path.join(args.output, "summary.json"), summary)
+
+    failed = sum(1 for status in statuses.values() if status != Status.Analyzed.value)
+    print(f"Analysed {len(statuses) - failed} of {len(statuses)} files in {summary['elapsed']:.0f}s", flush=True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Measures how long importing the plugin takes, which includes registering the
+architecture, the view and the commands. Each run is a fresh interpreter with
+binaryninja already imported, so only the plugin's own cost is counted:
+
+    python benchmarks/startup.py [--runs 20] [--modules]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PLUGIN_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_RUN = """
+import importlib
+import sys
+import time
+
+import binaryninja
+
+sys.path.insert(0, {parent!r})
+start = time.perf_counter()
+plugin = importlib.import_module({name!r})
+elapsed = time.perf_counter() - start
+
+# Lazily imported modules stay in sys.modules unexecuted until first used
+loaded = sorted(
+    name for name, module in sys.modules.items()
+    if name.startswith({name!r}) and type(module).__name__ == "module"
+)
+print(elapsed)
+print(" ".join(loaded))
+"""
+
+def measure(runs: int):
+    code = _RUN.format(parent=os.path.dirname(PLUGIN_DIRECTORY), name=os.path.basename(PLUGIN_DIRECTORY))
+    times = []
+    modules = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        elapsed, loaded = output.splitlines()[-2:]
+        times.append(float(elapsed))
+        modules = loaded.split()
+    return times, modules
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the plugin's import and registration")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--modules", action="store_true", help="List the plugin modules loaded at startup")
+    args = parser.parse_args()
+
+    times, modules = measure(args.runs)
+    print(f"import + register over {args.runs} runs: "
+          f"min {min(times) * 1000:.1f} ms, median {statistics.median(times) * 1000:.1f} ms, "
+          f"max {max(times) * 1000:.1f} ms")
+    print(f"{len(modules)} plugin modules loaded")
+    if args.modules:
+        for name in modules:
+            print(f"  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+from binaryninja import BinaryView, PluginCommand, log_info
+from binaryninja.interaction import get_address_input, get_choice_input, get_open_filename_input, \
+    get_save_filename_input
+
+from .util import lazy_function, lazy_import
+
+# Nothing here runs until a command is used, so the modules behind them are only
+# imported then
+export = lazy_import(".export", __package__)
+function_tables = lazy_import(".analysis.function_tables", __package__)
+jump_tables = lazy_import(".analysis.jump_tables", __package__)
+overlay = lazy_import(".overlay", __package__)
+signatures = lazy_import(".analysis.signatures", __package__)
+strings = lazy_import(".analysis.strings", __package__)
+
+def _is_ee_view(view: BinaryView) -> bool:
+    return view.arch is not None and view.arch.name == "EmotionEngine"
+
+def _resolve_jump_tables(view: BinaryView) -> None:
+    jump_tables.resolve_jump_tables(view)
+    jump_tables.apply_jump_tables(view)
+
+def _find_function_tables(view: BinaryView) -> None:
+    # Functions found since the last scan can complete more tables
+    function_tables.annotate_function_tables(view, rescan=True)
+
+def _find_strings(view: BinaryView) -> None:
+    strings.annotate_strings(view, rescan=True)
+
+def _create_signature_database(view: BinaryView) -> None:
+    path = get_save_filename_input("Signature database", "json")
+    if not path:
+        return
+
+    database = signatures.build_signature_database(view)
+    database.save(path)
+    log_info(f"Saved {len(database.signatures)} signatures to {path}")
+
+def _export_sqlite(view: BinaryView) -> None:
+    path = get_save_filename_input("SQLite database", "sqlite", export.export_path(view) or "")
+    if not path:
+        return
+
+    export.export_sqlite(view, path)
+
+def _register_overlay(view: BinaryView) -> None:
+    path = get_open_filename_input("Overlay file")
+    if not path:
+        return
+
+    base = get_address_input("Load address", "Register Overlay")
+    if base is None:
+        return
+
+    overlay.OverlayManager(view).register(path, base)
+
+def _switch_overlay(view: BinaryView) -> None:
+    manager = overlay.OverlayManager(view)
+    names = list(manager.overlays)
+    if not names:
+        return
+
+    choices = [f"{name} (active)" if name in manager.active else name for name in names]
+    choice = get_choice_input("Overlay", "Switch Overlay", choices)
+    if choice is not None:
+        manager.activate(names[choice])
+
+def _has_overlays(view: BinaryView) -> bool:
+    if not _is_ee_view(view):
+        return False
+    try:
+        return len(view.query_metadata(overlay.OVERLAYS_METADATA_KEY)) > 0
+    except KeyError:
+        return False
+
+def register_commands() -> None:
+    PluginCommand.register(
+        "PS2\\Seed Functions From Prologues",
+        "Scan executable segments for EE function prologues and add them as functions",
+        lazy_function(".analysis.prologue", __package__, "seed_prologues"),
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Seed Functions From jal Targets",
+        "Add a function at every jal target inside an executable segment",
+        lazy_function(".analysis.calls", __package__, "seed_jal_targets"),
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Find Function Pointer Tables",
+        "Find vtables and other tables of function pointers in the data segments",
+        _find_function_tables,
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Resolve Jump Tables",
+        "Recognize switch statement jump tables and resolve their jr targets",
+        _resolve_jump_tables,
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Resolve Indirect Calls",
+        "Resolve jalr targets loaded from constants and function pointer tables",
+        lazy_function(".analysis.indirect_calls", __package__, "resolve_indirect_calls"),
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Match Library Signatures",
+        "Name functions matching the installed signature databases",
+        lazy_function(".analysis.signatures", __package__, "match_signatures"),
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Create Signature Database",
+        "Save the signatures of every named function to a database",
+        _create_signature_database,
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Annotate Syscalls",
+        "Resolve syscall numbers and name kernel wrapper stubs",
+        lazy_function(".analysis.syscalls", __package__, "annotate_syscalls"),
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Find Strings",
+        "Define the ASCII and Shift-JIS strings in the mapped segments",
+        _find_strings,
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Opcode Coverage Report",
+        "Rank mnemonics by frequency and list those which lift to unimplemented IL",
+        lazy_function(".analysis.coverage", __package__, "show_coverage_report"),
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Find VU Microprograms",
+        "Find VU1 microcode uploaded by VIF MPG commands and disassemble it",
+        lazy_function(".analysis.microcode", __package__, "annotate_microprograms"),
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Parse DMA Chains",
+        "Find prebuilt DMA chains and annotate their DMA, VIF and GIF tags",
+        lazy_function(".analysis.packets", __package__, "annotate_packets"),
+        _is_ee_view
+    )
+    PluginCommand.register_for_address(
+        "PS2\\Describe DMA Packet",
+        "Show the DMA, VIF or GIF element containing this address",
+        lazy_function(".analysis.packets", __package__, "describe_packet"),
+        lambda view, addr: _is_ee_view(view)
+    )
+    PluginCommand.register(
+        "PS2\\Export to SQLite",
+        "Export instructions, functions, calls and data xrefs, rewriting only changed functions",
+        _export_sqlite,
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Overlays\\Register Overlay",
+        "Register a file loaded into this executable's address space at runtime",
+        _register_overlay,
+        _is_ee_view
+    )
+    PluginCommand.register(
+        "PS2\\Overlays\\Switch Overlay",
+        "Map a registered overlay, keeping the analysis of the one it replaces",
+        _switch_overlay,
+        _has_overlays
+    )
@@ -0,0 +1,169 @@
+import re
+import struct
+from typing import BinaryIO, Dict, Optional, Tuple
+
+# Just enough ISO9660 to find the boot executable of a PS2 disc dump:
+# SYSTEM.CNF in the root directory names it on its BOOT2 line.
+# https://wiki.osdev.org/ISO_9660
+
+SECTOR_SIZE = 2048
+RAW_SECTOR_SIZE = 2352
+RAW_SYNC = b"\x00" + b"\xFF" * 10 + b"\x00"
+
+PRIMARY_VOLUME_DESCRIPTOR_SECTOR = 16
+VOLUME_DESCRIPTOR_ID = b"CD001"
+ROOT_DIRECTORY_RECORD_OFFSET = 156
+
+DIRECTORY_FLAG = 0x02
+
+SYSTEM_CNF = "SYSTEM.CNF"
+_BOOT2 = re.compile(rb"^\s*BOOT2\s*=\s*cdrom0:\\?(\S+?)(?:;\d+)?\s*$", re.MULTILINE | re.IGNORECASE)
+
+class DirectoryRecord:
+    __slots__ = ["name", "extent", "length", "flags"]
+
+    name: str
+    """
+    Upper case, without the ;1 version suffix
+    """
+    extent: int
+    length: int
+    flags: int
+
+    def __init__(self, name: str, extent: int, length: int, flags: int):
+        self.name = name
+        self.extent = extent
+        self.length = length
+        self.flags = flags
+
+    @property
+    def is_directory(self) -> bool:
+        return bool(self.flags & DIRECTORY_FLAG)
+
+def _read_record(data: bytes, offset: int) -> Optional[DirectoryRecord]:
+    length = data[offset]
+    if length == 0:
+        return None
+
+    extent, = struct.unpack_from("<I", data, offset + 2)
+    size, = struct.unpack_from("<I", data, offset + 10)
+    flags = data[offset + 25]
+    name_length = data[offset + 32]
+    name = data[offset + 33:offset + 33 + name_length].decode("ascii", "replace")
+    return DirectoryRecord(name.split(";")[0].upper(), extent, size, flags)
+
+class IsoImage:
+    """
+    A disc image with either 2048 byte sectors (.iso) or raw 2352 byte ones (.bin).
+    """
+    __slots__ = ["file", "sector_size", "data_offset", "root"]
+
+    file: BinaryIO
+    sector_size: int
+    data_offset: int
+    """
+    Offset of the user data within a raw sector, past the sync pattern and header
+    """
+    root: DirectoryRecord
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.sector_size = SECTOR_SIZE
+        self.data_offset = 0
+
+        file.seek(0)
+        if file.read(len(RAW_SYNC)) == RAW_SYNC:
+            self.sector_size = RAW_SECTOR_SIZE
+            file.seek(15)
+            # Mode 2 sectors have an 8 byte subheader before the data
+            self.data_offset = 24 if file.read(1) == b"\x02" else 16
+
+        descriptor = self.read_sector(PRIMARY_VOLUME_DESCRIPTOR_SECTOR)
+        if descriptor[1:6] != VOLUME_DESCRIPTOR_ID:
+            raise ValueError("Not an ISO9660 image")
+
+        self.root = _read_record(descriptor, ROOT_DIRECTORY_RECORD_OFFSET)
+
+    def read_sector(self, lba: int) -> bytes:
+        self.file.seek(lba * self.sector_size + self.data_offset)
+        return self.file.read(SECTOR_SIZE)
+
+    def read_extent(self, record: DirectoryRecord) -> bytes:
+        sectors = (record.length + SECTOR_SIZE - 1) // SECTOR_SIZE
+        if self.sector_size == SECTOR_SIZE:
+            self.file.seek(record.extent * SECTOR_SIZE)
+            return self.file.read(record.length)
+
+        data = b"".join(self.read_sector(record.extent + i) for i in range(sectors))
+        return data[:record.length]
+
+    def list_directory(self, directory: DirectoryRecord) -> Dict[str, DirectoryRecord]:
+        data = self.read_extent(directory)
+        records = {}
+        offset = 0
+        while offset < len(data):
+            record = _read_record(data, offset)
+            if record is None:
+                # Records don't cross sectors, the rest of this one is padding
+                offset = (offset // SECTOR_SIZE + 1) * SECTOR_SIZE
+                continue
+
+            # Skip the . and .. entries
+            if record.name not in ("\x00", "\x01"):
+                records[record.name] = record
+            offset += data[offset]
+        return records
+
+    def find(self, path: str) -> Optional[DirectoryRecord]:
+        record = self.root
+        for part in re.split(r"[\\/]", path.strip("\\/")):
+            if not record.is_directory:
+                return None
+            record = self.list_directory(record).get(part.split(";")[0].upper())
+            if record is None:
+                return None
+        return record
+
+    def read_file(self, path: str) -> Optional[bytes]:
+        record = self.find(path)
+        if record is None or record.is_directory:
+            return None
+        return self.read_extent(record)
+
+def boot_path(system_cnf: bytes) -> Optional[str]:
+    """
+    The executable named by SYSTEM.CNF, e.g. SLUS_200.02 for BOOT2 = cdrom0:\\SLUS_200.02;1
+    """
+    match = _BOOT2.search(system_cnf)
+    if match is None:
+        return None
+    return match.group(1).decode("ascii", "replace")
+
+def is_disc_image(file: BinaryIO) -> bool:
+    try:
+        IsoImage(file)
+    except (ValueError, IndexError, struct.error):
+        return False
+    return True
+
+def read_boot_executable(path: str) -> Tuple[str, bytes]:
+    """
+    Returns the name and contents of the executable a disc image boots.
+    Raises ValueError when the image isn't a PS2 disc.
+    """
+    with open(path, "rb") as file:
+        image = IsoImage(file)
+
+        system_cnf = image.read_file(SYSTEM_CNF)
+        if system_cnf is None:
+            raise ValueError(f"{path} has no {SYSTEM_CNF}")
+
+        name = boot_path(system_cnf)
+        if name is None:
+            raise ValueError(f"{SYSTEM_CNF} in {path} has no BOOT2 line")
+
+        data = image.read_file(name)
+        if data is None:
+            raise ValueError(f"{path} has no {name}")
+
+        return name.replace("\\", "/").split("/")[-1], data
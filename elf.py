@@ -1,5 +1,6 @@
+import struct
 from enum import Enum, IntEnum
-from typing import Optional
+from typing import List, Optional
 
 from binaryninja import BinaryView, log_info
 
@@ -50,6 +51,21 @@ class HeaderOffsets(IntEnum):
     SectionHeaderCount       = 0x30
     SectionHeaderStringIndex = 0x32
 
+# 32 bit only
+class SectionHeaderOffsets(IntEnum):
+    Name           = 0x00
+    Type           = 0x04
+    Flags          = 0x08
+    Address        = 0x0C
+    Offset         = 0x10
+    Size           = 0x14
+    Link           = 0x18
+    Info           = 0x1C
+    Alignment      = 0x20
+    FixedEntrySize = 0x24
+
+SYMBOL_ENTRY_SIZE = 0x10
+
 class AbiType(IntEnum):
     SystemV = 0x00
     HPUX    = 0x01
@@ -130,6 +146,13 @@ class SectionType(IntEnum):
     ExtendedSectionIndices   = 0x12
     TypeCound                = 0x13
 
+class SymbolType(IntEnum):
+    NoType   = 0x0
+    Object   = 0x1
+    Function = 0x2
+    Section  = 0x3
+    File     = 0x4
+
 class SectionAttributeFlags(IntEnum):
     Write           = 1 << 0
     Alloc           = 1 << 1
@@ -164,6 +187,13 @@ class SectionHeader:
     alignment: int
     fixed_entry_size: int
 
+class ElfSymbol:
+    name: str
+    value: int
+    size: int
+    type: SymbolType
+    section_index: int
+
 class FileHeader:
     magic: str
     format: FormatType
@@ -205,6 +235,11 @@ def read_elf_header(data: BinaryView) -> Optional[FileHeader]:
     program_header_count  = data.read(HeaderOffsets.ProgramHeaderCount, 2)
     program_header_size   = data.read(HeaderOffsets.ProgramHeaderSize, 2)
 
+    section_header_offset     = data.read(HeaderOffsets.SectionHeaderOffset, 4)
+    section_header_count      = data.read(HeaderOffsets.SectionHeaderCount, 2)
+    section_header_size       = data.read(HeaderOffsets.SectionHeaderSize, 2)
+    section_header_name_index = data.read(HeaderOffsets.SectionHeaderStringIndex, 2)
+
     header.endian      = int.from_bytes(endian, 'little')
     header.abi         = int.from_bytes(abi,    'little')
     header.arch        = int.from_bytes(arch,   'little')
@@ -214,6 +249,11 @@ def read_elf_header(data: BinaryView) -> Optional[FileHeader]:
     header.program_header_count  = int.from_bytes(program_header_count, 'little')
     header.program_header_size   = int.from_bytes(program_header_size, 'little')
 
+    header.section_header_offset     = int.from_bytes(section_header_offset, 'little')
+    header.section_header_count      = int.from_bytes(section_header_count, 'little')
+    header.section_header_size       = int.from_bytes(section_header_size, 'little')
+    header.section_header_name_index = int.from_bytes(section_header_name_index, 'little')
+
     header.flags  = int.from_bytes(flags, 'little')
 
     return header
@@ -239,4 +279,60 @@ def read_program_header(data: BinaryView, start: int) -> Optional[ProgramHeader]
     program_header.flags            = int.from_bytes(flags, 'little')
     program_header.alignment        = int.from_bytes(alignment, 'little')
 
-    return program_header
\ No newline at end of file
+    return program_header
+
+def read_section_header(data: BinaryView, start: int) -> SectionHeader:
+    fields = struct.unpack('<10I', data.read(start, 0x28))
+
+    section_header = SectionHeader()
+
+    # name is left as the offset into the section name string table
+    section_header.name             = fields[SectionHeaderOffsets.Name // 4]
+    section_header.type             = fields[SectionHeaderOffsets.Type // 4]
+    section_header.flags            = fields[SectionHeaderOffsets.Flags // 4]
+    section_header.address          = fields[SectionHeaderOffsets.Address // 4]
+    section_header.offset           = fields[SectionHeaderOffsets.Offset // 4]
+    section_header.size             = fields[SectionHeaderOffsets.Size // 4]
+    section_header.link             = fields[SectionHeaderOffsets.Link // 4]
+    section_header.info             = fields[SectionHeaderOffsets.Info // 4]
+    section_header.alignment        = fields[SectionHeaderOffsets.Alignment // 4]
+    section_header.fixed_entry_size = fields[SectionHeaderOffsets.FixedEntrySize // 4]
+
+    return section_header
+
+def read_section_headers(data: BinaryView, header: FileHeader) -> List[SectionHeader]:
+    if header.section_header_offset == 0 or header.section_header_size < 0x28:
+        return []
+
+    return [
+        read_section_header(data, header.section_header_offset + i * header.section_header_size)
+        for i in range(header.section_header_count)
+    ]
+
+def read_symbols(data: BinaryView, header: FileHeader) -> List[ElfSymbol]:
+    sections = read_section_headers(data, header)
+    symbols = []
+
+    for section in sections:
+        if section.type != SectionType.SymbolTable or section.link >= len(sections):
+            continue
+
+        string_table = sections[section.link]
+        names = data.read(string_table.offset, string_table.size)
+        entries = data.read(section.offset, section.size - section.size % SYMBOL_ENTRY_SIZE)
+
+        # Every entry is read out of a single read of the table
+        for name, value, size, info, _, section_index in struct.iter_unpack('<IIIBBH', entries):
+            end = names.find(b'\0', name)
+            if name == 0 or end < 0:
+                continue
+
+            symbol = ElfSymbol()
+            symbol.name          = names[name:end].decode('ascii', 'replace')
+            symbol.value         = value
+            symbol.size          = size
+            symbol.type          = info & 0xF
+            symbol.section_index = section_index
+            symbols.append(symbol)
+
+    return symbols
\ No newline at end of file
@@ -1,14 +1,37 @@
 import struct
+from typing import List
 
-from binaryninja import BinaryView, Architecture, log_info
-from binaryninja.enums import SegmentFlag
+from binaryninja import BinaryView, Architecture, Type, log_info, log_warn
+from binaryninja.binaryview import BinaryDataNotification
+from binaryninja.enums import SectionSemantics, SegmentFlag, SymbolType
+from binaryninja.types import Symbol
 
 from .elf import (
+    ElfSymbol,
     EndianType,
     SegmentFlags,
+    SymbolType as ElfSymbolType,
     read_elf_header,
-    read_program_header
+    read_program_header,
+    read_symbols
 )
+from .Arch import EmotionEngine
+from .ps2.memory_map import RegionKind, hardware_registers, regions
+from .util import lazy_import
+
+# The analysis passes only run once a view is opened
+cache = lazy_import(".analysis.cache", __package__)
+calls = lazy_import(".analysis.calls", __package__)
+constants = lazy_import(".analysis.constants", __package__)
+function_tables = lazy_import(".analysis.function_tables", __package__)
+gp = lazy_import(".analysis.gp", __package__)
+indirect_calls = lazy_import(".analysis.indirect_calls", __package__)
+jump_tables = lazy_import(".analysis.jump_tables", __package__)
+prologue = lazy_import(".analysis.prologue", __package__)
+signatures = lazy_import(".analysis.signatures", __package__)
+strings = lazy_import(".analysis.strings", __package__)
+syscalls = lazy_import(".analysis.syscalls", __package__)
+typelib = lazy_import(".typelib", __package__)
 
 TX79_FLAG = 0x00920000
 
@@ -26,28 +49,71 @@ def elf_program_segment_flags_to_binary_ninja_flag(flags: SegmentFlags):
 
     return out
 
+def is_ps2_executable(data) -> bool:
+    """
+    data is anything with a BinaryView style read(offset, length), so files can be
+    checked before a view is opened for them.
+    """
+    header = read_elf_header(data)
+
+    # not an elf
+    if header is None:
+        return False
+    
+    # ps2 is le so we don't care about be elfs
+    if header.endian != EndianType.Little:
+        return False
+    
+    # platform specific flags
+    # in this case Toshiba hides the EE check here
+    if header.flags & TX79_FLAG != TX79_FLAG:
+        return False
+
+    return True
+
+class PatchNotification(BinaryDataNotification):
+    """
+    Drops the architecture's cached results for patched bytes, along with those of
+    the instructions before them which read into the patch (delay slots, pseudo-ops).
+    """
+    def __init__(self, view: 'PS2ExecutableView'):
+        super().__init__()
+        self.view = view
+
+    def data_written(self, view: BinaryView, offset: int, length: int) -> None:
+        EmotionEngine.invalidate(offset, offset + length)
+        self.view._patched = True
+
+    def data_inserted(self, view: BinaryView, offset: int, length: int) -> None:
+        # Everything behind the insertion moved
+        EmotionEngine.invalidate_from(offset)
+        self.view._patched = True
+
+    def data_removed(self, view: BinaryView, offset: int, length: int) -> None:
+        EmotionEngine.invalidate_from(offset)
+        self.view._patched = True
+
 class PS2ExecutableView(BinaryView):
     name      = "PS2 ELF"
     long_name = "PlayStation 2 Executable"
 
+    WANT_SEED_CACHE = True
+    WANT_PROLOGUE_SCAN = True
+    WANT_JAL_HARVEST = True
+    WANT_FUNCTION_TABLES = True
+    WANT_JUMP_TABLES = True
+    WANT_INDIRECT_CALLS = True
+    WANT_GP_DISCOVERY = True
+    WANT_CONSTANT_INDEX = True
+    WANT_STRINGS = True
+    WANT_SIGNATURES = True
+    WANT_SYSCALLS = True
+    WANT_MEMORY_MAP = True
+    WANT_TYPE_LIBRARY = True
+
     @classmethod
     def is_valid_for_data(self, data: BinaryView) -> bool:
-        header = read_elf_header(data)
-
-        # not an elf
-        if header is None:
-            return False
-        
-        # ps2 is le so we don't care about be elfs
-        if header.endian != EndianType.Little:
-            return False
-        
-        # platform specific flags
-        # in this case Toshiba hides the EE check here
-        if header.flags & TX79_FLAG != TX79_FLAG:
-            return False
-    
-        return True
+        return is_ps2_executable(data)
     
     def __init__(self, data: BinaryView):
         BinaryView.__init__(self, parent_view = data, file_metadata = data.file)
@@ -62,6 +128,7 @@ class PS2ExecutableView(BinaryView):
         self.add_entry_point(header.entry_point)
 
         offset = header.program_header_offset
+        hasher = cache.SeedHasher()
 
         for i in range(header.program_header_count):
             log_info(f"Reading segment {i} at {hex(offset)}")
@@ -77,10 +144,131 @@ class PS2ExecutableView(BinaryView):
             flags = elf_program_segment_flags_to_binary_ninja_flag(program_header.flags)
 
             self.add_auto_segment(virtual_address, memory_size, data_offset, length, flags)
+            hasher.add_segment(virtual_address, memory_size, self.data.read(data_offset, length))
 
             offset += header.program_header_size
 
+        if PS2ExecutableView.WANT_MEMORY_MAP:
+            self._map_hardware_regions()
+
+        symbols = read_symbols(self.data, header)
+        self._define_elf_symbols(symbols)
+
+        self._seed_digest = hasher.hexdigest()
+        seeded = False
+        if PS2ExecutableView.WANT_SEED_CACHE:
+            seeded = self._init_seed_cache()
+
+        if PS2ExecutableView.WANT_GP_DISCOVERY:
+            gp.discover_gp(self, header.entry_point, symbols)
+
+        self.constant_index = None
+        if PS2ExecutableView.WANT_CONSTANT_INDEX:
+            self.constant_index = constants.build_constant_index(self)
+            constants.apply_constant_data_refs(self, self.constant_index)
+
+        # Strings, function tables and syscalls come from the seeds when they were
+        # cached, the passes only scan when the view metadata has no results
+        if PS2ExecutableView.WANT_STRINGS:
+            # Reuses the constant index when there is one
+            strings.annotate_strings(self)
+
+        # The cached function starts and names hold everything these find
+        if PS2ExecutableView.WANT_PROLOGUE_SCAN and not seeded:
+            prologue.seed_prologues(self)
+
+        if PS2ExecutableView.WANT_JAL_HARVEST and not seeded:
+            calls.seed_jal_targets(self)
+
+        if PS2ExecutableView.WANT_FUNCTION_TABLES:
+            # After the other seeds, which make up the plausible targets
+            function_tables.annotate_function_tables(self)
+
+        if PS2ExecutableView.WANT_SIGNATURES and not seeded:
+            signatures.match_signatures(self)
+
+        if PS2ExecutableView.WANT_SYSCALLS:
+            syscalls.annotate_syscalls(self)
+
+        if PS2ExecutableView.WANT_TYPE_LIBRARY:
+            # After everything that names functions
+            typelib.apply_type_library(self)
+
+        if PS2ExecutableView.WANT_JUMP_TABLES:
+            # Cached tables make the sweep unnecessary
+            if jump_tables.load_jump_tables(self) == 0:
+                jump_tables.resolve_jump_tables(self)
+
+        if PS2ExecutableView.WANT_INDIRECT_CALLS:
+            indirect_calls.load_indirect_calls(self)
+
+        # Keep a reference, the event is unregistered once it's garbage collected
+        self._analysis_completion_event = self.add_analysis_completion_event(self._on_analysis_complete)
+
+        self._patched = False
+        self._patch_notification = PatchNotification(self)
+        self.register_notification(self._patch_notification)
+
+        return True
+
+    def _map_hardware_regions(self) -> None:
+        # Scratchpad and the memory mapped registers, so accesses to them resolve
+        # and show up by name. RAM and the BIOS have no contents to map.
+        for region in regions:
+            if region.kind in (RegionKind.RAM, RegionKind.BIOS):
+                continue
+            if any(segment.start < region.end and region.start < segment.end for segment in self.segments):
+                continue
+
+            self.add_auto_segment(region.start, region.length, 0, 0,
+                                  SegmentFlag.SegmentReadable | SegmentFlag.SegmentWritable)
+            self.add_auto_section(region.name, region.start, region.length,
+                                  SectionSemantics.ReadWriteDataSectionSemantics)
+
+        for addr, (name, size) in hardware_registers.items():
+            self.define_auto_symbol(Symbol(SymbolType.DataSymbol, addr, name))
+            if size == 16:
+                self.define_auto_data_var(addr, Type.array(Type.int(4, False), 4))
+            else:
+                self.define_auto_data_var(addr, Type.int(size, False))
+
+    def _define_elf_symbols(self, symbols: List[ElfSymbol]) -> None:
+        for symbol in symbols:
+            if symbol.value == 0:
+                continue
+
+            if symbol.type == ElfSymbolType.Function:
+                self.define_auto_symbol(Symbol(SymbolType.FunctionSymbol, symbol.value, symbol.name))
+                self.add_function(symbol.value)
+            elif symbol.type == ElfSymbolType.Object:
+                self.define_auto_symbol(Symbol(SymbolType.DataSymbol, symbol.value, symbol.name))
+
+    def _init_seed_cache(self) -> bool:
+        """
+        Applies the cached seeds for this executable, returns whether there were any.
+        """
+        seeds = cache.SeedCache().load(self._seed_digest)
+        if seeds is None:
+            return False
+
+        log_info(f"Found cached analysis seeds for {self._seed_digest}")
+        cache.apply_seeds(self, seeds)
         return True
+
+    def _on_analysis_complete(self) -> None:
+        if PS2ExecutableView.WANT_JUMP_TABLES:
+            jump_tables.apply_jump_tables(self)
+
+        if PS2ExecutableView.WANT_INDIRECT_CALLS:
+            # Unchanged functions reuse their stored results
+            indirect_calls.resolve_indirect_calls(self)
+
+        # Seeds are keyed by the unpatched contents
+        if PS2ExecutableView.WANT_SEED_CACHE and not self._patched:
+            try:
+                cache.SeedCache().store(self._seed_digest, cache.collect_seeds(self))
+            except OSError as e:
+                log_warn(f"Failed to write seed cache entry {self._seed_digest}: {e}")
     
     def perform_is_executable(self) -> bool:
         return True
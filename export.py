@@ -0,0 +1,192 @@
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from binaryninja import BinaryView, log_info
+from binaryninja.function import Function
+
+from .analysis.segments import function_digest
+
+# Exports the disassembly, functions, call edges and data xrefs to SQLite for other
+# tools to query. Each function's rows are keyed by its start and tagged with a hash
+# of its code and edges, so exporting again only rewrites the functions that changed.
+# The edges come from analysis, e.g. resolved indirect calls and $gp relative refs,
+# and can change while the code stays the same.
+
+EXPORT_SCHEMA_VERSION = 1
+
+# Rows per executemany
+BATCH_SIZE = 10000
+# Indexes are dropped and rebuilt after the load when more than this fraction of
+# functions changed, updating them row by row costs more than building them again
+REINDEX_FRACTION = 0.25
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS functions (address INTEGER PRIMARY KEY, name TEXT, size INTEGER, hash TEXT)",
+    "CREATE TABLE IF NOT EXISTS instructions "
+        "(function INTEGER, address INTEGER, word INTEGER, mnemonic TEXT, operands TEXT)",
+    "CREATE TABLE IF NOT EXISTS calls (function INTEGER, address INTEGER, target INTEGER)",
+    "CREATE TABLE IF NOT EXISTS data_refs (function INTEGER, address INTEGER, target INTEGER)",
+)
+
+_INDEXES = {
+    "instructions_function": "instructions (function)",
+    "instructions_address": "instructions (address)",
+    "calls_function": "calls (function)",
+    "calls_target": "calls (target)",
+    "data_refs_function": "data_refs (function)",
+    "data_refs_target": "data_refs (target)",
+}
+
+# Tables holding per-function rows
+_FUNCTION_TABLES = ("instructions", "calls", "data_refs")
+
+class _BatchWriter:
+    """
+    Buffers rows per statement and writes them with executemany once BATCH_SIZE
+    have accumulated.
+    """
+    __slots__ = ["connection", "pending"]
+
+    connection: sqlite3.Connection
+    pending: Dict[str, List[tuple]]
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.pending = {}
+
+    def add(self, statement: str, rows: Iterable[tuple]) -> None:
+        batch = self.pending.setdefault(statement, [])
+        batch.extend(rows)
+        if len(batch) >= BATCH_SIZE:
+            self.connection.executemany(statement, batch)
+            batch.clear()
+
+    def flush(self) -> None:
+        for statement, batch in self.pending.items():
+            if batch:
+                self.connection.executemany(statement, batch)
+        self.pending.clear()
+
+def _instruction_rows(view: BinaryView, function: Function) -> List[tuple]:
+    # Text comes from the architecture, the same as the disassembly view
+    arch = view.arch
+    rows = []
+    for block in sorted(function.basic_blocks, key=lambda block: block.start):
+        data = view.read(block.start, block.end - block.start)
+        offset = 0
+        while offset + 4 <= len(data):
+            addr = block.start + offset
+            word = int.from_bytes(data[offset:offset + 4], "little")
+            text = arch.get_instruction_text(data[offset:], addr)
+            if text is None:
+                rows.append((function.start, addr, word, None, None))
+                offset += 4
+                continue
+
+            tokens, length = text
+            operands = "".join(token.text for token in tokens[2:])
+            rows.append((function.start, addr, word, tokens[0].text, operands))
+            offset += max(length, 4)
+    return rows
+
+def _call_rows(view: BinaryView, function: Function) -> List[tuple]:
+    rows = []
+    for site in function.call_sites:
+        for target in view.get_callees(site.address, function):
+            rows.append((function.start, site.address, target))
+    return rows
+
+def _data_ref_rows(view: BinaryView, function: Function) -> List[tuple]:
+    # Every word, pseudo-ops like li cover two instructions with one row
+    rows = []
+    for block in function.basic_blocks:
+        for addr in range(block.start, block.end, 4):
+            for target in view.get_code_refs_from(addr, function):
+                if view.get_function_at(target) is None:
+                    rows.append((function.start, addr, target))
+    return rows
+
+def _stored_hashes(connection: sqlite3.Connection) -> Dict[int, str]:
+    return dict(connection.execute("SELECT address, hash FROM functions"))
+
+def _drop_indexes(connection: sqlite3.Connection) -> None:
+    for name in _INDEXES:
+        connection.execute(f"DROP INDEX IF EXISTS {name}")
+
+def _create_indexes(connection: sqlite3.Connection) -> None:
+    for name, columns in _INDEXES.items():
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+
+def _delete_functions(connection: sqlite3.Connection, starts: Iterable[int]) -> None:
+    rows = [(start,) for start in starts]
+    for table in _FUNCTION_TABLES:
+        connection.executemany(f"DELETE FROM {table} WHERE function = ?", rows)
+    connection.executemany("DELETE FROM functions WHERE address = ?", rows)
+
+def export_sqlite(view: BinaryView, path: str) -> Tuple[int, int]:
+    """
+    Exports the view to the database at path, creating it if needed. Returns the
+    number of functions rewritten and the number left as they were.
+    """
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+
+        stored = _stored_hashes(connection)
+        version = connection.execute("SELECT value FROM metadata WHERE key = 'version'").fetchone()
+        if version is None or int(version[0]) != EXPORT_SCHEMA_VERSION:
+            stored = {}
+
+        functions = {function.start: function for function in view.functions}
+        edges = {start: (_call_rows(view, function), _data_ref_rows(view, function))
+                 for start, function in functions.items()}
+        hashes = {start: function_digest(view, function, *edges[start]) for start, function in functions.items()}
+        changed = [start for start, digest in hashes.items() if stored.get(start) != digest]
+        removed: Set[int] = set(stored) - set(functions)
+
+        with connection:
+            reindex = not stored or len(changed) > len(functions) * REINDEX_FRACTION
+            if reindex:
+                _drop_indexes(connection)
+
+            if not stored:
+                for table in _FUNCTION_TABLES + ("functions",):
+                    connection.execute(f"DELETE FROM {table}")
+            else:
+                _delete_functions(connection, removed | set(changed))
+
+            writer = _BatchWriter(connection)
+            for start in changed:
+                function = functions[start]
+                writer.add("INSERT INTO instructions VALUES (?, ?, ?, ?, ?)", _instruction_rows(view, function))
+                calls, data_refs = edges[start]
+                writer.add("INSERT INTO calls VALUES (?, ?, ?)", calls)
+                writer.add("INSERT INTO data_refs VALUES (?, ?, ?)", data_refs)
+                writer.add("INSERT INTO functions VALUES (?, ?, ?, ?)",
+                           [(start, function.name, function.total_bytes, hashes[start])])
+            writer.flush()
+
+            # Renames don't change the hash
+            connection.executemany("UPDATE functions SET name = ? WHERE address = ? AND name != ?",
+                                   [(function.name, start, function.name) for start, function in functions.items()])
+            connection.execute("INSERT OR REPLACE INTO metadata VALUES ('version', ?)", (str(EXPORT_SCHEMA_VERSION),))
+
+            if reindex:
+                _create_indexes(connection)
+    finally:
+        connection.close()
+
+    unchanged = len(functions) - len(changed)
+    log_info(f"Exported {len(changed)} functions to {path}, {unchanged} unchanged")
+    return len(changed), unchanged
+
+def export_path(view: BinaryView) -> Optional[str]:
+    """
+    Default database path next to the analysed file
+    """
+    filename = view.file.filename
+    return filename + ".sqlite" if filename else None
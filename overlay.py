@@ -0,0 +1,249 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from binaryninja import BinaryView, log_info, log_warn
+from binaryninja.enums import SegmentFlag
+
+from .Arch import EmotionEngine
+from .analysis.cache import AnalysisSeeds, SeedCache, apply_seeds, collect_range, forget_range
+from .analysis.calls import jal_targets
+from .analysis.jump_tables import forget_jump_tables, load_jump_tables
+from .analysis.prologue import prologue_indices
+from .analysis.segments import read_words
+
+# Games load overlays from disc into the same address range at runtime. Each overlay
+# registered against a view is mapped as a memory region over that range, only one
+# overlay per range is enabled at a time. Switching away from an overlay saves its
+# functions, symbols, jump tables, data variables, comments and xrefs as seeds and
+# clears them from the range, switching back applies them again instead of
+# rediscovering everything.
+
+OVERLAYS_METADATA_KEY = "ps2.overlays"
+ACTIVE_OVERLAYS_METADATA_KEY = "ps2.overlays.active"
+
+OVERLAY_SEGMENT_FLAGS = SegmentFlag.SegmentReadable | SegmentFlag.SegmentWritable | SegmentFlag.SegmentExecutable
+
+class Overlay:
+    name: str
+    path: str
+    base: int
+    offset: int
+    """
+    Offset of the loaded data within the file
+    """
+    size: int
+    digest: str
+    """
+    Hash of the loaded data, keys the seed cache
+    """
+    seeds: Optional[AnalysisSeeds]
+    """
+    Analysis saved when the overlay was last switched out, None until then
+    """
+
+    def __init__(self, name: str, path: str, base: int, offset: int, size: int, digest: str):
+        self.name = name
+        self.path = path
+        self.base = base
+        self.offset = offset
+        self.size = size
+        self.digest = digest
+        self.seeds = None
+
+    @property
+    def end(self) -> int:
+        return self.base + self.size
+
+    @property
+    def region_name(self) -> str:
+        return f"overlay.{self.name}"
+
+    def overlaps(self, other: Overlay) -> bool:
+        return self.base < other.end and other.base < self.end
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            return f.read(self.size)
+
+    def to_json(self) -> dict:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "base": self.base,
+            "offset": self.offset,
+            "size": self.size,
+            "digest": self.digest,
+            # Metadata can't hold None, store the seeds serialized instead
+            "seeds": json.dumps(self.seeds.to_json()) if self.seeds is not None else "",
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> Overlay:
+        overlay = cls(data["name"], data["path"], data["base"], data["offset"], data["size"], data["digest"])
+        if data.get("seeds"):
+            overlay.seeds = AnalysisSeeds.from_json(json.loads(data["seeds"]))
+        return overlay
+
+class OverlayManager:
+    """
+    Registered overlays of a view. All state lives in the view metadata, so a manager
+    can be created whenever it's needed and the overlays are saved with the database.
+    """
+    view: BinaryView
+    overlays: Dict[str, Overlay]
+    active: List[str]
+
+    def __init__(self, view: BinaryView):
+        self.view = view
+        self.overlays = {}
+        self.active = []
+
+        try:
+            stored = view.query_metadata(OVERLAYS_METADATA_KEY)
+            self.active = list(view.query_metadata(ACTIVE_OVERLAYS_METADATA_KEY))
+        except KeyError:
+            stored = []
+
+        for data in stored:
+            overlay = Overlay.from_json(data)
+            self.overlays[overlay.name] = overlay
+
+    def _save(self) -> None:
+        self.view.store_metadata(OVERLAYS_METADATA_KEY, [overlay.to_json() for overlay in self.overlays.values()])
+        self.view.store_metadata(ACTIVE_OVERLAYS_METADATA_KEY, self.active)
+
+    def register(self, path: str, base: int, name: Optional[str] = None, offset: int = 0,
+                 size: Optional[int] = None) -> Overlay:
+        if name is None:
+            name = os.path.splitext(os.path.basename(path))[0]
+        if name in self.overlays:
+            raise ValueError(f"Overlay {name} is already registered")
+        if base & 3:
+            raise ValueError(f"Overlay base {hex(base)} isn't word aligned")
+
+        if size is None:
+            size = os.path.getsize(path) - offset
+
+        overlay = Overlay(name, path, base, offset, size, "")
+        overlay.digest = hashlib.sha256(overlay.read()).hexdigest()
+
+        self.overlays[name] = overlay
+        self._save()
+        log_info(f"Registered overlay {name} at {hex(base)}-{hex(overlay.end)}")
+        return overlay
+
+    def unregister(self, name: str) -> None:
+        if name in self.active:
+            self.deactivate(name)
+        del self.overlays[name]
+        self._save()
+
+    def active_at(self, addr: int) -> Optional[Overlay]:
+        for name in self.active:
+            overlay = self.overlays[name]
+            if overlay.base <= addr < overlay.end:
+                return overlay
+        return None
+
+    def activate(self, name: str) -> None:
+        """
+        Maps an overlay, switching out every active overlay sharing its range.
+        """
+        overlay = self.overlays[name]
+        if name in self.active:
+            return
+
+        for other in [self.overlays[active] for active in self.active]:
+            if other.overlaps(overlay):
+                self._switch_out(other)
+
+        memory_map = self.view.memory_map
+        # Overlays are only read from disk the first time they're switched in
+        if not memory_map.set_memory_region_enabled(overlay.region_name, True):
+            memory_map.add_memory_region(overlay.region_name, overlay.base, overlay.read(), OVERLAY_SEGMENT_FLAGS)
+        EmotionEngine.invalidate(overlay.base, overlay.end)
+
+        seeds = overlay.seeds
+        if seeds is None:
+            seeds = SeedCache().load(overlay.digest)
+
+        if seeds is not None:
+            apply_seeds(self.view, seeds)
+            load_jump_tables(self.view)
+        else:
+            self._seed_functions(overlay)
+
+        self.active.append(name)
+        self._save()
+        self.view.update_analysis()
+        log_info(f"Switched in overlay {name}")
+
+    def deactivate(self, name: str) -> None:
+        self._switch_out(self.overlays[name])
+        self._save()
+        self.view.update_analysis()
+
+    def _switch_out(self, overlay: Overlay) -> None:
+        view = self.view
+
+        overlay.seeds = collect_range(view, overlay.base, overlay.end)
+        # gp belongs to the main executable
+        overlay.seeds.gp = None
+        forget_jump_tables(view, overlay.base, overlay.end)
+        forget_range(view, overlay.base, overlay.end)
+
+        try:
+            SeedCache().store(overlay.digest, overlay.seeds)
+        except OSError as e:
+            log_warn(f"Failed to write seed cache entry for overlay {overlay.name}: {e}")
+
+        for function in [f for f in view.functions if overlay.base <= f.start < overlay.end]:
+            if function.auto:
+                view.remove_auto_function(function)
+            else:
+                view.remove_user_function(function)
+
+        for symbol in list(view.get_symbols(overlay.base, overlay.size)):
+            if symbol.auto:
+                view.undefine_auto_symbol(symbol)
+            else:
+                view.undefine_user_symbol(symbol)
+
+        # Everything else attaches to whatever is mapped here next
+        for addr, (_, _, auto) in overlay.seeds.data_vars.items():
+            if auto:
+                view.undefine_auto_data_var(addr)
+            else:
+                view.undefine_user_data_var(addr)
+
+        for addr in overlay.seeds.comments:
+            view.set_comment_at(addr, "")
+
+        for source, target in overlay.seeds.data_refs:
+            view.remove_data_ref(source, target)
+            view.remove_user_data_ref(source, target)
+
+        view.memory_map.set_memory_region_enabled(overlay.region_name, False)
+        EmotionEngine.invalidate(overlay.base, overlay.end)
+
+        self.active.remove(overlay.name)
+        log_info(f"Switched out overlay {overlay.name}, kept {len(overlay.seeds.function_starts)} functions")
+
+    def _seed_functions(self, overlay: Overlay) -> None:
+        # First time in: same idioms the loader seeds the executable with,
+        # limited to the overlay's own words
+        words = read_words(self.view, overlay.base, overlay.size)
+        starts = {overlay.base + i * 4 for i in prologue_indices(words)}
+        starts.update(target for target in jal_targets(overlay.base, words) if overlay.base <= target < overlay.end)
+        if overlay.base not in starts and words and words[0] != 0:
+            # Overlays usually begin with their entry point
+            starts.add(overlay.base)
+
+        for addr in sorted(starts):
+            self.view.add_function(addr)
+
+        log_info(f"Seeded {len(starts)} functions in overlay {overlay.name}")
@@ -0,0 +1,57 @@
+from typing import Any, Dict, Optional, Tuple
+
+class AddressCache:
+    """
+    Results of decoding the bytes at an address. Each entry keeps the bytes it was
+    computed from and is only returned for the same bytes, so a stale entry can cost
+    a re-decode but never a wrong result. Patched ranges are dropped explicitly
+    through invalidate so they don't sit in memory.
+    """
+    entries: Dict[int, Tuple[bytes, Any]]
+    max_entries: int
+    lookback: int
+    """
+    Bytes before a patched range whose results read into it, e.g. a branch reading
+    its delay slot or a pseudo-op spanning several instructions
+    """
+
+    def __init__(self, max_entries: int = 1 << 18, lookback: int = 8):
+        self.entries = {}
+        self.max_entries = max_entries
+        self.lookback = lookback
+
+    def get(self, addr: int, data: bytes) -> Optional[Any]:
+        entry = self.entries.get(addr)
+        if entry is None or entry[0] != data:
+            return None
+        return entry[1]
+
+    def put(self, addr: int, data: bytes, value: Any) -> None:
+        if len(self.entries) >= self.max_entries and addr not in self.entries:
+            # Evict the oldest entry
+            del self.entries[next(iter(self.entries))]
+        self.entries[addr] = (data, value)
+
+    def invalidate(self, start: int, end: int) -> None:
+        """
+        Drops every entry whose bytes overlap [start, end).
+        """
+        if end - start > len(self.entries) * 4:
+            # Cheaper to walk the entries than the range
+            first = start - self.lookback
+            for addr in [addr for addr in self.entries if first <= addr < end]:
+                del self.entries[addr]
+            return
+
+        for addr in range((start - self.lookback) & ~3, end, 4):
+            self.entries.pop(addr, None)
+
+    def invalidate_from(self, start: int) -> None:
+        """
+        Drops every entry at or after start, for insertions and removals which shift
+        everything behind them.
+        """
+        self.invalidate(start, max(self.entries, default=start) + 1)
+
+    def clear(self) -> None:
+        self.entries.clear()
@@ -0,0 +1,315 @@
+from typing import TYPE_CHECKING, Callable, Collection, Dict, List, Optional, Set, Tuple
+
+from .ee.registers import HI_REG, LO_REG, RA_REG, ZERO_REG
+from .instruction import Instruction
+
+if TYPE_CHECKING:
+    from .interpreter import Block
+
+# Compiles the interpreter's decoded blocks to Python functions. Registers the
+# block touches are loaded into locals on entry and written back on exit, so the
+# body is plain arithmetic on locals instead of a handler call per instruction.
+# The function takes the register dict and how many times a self looping block may
+# run, and returns the next pc and how many times the block ran. Instructions
+# without a template call the interpreter's handler with the locals synced
+# around it.
+
+CompiledBlock = Callable[[Dict[str, int], int], Tuple[int, int]]
+
+def _local(reg: str) -> str:
+    return "r_" + reg[1:]
+
+class _Emitter:
+    __slots__ = ["lines", "registers", "written", "handlers", "indent"]
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.registers: Set[str] = set()
+        self.written: Set[str] = set()
+        # Names bound in the function's globals: handler and instruction objects
+        self.handlers: Dict[str, object] = {}
+        self.indent = 2
+
+    def emit(self, line: str) -> None:
+        self.lines.append("    " * self.indent + line)
+
+    def read(self, reg: str) -> str:
+        if reg == ZERO_REG:
+            return "0"
+        self.registers.add(reg)
+        return _local(reg)
+
+    def write(self, reg: str, expr: str) -> None:
+        # Writes to $zero are dropped, expressions have no side effects
+        if reg == ZERO_REG:
+            return
+        self.registers.add(reg)
+        self.written.add(reg)
+        self.emit(f"{_local(reg)} = {expr}")
+
+    def at(self, addr: int) -> None:
+        # Address reported if the next line stops execution
+        self.emit(f"at = {hex(addr)}")
+
+    def call_handler(self, handler: Callable, instruction: Instruction, addr: int, registers: Set[str]) -> None:
+        # Fallback for instructions without a template. The handler works on the
+        # register dict, so every local is stored before and reloaded after.
+        n = len(self.handlers) // 2
+        self.handlers[f"h{n}"] = handler
+        self.handlers[f"i{n}"] = instruction
+        self.at(addr)
+        for reg in sorted(registers):
+            self.emit(f"regs[{reg!r}] = {_local(reg)}")
+        self.emit(f"h{n}(i{n})")
+        for reg in sorted(registers):
+            self.emit(f"{_local(reg)} = regs[{reg!r}]")
+        self.written.update(registers)
+
+def _address(e: _Emitter, i: Instruction) -> str:
+    return f"({e.read(i.reg2)} + {i.operand}) & M32"
+
+def _load(size: int, signed: bool) -> Callable[[_Emitter, Instruction, int], None]:
+    def emit(e: _Emitter, i: Instruction, addr: int) -> None:
+        e.at(addr)
+        value = f"load({_address(e, i)}, {size})"
+        if signed:
+            sign = 1 << (size * 8 - 1)
+            value = f"((({value}) ^ {hex(sign)}) - {hex(sign)}) & M64"
+        if i.reg1 == ZERO_REG:
+            # Still done for the fault
+            e.emit(value)
+        else:
+            e.write(i.reg1, value)
+    return emit
+
+def _store(size: int) -> Callable[[_Emitter, Instruction, int], None]:
+    def emit(e: _Emitter, i: Instruction, addr: int) -> None:
+        e.at(addr)
+        e.emit(f"a = {_address(e, i)}")
+        e.emit(f"store(a, {size}, {e.read(i.reg1)})")
+        e.emit("stored(a)")
+    return emit
+
+def _expression(template: str) -> Callable[[_Emitter, Instruction, int], None]:
+    """
+    reg1 = template, with {r2}/{r3} standing for reg2/reg3 and {imm} for the operand
+    """
+    def emit(e: _Emitter, i: Instruction, addr: int) -> None:
+        if i.reg1 == ZERO_REG:
+            return
+        e.write(i.reg1, template.format(
+            r2=e.read(i.reg2) if i.reg2 is not None else None,
+            r3=e.read(i.reg3) if i.reg3 is not None else None,
+            imm=i.operand,
+        ))
+    return emit
+
+def _mult(unsigned: bool) -> Callable[[_Emitter, Instruction, int], None]:
+    def emit(e: _Emitter, i: Instruction, addr: int) -> None:
+        if unsigned:
+            e.emit(f"p = ({e.read(i.reg3)} & M32) * ({e.read(i.reg2)} & M32)")
+        else:
+            e.emit(f"p = signed32({e.read(i.reg3)}) * signed32({e.read(i.reg2)})")
+        e.write(LO_REG, "sext32(p)")
+        e.write(HI_REG, "sext32(p >> 32)")
+        e.write(i.reg1, _local(LO_REG))
+    return emit
+
+def _move(source: Optional[str], target: Optional[str] = None) -> Callable[[_Emitter, Instruction, int], None]:
+    def emit(e: _Emitter, i: Instruction, addr: int) -> None:
+        if target is None:
+            e.write(i.reg1, e.read(source))
+        else:
+            e.write(target, e.read(i.reg1))
+    return emit
+
+def _movz(zero: bool) -> Callable[[_Emitter, Instruction, int], None]:
+    def emit(e: _Emitter, i: Instruction, addr: int) -> None:
+        if i.reg1 == ZERO_REG:
+            return
+        condition = "==" if zero else "!="
+        e.emit(f"if {e.read(i.reg2)} {condition} 0:")
+        e.indent += 1
+        e.write(i.reg1, e.read(i.reg3))
+        e.indent -= 1
+    return emit
+
+def _eliminated(e: _Emitter, i: Instruction, addr: int) -> None:
+    pass
+
+# Register operands follow ps2.decode: reg1 = rd/rt, then rt, rs for three
+# operand forms (rs, rt for slt/sltu) and rs for immediate forms
+_TEMPLATES: Dict[str, Callable[[_Emitter, Instruction, int], None]] = {
+    "nop": _eliminated, "sync": _eliminated, "cache": _eliminated, "prefetch": _eliminated,
+    "sll": _expression("sext32({r2} << {imm})"),
+    "srl": _expression("sext32(({r2} & M32) >> {imm})"),
+    "sra": _expression("sext32(signed32({r2}) >> {imm})"),
+    "sllv": _expression("sext32({r2} << ({r3} & 0x1F))"),
+    "srlv": _expression("sext32(({r2} & M32) >> ({r3} & 0x1F))"),
+    "srav": _expression("sext32(signed32({r2}) >> ({r3} & 0x1F))"),
+    "dsll": _expression("({r2} << {imm}) & M64"),
+    "dsrl": _expression("{r2} >> {imm}"),
+    "dsra": _expression("(signed64({r2}) >> {imm}) & M64"),
+    "dsll32": _expression("({r2} << ({imm} + 32)) & M64"),
+    "dsrl32": _expression("{r2} >> ({imm} + 32)"),
+    "dsra32": _expression("(signed64({r2}) >> ({imm} + 32)) & M64"),
+    "add": _expression("sext32({r3} + {r2})"),
+    "addu": _expression("sext32({r3} + {r2})"),
+    "sub": _expression("sext32({r3} - {r2})"),
+    "subu": _expression("sext32({r3} - {r2})"),
+    "dadd": _expression("({r3} + {r2}) & M64"),
+    "daddu": _expression("({r3} + {r2}) & M64"),
+    "dsub": _expression("({r3} - {r2}) & M64"),
+    "dsubu": _expression("({r3} - {r2}) & M64"),
+    "and": _expression("{r3} & {r2}"),
+    "or": _expression("{r3} | {r2}"),
+    "xor": _expression("{r3} ^ {r2}"),
+    "nor": _expression("~({r3} | {r2}) & M64"),
+    "slt": _expression("int(signed64({r2}) < signed64({r3}))"),
+    "sltu": _expression("int({r2} < {r3})"),
+    "movz": _movz(True),
+    "movn": _movz(False),
+    "addi": _expression("sext32({r2} + {imm})"),
+    "addiu": _expression("sext32({r2} + {imm})"),
+    "daddi": _expression("({r2} + {imm}) & M64"),
+    "daddiu": _expression("({r2} + {imm}) & M64"),
+    "slti": _expression("int(signed64({r2}) < {imm})"),
+    "sltiu": _expression("int({r2} < ({imm} & M64))"),
+    "andi": _expression("{r2} & {imm}"),
+    "ori": _expression("{r2} | {imm}"),
+    "xori": _expression("{r2} ^ {imm}"),
+    "lui": _expression("sext32({imm} << 16)"),
+    "mfhi": _move(HI_REG),
+    "mflo": _move(LO_REG),
+    "mthi": _move(None, HI_REG),
+    "mtlo": _move(None, LO_REG),
+    "mult": _mult(False),
+    "multu": _mult(True),
+    "lb": _load(1, True),
+    "lbu": _load(1, False),
+    "lh": _load(2, True),
+    "lhu": _load(2, False),
+    "lw": _load(4, True),
+    "lwu": _load(4, False),
+    "ld": _load(8, False),
+    "sb": _store(1),
+    "sh": _store(2),
+    "sw": _store(4),
+    "sd": _store(8),
+}
+
+# Branch conditions on reg1 (and reg2), evaluated before the delay slot
+_CONDITIONS: Dict[str, str] = {
+    "beq": "{r1} == {r2}", "beql": "{r1} == {r2}",
+    "bne": "{r1} != {r2}", "bnel": "{r1} != {r2}",
+    "blez": "signed64({r1}) <= 0", "blezl": "signed64({r1}) <= 0",
+    "bgtz": "signed64({r1}) > 0", "bgtzl": "signed64({r1}) > 0",
+    "bltz": "signed64({r1}) < 0", "bltzl": "signed64({r1}) < 0",
+    "bgez": "signed64({r1}) >= 0", "bgezl": "signed64({r1}) >= 0",
+    "bltzal": "signed64({r1}) < 0", "bltzall": "signed64({r1}) < 0",
+    "bgezal": "signed64({r1}) >= 0", "bgezall": "signed64({r1}) >= 0",
+}
+_LINKING = frozenset(["jal", "jalr", "bltzal", "bgezal", "bltzall", "bgezall"])
+
+def _emit_instruction(e: _Emitter, handler: Callable, instruction: Instruction, addr: int) -> None:
+    template = _TEMPLATES.get(instruction.name)
+    if template is None:
+        e.call_handler(handler, instruction, addr, e.registers)
+    else:
+        template(e, instruction, addr)
+
+def compile_block(block: "Block", namespace: Dict[str, object], known: Collection[str]) -> Optional[CompiledBlock]:
+    """
+    Compiles a block, None when it ends in a syscall, whose handler may need the
+    whole interpreter state. The namespace provides the memory accessors and
+    helpers the generated code calls, known the names of the integer registers.
+    """
+    e = _Emitter()
+
+    # With fallbacks, every local the block uses has to exist before the first one
+    ops = list(block.ops)
+    if block.delay is not None:
+        ops.append(block.delay)
+    if any(instruction.name not in _TEMPLATES for _, instruction, _ in ops):
+        for _, instruction, _ in ops:
+            for reg in (instruction.reg1, instruction.reg2, instruction.reg3):
+                if reg in known:
+                    e.registers.add(reg)
+        e.registers.discard(ZERO_REG)
+        e.registers.update((HI_REG, LO_REG))
+
+    # Blocks branching back to their own start (copy, clear and decode loops) loop
+    # inside the function, up to budget iterations
+    branch = block.branch[1] if block.branch is not None else None
+    loops = branch is not None and branch.branch_dest == block.start and branch.name not in ("jal", "syscall")
+    if loops:
+        e.emit("while True:")
+        e.indent += 1
+        e.emit("runs += 1")
+
+    for handler, instruction, addr in block.ops:
+        _emit_instruction(e, handler, instruction, addr)
+
+    if branch is None:
+        e.emit(f"next_pc = {hex(block.end)}")
+    else:
+        addr = block.branch[2]
+        name = branch.name
+        if name == "syscall":
+            return None
+
+        if name in ("j", "jal"):
+            e.emit("taken = True")
+            target = hex(branch.branch_dest)
+        elif name in ("jr", "jalr"):
+            e.emit("taken = True")
+            e.emit(f"target = {e.read(branch.reg1)} & M32")
+            target = "target"
+        else:
+            condition = _CONDITIONS[name].format(
+                r1=e.read(branch.reg1),
+                r2=e.read(branch.reg2) if branch.reg2 is not None else None,
+            )
+            e.emit(f"taken = {condition}")
+            target = hex(branch.branch_dest)
+
+        if name in _LINKING:
+            e.write(RA_REG, hex(addr + 8))
+
+        if block.delay is not None:
+            handler, instruction, delay_addr = block.delay
+            if block.likely:
+                e.emit("if taken:")
+                e.indent += 1
+                _emit_instruction(e, handler, instruction, delay_addr)
+                e.emit("pass")
+                e.indent -= 1
+            else:
+                _emit_instruction(e, handler, instruction, delay_addr)
+
+        if loops:
+            e.emit("if not taken or runs >= budget:")
+            e.emit("    break")
+            e.indent -= 1
+        e.emit(f"next_pc = {target} if taken else {hex(block.end)}")
+
+    written = sorted(e.written)
+    registers = sorted(e.registers)
+    lines = [f"def block_{block.start:x}(regs, budget):"]
+    lines += [f"    {_local(reg)} = regs[{reg!r}]" for reg in registers]
+    lines.append(f"    at = {hex(block.start)}")
+    lines.append(f"    runs = {0 if loops else 1}")
+    lines.append("    try:")
+    lines += e.lines
+    lines.append("    except _Stop as stop:")
+    lines.append("        stop.addr = at")
+    lines.append("        stop.runs = runs - 1")
+    lines += [f"        regs[{reg!r}] = {_local(reg)}" for reg in written]
+    lines.append("        raise")
+    lines += [f"    regs[{reg!r}] = {_local(reg)}" for reg in written]
+    lines.append("    return next_pc, runs")
+
+    scope = dict(namespace)
+    scope.update(e.handlers)
+    exec(compile("\n".join(lines), f"<block {block.start:#x}>", "exec"), scope)
+    return scope[f"block_{block.start:x}"]
@@ -1,7 +1,5 @@
 import struct
 from typing import Optional, Tuple
-from .ee import il as ee_func
-from .fpu import il as fpu_func
 from .ee.registers import ZERO_REG, AT_REG
 from .ee.registers import get_name as ee_get_name
 from .fpu.registers import get_name as fpu_get_name
@@ -9,8 +7,14 @@ from .vu0.registers import get_f_name as vu0f_get_name
 from .cop0.registers import get_name as cop0_get_name
 from .fpu.registers import get_c_name as fpu_get_c_name
 from .vu0.registers import get_c_name as vu0f_get_c_name
-from .vu0.decode import decode_cop2_special
 from .instruction import Instruction, InstructionType
+from ..util import lazy_import
+
+# The lifters and the VU0 macro mode tables are only needed once something is
+# decoded, not when the plugin loads
+ee_func = lazy_import(".ee.il", __package__)
+fpu_func = lazy_import(".fpu.il", __package__)
+vu0_decode = lazy_import(".vu0.decode", __package__)
 
 def sign_extend_16_bit(i: int):
     if i >= 0x8000:
@@ -107,7 +111,7 @@ def decode_cop(opcode: int, addr: int) -> Instruction:
     cop_id = ((opcode >> 26) & 0x3)
 
     if cop_id == 2 and op >= 0x10:
-        return decode_cop2_special(opcode, addr)
+        return vu0_decode.decode_cop2_special(opcode, addr)
     
     match (op | (cop_id * 0x100)):
         case 0x000:
@@ -0,0 +1,67 @@
+from enum import IntEnum, unique
+
+# Source chain DMAtag, the low 64 bits of a quadword:
+# bits 0-15:  QWC, quadwords of data
+# bits 26-27: PCE
+# bits 28-30: ID
+# bit 31:     IRQ
+# bits 32-62: ADDR
+# bit 63:     SPR, ADDR is in scratchpad
+# The high 64 bits are transferred to the VIF as two VIFcodes when TTE is set.
+
+@unique
+class DmaTagId(IntEnum):
+    REFE = 0
+    """
+    Data at ADDR, then end
+    """
+    CNT = 1
+    """
+    Data follows the tag, next tag after the data
+    """
+    NEXT = 2
+    """
+    Data follows the tag, next tag at ADDR
+    """
+    REF = 3
+    """
+    Data at ADDR, next tag follows this one
+    """
+    REFS = 4
+    """
+    REF stalling on the stall control channel
+    """
+    CALL = 5
+    """
+    Data follows the tag, next tag at ADDR, pushes the address after the data
+    """
+    RET = 6
+    """
+    Data follows the tag, next tag popped from the call stack
+    """
+    END = 7
+    """
+    Data follows the tag, then end
+    """
+
+# Bits 16-25 are reserved and always zero in well formed tags
+DMA_TAG_RESERVED_MASK = 0x03FF0000
+DMA_TAG_SPR = 1 << 63
+
+# The DMAC call stack holds two addresses
+DMA_CALL_DEPTH = 2
+
+def dma_qwc(tag: int) -> int:
+    return tag & 0xFFFF
+
+def dma_id(tag: int) -> DmaTagId:
+    return DmaTagId((tag >> 28) & 0x7)
+
+def dma_irq(tag: int) -> bool:
+    return bool(tag & 0x80000000)
+
+def dma_addr(tag: int) -> int:
+    return (tag >> 32) & 0x7FFFFFF0
+
+def dma_spr(tag: int) -> bool:
+    return bool(tag & DMA_TAG_SPR)
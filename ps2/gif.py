@@ -0,0 +1,71 @@
+from enum import IntEnum, unique
+
+# GIFtag, one quadword:
+# bits 0-14:   NLOOP
+# bit 15:      EOP, last tag of the packet
+# bit 46:      PRE, PRIM is written to the PRIM register
+# bits 47-57:  PRIM
+# bits 58-59:  FLG
+# bits 60-63:  NREG (0 means 16)
+# bits 64-127: REGS, four bits per register descriptor
+
+@unique
+class GifFormat(IntEnum):
+    PACKED = 0
+    REGLIST = 1
+    IMAGE = 2
+    DISABLE = 3
+    """
+    Behaves like IMAGE
+    """
+
+# PACKED register descriptors
+gif_registers = {
+    0x0: "PRIM",
+    0x1: "RGBAQ",
+    0x2: "ST",
+    0x3: "UV",
+    0x4: "XYZF2",
+    0x5: "XYZ2",
+    0x6: "TEX0_1",
+    0x7: "TEX0_2",
+    0x8: "CLAMP_1",
+    0x9: "CLAMP_2",
+    0xA: "FOG",
+    0xC: "XYZF3",
+    0xD: "XYZ3",
+    0xE: "A+D",
+    0xF: "NOP",
+}
+
+def gif_nloop(tag: int) -> int:
+    return tag & 0x7FFF
+
+def gif_eop(tag: int) -> bool:
+    return bool(tag & 0x8000)
+
+def gif_prim(tag: int) -> int:
+    return (tag >> 47) & 0x7FF
+
+def gif_format(tag: int) -> GifFormat:
+    return GifFormat((tag >> 58) & 0x3)
+
+def gif_nreg(tag: int) -> int:
+    return ((tag >> 60) & 0xF) or 16
+
+def gif_data_length(tag: int) -> int:
+    """
+    Bytes of data following the tag
+    """
+    nloop = gif_nloop(tag)
+    match gif_format(tag):
+        case GifFormat.PACKED:
+            return nloop * gif_nreg(tag) * 16
+        case GifFormat.REGLIST:
+            # Doublewords, padded to a quadword
+            return ((nloop * gif_nreg(tag) + 1) & ~1) * 8
+        case _:
+            return nloop * 16
+
+def gif_register_names(tag: int, regs: int) -> str:
+    return ", ".join(gif_registers.get((regs >> (i * 4)) & 0xF, "?") for i in range(gif_nreg(tag)))
@@ -0,0 +1,714 @@
+import time
+from collections import OrderedDict
+from enum import Enum, auto, unique
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .compiler import CompiledBlock, compile_block
+from .decode import decode
+from .ee.registers import GP_REG, HI_REG, INT_ARG_REGS, LO_REG, RA_REG, SP_REG, V0_REG, ZERO_REG, register_params
+from .instruction import Instruction, InstructionType
+from .memory_map import canonicalize
+
+# A small interpreter for the integer, load/store and branch subset of the EE,
+# enough to run crt0, static initializers and the routines computing pointers or
+# decoding data at runtime. Anything else (FPU, COP2, MMI) stops execution.
+
+M32 = 0xFFFFFFFF
+M64 = 0xFFFFFFFFFFFFFFFF
+
+PAGE_BITS = 12
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+# Blocks end at the first branch, or after this many instructions
+MAX_BLOCK_INSTRUCTIONS = 64
+# How often, in blocks, the time limit is checked
+TIME_CHECK_INTERVAL = 256
+# Blocks are compiled once they have run this many times, most code in crt0 and
+# initializers only runs once and isn't worth the compile
+COMPILE_THRESHOLD = 4
+# Iterations a compiled self looping block runs before returning to the limit checks
+LOOP_BUDGET = 1024
+DEFAULT_MAX_BLOCKS = 1 << 14
+
+# Return address given to called functions, not mapped in any executable
+RETURN_ADDRESS = 0xFFFFFFF0
+DEFAULT_STACK_TOP = 0x01F00000
+
+def sext32(value: int) -> int:
+    """
+    Sign extends the low 32 bits to an unsigned 64-bit register value
+    """
+    return (((value & M32) ^ 0x80000000) - 0x80000000) & M64
+
+def signed64(value: int) -> int:
+    value &= M64
+    return value - (1 << 64) if value & (1 << 63) else value
+
+def signed32(value: int) -> int:
+    return ((value & M32) ^ 0x80000000) - 0x80000000
+
+@unique
+class StopReason(Enum):
+    Returned = auto()
+    """
+    A function started with call() returned
+    """
+    Breakpoint = auto()
+    InstructionLimit = auto()
+    TimeLimit = auto()
+    Syscall = auto()
+    """
+    A syscall which the syscall handler didn't handle
+    """
+    Break = auto()
+    Unimplemented = auto()
+    """
+    An instruction outside the interpreted subset
+    """
+    MemoryFault = auto()
+    """
+    A read of memory which isn't backed by the executable and was never written
+    """
+
+class RunResult:
+    __slots__ = ["reason", "pc", "instructions", "fault_addr"]
+
+    reason: StopReason
+    pc: int
+    """
+    Address of the instruction which stopped execution, or the next one to run
+    when a limit was hit
+    """
+    instructions: int
+    fault_addr: Optional[int]
+
+    def __init__(self, reason: StopReason, pc: int, instructions: int, fault_addr: Optional[int] = None):
+        self.reason = reason
+        self.pc = pc
+        self.instructions = instructions
+        self.fault_addr = fault_addr
+
+    def __repr__(self) -> str:
+        return f"<RunResult {self.reason.name} at {hex(self.pc)} after {self.instructions} instructions>"
+
+class _Stop(Exception):
+    def __init__(self, reason: StopReason, fault_addr: Optional[int] = None):
+        self.reason = reason
+        self.fault_addr = fault_addr
+        # Set by compiled blocks to the instruction which stopped, and how many
+        # times the block had completed before
+        self.addr: Optional[int] = None
+        self.runs = 0
+
+class SparseMemory:
+    """
+    Memory in 4 KiB pages, created on first access. Pages inside the loader's
+    ranges are filled from it, others are zero filled when first written and fault
+    when read before that. Mirrored addresses (kseg0/kseg1) share pages.
+    """
+    __slots__ = ["pages", "loader", "ranges", "written"]
+
+    pages: Dict[int, bytearray]
+    loader: Optional[Callable[[int, int], bytes]]
+    ranges: List[Tuple[int, int, int]]
+    """
+    (canonical start, canonical end, start as the loader addresses it)
+    """
+    written: Set[int]
+    """
+    Indices of the pages stored to
+    """
+
+    def __init__(self, loader: Optional[Callable[[int, int], bytes]] = None,
+                 ranges: Iterable[Tuple[int, int]] = ()):
+        self.pages = {}
+        self.loader = loader
+        # Pages are indexed by canonical address, a kseg0 linked executable is
+        # loaded through its mirror
+        self.ranges = [(canonicalize(s), canonicalize(s) + e - s, s) for s, e in ranges]
+        self.written = set()
+
+    @classmethod
+    def from_view(cls, view) -> "SparseMemory":
+        # Whole segments, .bss past the file backed bytes reads as zero rather than faulting
+        return cls(view.read, [(segment.start, segment.end) for segment in view.segments])
+
+    def _page(self, index: int, write: bool) -> bytearray:
+        page = self.pages.get(index)
+        if page is not None:
+            return page
+
+        start = index << PAGE_BITS
+        if self.loader is not None and any(s < start + PAGE_SIZE and start < e for s, e, _ in self.ranges):
+            page = bytearray(PAGE_SIZE)
+            for s, e, loader_start in self.ranges:
+                lo = max(s, start)
+                hi = min(e, start + PAGE_SIZE)
+                if lo < hi:
+                    data = self.loader(loader_start + lo - s, hi - lo)
+                    page[lo - start:lo - start + len(data)] = data
+        elif write:
+            page = bytearray(PAGE_SIZE)
+        else:
+            raise _Stop(StopReason.MemoryFault, start)
+
+        self.pages[index] = page
+        return page
+
+    def load(self, addr: int, size: int) -> int:
+        addr = canonicalize(addr)
+        offset = addr & PAGE_MASK
+        if offset + size <= PAGE_SIZE:
+            page = self.pages.get(addr >> PAGE_BITS) or self._page(addr >> PAGE_BITS, False)
+            return int.from_bytes(page[offset:offset + size], "little")
+        return int.from_bytes(self.read(addr, size), "little")
+
+    def store(self, addr: int, size: int, value: int) -> None:
+        addr = canonicalize(addr)
+        offset = addr & PAGE_MASK
+        if offset + size <= PAGE_SIZE:
+            index = addr >> PAGE_BITS
+            page = self.pages.get(index) or self._page(index, True)
+            page[offset:offset + size] = (value & ((1 << (size * 8)) - 1)).to_bytes(size, "little")
+            self.written.add(index)
+        else:
+            self.write(addr, (value & ((1 << (size * 8)) - 1)).to_bytes(size, "little"))
+
+    def read(self, addr: int, length: int) -> bytes:
+        addr = canonicalize(addr)
+        data = bytearray()
+        while length:
+            offset = addr & PAGE_MASK
+            n = min(length, PAGE_SIZE - offset)
+            data += self._page(addr >> PAGE_BITS, False)[offset:offset + n]
+            addr += n
+            length -= n
+        return bytes(data)
+
+    def write(self, addr: int, data: bytes) -> None:
+        addr = canonicalize(addr)
+        pos = 0
+        while pos < len(data):
+            offset = addr & PAGE_MASK
+            n = min(len(data) - pos, PAGE_SIZE - offset)
+            index = addr >> PAGE_BITS
+            self._page(index, True)[offset:offset + n] = data[pos:pos + n]
+            self.written.add(index)
+            addr += n
+            pos += n
+
+Handler = Callable[[Instruction], None]
+BranchHandler = Callable[[Instruction, int], Optional[int]]
+
+class Block:
+    """
+    Decoded straight line code: the body, then optionally a branch and its delay
+    slot. Each op is (handler, instruction, address).
+    """
+    __slots__ = ["start", "ops", "branch", "delay", "likely", "end", "runs", "compiled"]
+
+    start: int
+    ops: List[Tuple[Handler, Instruction, int]]
+    branch: Optional[Tuple[BranchHandler, Instruction, int]]
+    delay: Optional[Tuple[Handler, Instruction, int]]
+    likely: bool
+    end: int
+    """
+    Address after the block, where execution continues when the branch isn't taken
+    """
+    runs: int
+    compiled: Optional[CompiledBlock]
+
+    def __init__(self, start: int):
+        self.start = start
+        self.ops = []
+        self.branch = None
+        self.delay = None
+        self.likely = False
+        self.end = start
+        self.runs = 0
+        self.compiled = None
+
+    @property
+    def length(self) -> int:
+        return len(self.ops) + (self.branch is not None) + (self.delay is not None)
+
+class Interpreter:
+    """
+    Runs EE code one decoded basic block at a time. Blocks are cached by start
+    address and dropped when a store hits their page, so code written or decrypted
+    at runtime is picked up. Hot blocks are compiled to Python functions, the
+    least recently run blocks are evicted once there are more than max_blocks.
+    """
+    memory: SparseMemory
+    regs: Dict[str, int]
+    """
+    Register name -> lower 64 bits, $hi and $lo included
+    """
+    upper: Dict[str, int]
+    """
+    Register name -> upper 64 bits, only lq writes them
+    """
+    pc: int
+    breakpoints: Set[int]
+    syscall_handler: Optional[Callable[["Interpreter"], bool]]
+    """
+    Called on syscall with the number in $v1, returns False to stop
+    """
+
+    def __init__(self, memory: SparseMemory, max_blocks: int = DEFAULT_MAX_BLOCKS):
+        self.memory = memory
+        self.max_blocks = max_blocks
+        self.regs = {name: 0 for name, _ in register_params}
+        self.upper = {}
+        self.pc = 0
+        self.breakpoints = set()
+        self.syscall_handler = None
+
+        self._blocks: OrderedDict[int, Block] = OrderedDict()
+        # page index -> starts of the blocks decoded from it
+        self._code_pages: Dict[int, Set[int]] = {}
+        self._handlers: Dict[str, Handler] = self._make_handlers()
+        self._branch_handlers: Dict[str, BranchHandler] = self._make_branch_handlers()
+        # Globals of the compiled blocks
+        self._namespace = {
+            "load": memory.load, "store": memory.store, "stored": self._stored,
+            "sext32": sext32, "signed32": signed32, "signed64": signed64,
+            "M32": M32, "M64": M64, "_Stop": _Stop,
+        }
+
+    @classmethod
+    def from_view(cls, view, gp: Optional[int] = None) -> "Interpreter":
+        interpreter = cls(SparseMemory.from_view(view))
+        if gp is not None:
+            interpreter.regs[GP_REG] = gp
+        return interpreter
+
+    # Running
+
+    def call(self, addr: int, *args: int, stack_top: int = DEFAULT_STACK_TOP,
+             max_instructions: int = 1_000_000, timeout: Optional[float] = 5.0) -> RunResult:
+        """
+        Calls the function at addr with integer arguments, the return value is in
+        $v0 when the result is StopReason.Returned.
+        """
+        for reg, value in zip(INT_ARG_REGS, args):
+            self.regs[reg] = value & M64
+        self.regs[RA_REG] = RETURN_ADDRESS
+        self.regs[SP_REG] = stack_top
+        return self.run(addr, max_instructions, timeout)
+
+    @property
+    def return_value(self) -> int:
+        return self.regs[V0_REG]
+
+    def run(self, pc: int, max_instructions: int = 1_000_000, timeout: Optional[float] = 5.0) -> RunResult:
+        self.pc = pc & M32
+        executed = 0
+        blocks = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        cache = self._blocks
+        regs = self.regs
+        breakpoints = self.breakpoints
+        first = True
+
+        while True:
+            pc = self.pc
+            if pc == RETURN_ADDRESS:
+                return RunResult(StopReason.Returned, pc, executed)
+            if pc in breakpoints and not first:
+                return RunResult(StopReason.Breakpoint, pc, executed)
+            if executed >= max_instructions:
+                return RunResult(StopReason.InstructionLimit, pc, executed)
+            blocks += 1
+            if deadline is not None and blocks % TIME_CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+                return RunResult(StopReason.TimeLimit, pc, executed)
+            first = False
+
+            block = cache.get(pc)
+            if block is None:
+                try:
+                    block = self._build_block(pc)
+                except _Stop as stop:
+                    return RunResult(stop.reason, pc, executed, stop.fault_addr)
+            else:
+                cache.move_to_end(pc)
+
+            compiled = block.compiled
+            if compiled is None and block.runs < COMPILE_THRESHOLD:
+                block.runs += 1
+                if block.runs == COMPILE_THRESHOLD:
+                    block.compiled = compiled = compile_block(block, self._namespace, self.regs)
+
+            if compiled is not None:
+                length = block.length
+                if pc in breakpoints:
+                    # One iteration, the breakpoint is checked before the next
+                    budget = 1
+                else:
+                    # Enough iterations to reach max_instructions, rounded up to a whole block
+                    budget = min(LOOP_BUDGET, -(-(max_instructions - executed) // length))
+                try:
+                    self.pc, runs = compiled(regs, budget)
+                except _Stop as stop:
+                    executed += stop.runs * length + ((stop.addr - pc) >> 2)
+                    self.pc = stop.addr
+                    return RunResult(stop.reason, stop.addr, executed, stop.fault_addr)
+                executed += runs * length
+                continue
+
+            addr = pc
+            try:
+                for handler, instruction, addr in block.ops:
+                    handler(instruction)
+
+                if block.branch is None:
+                    self.pc = block.end
+                else:
+                    handler, instruction, addr = block.branch
+                    target = handler(instruction, addr)
+                    if block.delay is not None and (target is not None or not block.likely):
+                        delay, instruction, addr = block.delay
+                        delay(instruction)
+                    self.pc = block.end if target is None else target
+            except _Stop as stop:
+                executed += (addr - pc) >> 2
+                self.pc = addr
+                return RunResult(stop.reason, addr, executed, stop.fault_addr)
+
+            executed += block.length
+
+    def _build_block(self, start: int) -> Block:
+        block = Block(start)
+        memory = self.memory
+        addr = start
+
+        while len(block.ops) < MAX_BLOCK_INSTRUCTIONS:
+            if addr != start and addr in self.breakpoints:
+                break
+            try:
+                word = memory.load(addr, 4)
+            except _Stop:
+                # Run up to the fault, it's reported when the next block starts there
+                if addr == start:
+                    raise
+                break
+            instruction = decode(word.to_bytes(4, "little"), addr)
+            if instruction.type == InstructionType.Branch:
+                branch = self._branch_handlers.get(instruction.name)
+                if branch is None:
+                    block.ops.append((self._unimplemented, instruction, addr))
+                    addr += 4
+                    break
+                block.branch = (branch, instruction, addr)
+                block.likely = instruction.is_likely
+                addr += 4
+                if instruction.name != "syscall":
+                    delay = decode(memory.load(addr, 4).to_bytes(4, "little"), addr)
+                    block.delay = (self._handler(delay), delay, addr)
+                    addr += 4
+                break
+
+            block.ops.append((self._handler(instruction), instruction, addr))
+            addr += 4
+
+        block.end = addr
+        self._blocks[start] = block
+        if len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        for page in range(canonicalize(start) >> PAGE_BITS, (canonicalize(addr - 1) >> PAGE_BITS) + 1):
+            self._code_pages.setdefault(page, set()).add(start)
+        return block
+
+    def _handler(self, instruction: Instruction) -> Handler:
+        if instruction.type == InstructionType.Branch:
+            # A branch in a delay slot
+            return self._unimplemented
+        return self._handlers.get(instruction.name, self._unimplemented)
+
+    def invalidate(self, start: int, end: int) -> None:
+        """
+        Drops the blocks decoded from [start, end)
+        """
+        for page in range(canonicalize(start) >> PAGE_BITS, (canonicalize(end - 1) >> PAGE_BITS) + 1):
+            for block in self._code_pages.pop(page, ()):
+                self._blocks.pop(block, None)
+
+    def _stored(self, addr: int) -> None:
+        page = canonicalize(addr) >> PAGE_BITS
+        if page in self._code_pages:
+            for block in self._code_pages.pop(page):
+                self._blocks.pop(block, None)
+
+    # Handlers
+
+    def _unimplemented(self, instruction: Instruction, addr: int = 0) -> None:
+        raise _Stop(StopReason.Unimplemented)
+
+    def _make_handlers(self) -> Dict[str, Handler]:
+        r = self.regs
+        upper = self.upper
+        memory = self.memory
+        stored = self._stored
+
+        def write(reg: str, value: int) -> None:
+            if reg != ZERO_REG:
+                r[reg] = value
+
+        def nop(i: Instruction) -> None:
+            pass
+
+        # Shifts: reg1 = rd, reg2 = rt, reg3 = rs (variable shifts)
+        def sll(i): write(i.reg1, sext32(r[i.reg2] << i.operand))
+        def srl(i): write(i.reg1, sext32((r[i.reg2] & M32) >> i.operand))
+        def sra(i): write(i.reg1, sext32(signed32(r[i.reg2]) >> i.operand))
+        def sllv(i): write(i.reg1, sext32(r[i.reg2] << (r[i.reg3] & 0x1F)))
+        def srlv(i): write(i.reg1, sext32((r[i.reg2] & M32) >> (r[i.reg3] & 0x1F)))
+        def srav(i): write(i.reg1, sext32(signed32(r[i.reg2]) >> (r[i.reg3] & 0x1F)))
+        def dsll(i): write(i.reg1, (r[i.reg2] << i.operand) & M64)
+        def dsrl(i): write(i.reg1, r[i.reg2] >> i.operand)
+        def dsra(i): write(i.reg1, (signed64(r[i.reg2]) >> i.operand) & M64)
+        def dsll32(i): write(i.reg1, (r[i.reg2] << (i.operand + 32)) & M64)
+        def dsrl32(i): write(i.reg1, r[i.reg2] >> (i.operand + 32))
+        def dsra32(i): write(i.reg1, (signed64(r[i.reg2]) >> (i.operand + 32)) & M64)
+        def dsllv(i): write(i.reg1, (r[i.reg2] << (r[i.reg3] & 0x3F)) & M64)
+        def dsrlv(i): write(i.reg1, r[i.reg2] >> (r[i.reg3] & 0x3F))
+        def dsrav(i): write(i.reg1, (signed64(r[i.reg2]) >> (r[i.reg3] & 0x3F)) & M64)
+
+        # Three operand: reg1 = rd, reg2 = rt, reg3 = rs (slt/sltu: reg2 = rs, reg3 = rt)
+        def addu(i): write(i.reg1, sext32(r[i.reg3] + r[i.reg2]))
+        def subu(i): write(i.reg1, sext32(r[i.reg3] - r[i.reg2]))
+        def daddu(i): write(i.reg1, (r[i.reg3] + r[i.reg2]) & M64)
+        def dsubu(i): write(i.reg1, (r[i.reg3] - r[i.reg2]) & M64)
+        def and_(i): write(i.reg1, r[i.reg3] & r[i.reg2])
+        def or_(i): write(i.reg1, r[i.reg3] | r[i.reg2])
+        def xor(i): write(i.reg1, r[i.reg3] ^ r[i.reg2])
+        def nor(i): write(i.reg1, ~(r[i.reg3] | r[i.reg2]) & M64)
+        def slt(i): write(i.reg1, int(signed64(r[i.reg2]) < signed64(r[i.reg3])))
+        def sltu(i): write(i.reg1, int(r[i.reg2] < r[i.reg3]))
+        def movz(i):
+            if r[i.reg2] == 0:
+                write(i.reg1, r[i.reg3])
+        def movn(i):
+            if r[i.reg2] != 0:
+                write(i.reg1, r[i.reg3])
+
+        # Immediates: reg1 = rt, reg2 = rs
+        def addiu(i): write(i.reg1, sext32(r[i.reg2] + i.operand))
+        def daddiu(i): write(i.reg1, (r[i.reg2] + i.operand) & M64)
+        def slti(i): write(i.reg1, int(signed64(r[i.reg2]) < i.operand))
+        def sltiu(i): write(i.reg1, int(r[i.reg2] < (i.operand & M64)))
+        def andi(i): write(i.reg1, r[i.reg2] & i.operand)
+        def ori(i): write(i.reg1, r[i.reg2] | i.operand)
+        def xori(i): write(i.reg1, r[i.reg2] ^ i.operand)
+        def lui(i): write(i.reg1, sext32(i.operand << 16))
+
+        # HI/LO
+        def mfhi(i): write(i.reg1, r[HI_REG])
+        def mflo(i): write(i.reg1, r[LO_REG])
+        def mthi(i): r[HI_REG] = r[i.reg1]
+        def mtlo(i): r[LO_REG] = r[i.reg1]
+
+        def mult(i):
+            product = signed32(r[i.reg3]) * signed32(r[i.reg2])
+            r[LO_REG] = sext32(product)
+            r[HI_REG] = sext32(product >> 32)
+            write(i.reg1, r[LO_REG])
+
+        def multu(i):
+            product = (r[i.reg3] & M32) * (r[i.reg2] & M32)
+            r[LO_REG] = sext32(product)
+            r[HI_REG] = sext32(product >> 32)
+            write(i.reg1, r[LO_REG])
+
+        # div: reg1 = rt, reg2 = rs
+        def div(i):
+            dividend = signed32(r[i.reg2])
+            divisor = signed32(r[i.reg1])
+            if divisor == 0:
+                r[LO_REG] = sext32(-1 if dividend >= 0 else 1)
+                r[HI_REG] = sext32(dividend)
+                return
+            quotient = abs(dividend) // abs(divisor)
+            if (dividend < 0) != (divisor < 0):
+                quotient = -quotient
+            r[LO_REG] = sext32(quotient)
+            r[HI_REG] = sext32(dividend - quotient * divisor)
+
+        def divu(i):
+            dividend = r[i.reg2] & M32
+            divisor = r[i.reg1] & M32
+            if divisor == 0:
+                r[LO_REG] = M64
+                r[HI_REG] = sext32(dividend)
+                return
+            r[LO_REG] = sext32(dividend // divisor)
+            r[HI_REG] = sext32(dividend % divisor)
+
+        def break_(i):
+            raise _Stop(StopReason.Break)
+
+        # Loads and stores: reg1 = rt, reg2 = base
+        def address(i: Instruction) -> int:
+            return (r[i.reg2] + i.operand) & M32
+
+        def lb(i): write(i.reg1, ((memory.load(address(i), 1) ^ 0x80) - 0x80) & M64)
+        def lbu(i): write(i.reg1, memory.load(address(i), 1))
+        def lh(i): write(i.reg1, ((memory.load(address(i), 2) ^ 0x8000) - 0x8000) & M64)
+        def lhu(i): write(i.reg1, memory.load(address(i), 2))
+        def lw(i): write(i.reg1, sext32(memory.load(address(i), 4)))
+        def lwu(i): write(i.reg1, memory.load(address(i), 4))
+        def ld(i): write(i.reg1, memory.load(address(i), 8))
+
+        def lq(i):
+            value = memory.load(address(i) & ~0xF, 16)
+            if i.reg1 != ZERO_REG:
+                r[i.reg1] = value & M64
+                upper[i.reg1] = value >> 64
+
+        def store(size: int, align: int = 0) -> Handler:
+            def handler(i):
+                addr = address(i) & ~align
+                if size == 16:
+                    value = r[i.reg1] | (upper.get(i.reg1, 0) << 64)
+                else:
+                    value = r[i.reg1]
+                memory.store(addr, size, value)
+                stored(addr)
+            return handler
+
+        # Unaligned accesses, little endian: the left variants access the bytes
+        # from the address down to the aligned word's first byte
+        def lwl(i):
+            addr = address(i)
+            shift = (addr & 3) * 8
+            mem = memory.load(addr & ~3, 4)
+            mask = 0x00FFFFFF >> shift
+            write(i.reg1, sext32((r[i.reg1] & mask) | (mem << (24 - shift))))
+
+        def lwr(i):
+            addr = address(i)
+            shift = (addr & 3) * 8
+            mem = memory.load(addr & ~3, 4)
+            if shift == 0:
+                write(i.reg1, sext32(mem))
+            else:
+                mask = (0xFFFFFFFF << (32 - shift)) & M32
+                value = (r[i.reg1] & mask) | (mem >> shift)
+                write(i.reg1, (r[i.reg1] & ~M32 & M64) | value)
+
+        def ldl(i):
+            addr = address(i)
+            shift = (addr & 7) * 8
+            mem = memory.load(addr & ~7, 8)
+            mask = 0x00FFFFFFFFFFFFFF >> shift
+            write(i.reg1, ((r[i.reg1] & mask) | (mem << (56 - shift))) & M64)
+
+        def ldr(i):
+            addr = address(i)
+            shift = (addr & 7) * 8
+            mem = memory.load(addr & ~7, 8)
+            mask = (M64 << (64 - shift)) & M64
+            write(i.reg1, (r[i.reg1] & mask) | (mem >> shift))
+
+        def swl(i):
+            addr = address(i)
+            shift = (addr & 3) * 8
+            mem = memory.load(addr & ~3, 4) if shift != 24 else 0
+            mask = (0xFFFFFF00 << shift) & M32
+            memory.store(addr & ~3, 4, (mem & mask) | ((r[i.reg1] & M32) >> (24 - shift)))
+            stored(addr)
+
+        def swr(i):
+            addr = address(i)
+            shift = (addr & 3) * 8
+            mem = memory.load(addr & ~3, 4) if shift else 0
+            mask = M32 >> (32 - shift) if shift else 0
+            memory.store(addr & ~3, 4, (mem & mask) | ((r[i.reg1] << shift) & M32))
+            stored(addr)
+
+        def sdl(i):
+            addr = address(i)
+            shift = (addr & 7) * 8
+            mem = memory.load(addr & ~7, 8) if shift != 56 else 0
+            mask = (0xFFFFFFFFFFFFFF00 << shift) & M64
+            memory.store(addr & ~7, 8, (mem & mask) | (r[i.reg1] >> (56 - shift)))
+            stored(addr)
+
+        def sdr(i):
+            addr = address(i)
+            shift = (addr & 7) * 8
+            mem = memory.load(addr & ~7, 8) if shift else 0
+            mask = M64 >> (64 - shift) if shift else 0
+            memory.store(addr & ~7, 8, (mem & mask) | ((r[i.reg1] << shift) & M64))
+            stored(addr)
+
+        return {
+            "nop": nop, "sync": nop, "cache": nop, "prefetch": nop,
+            "sll": sll, "srl": srl, "sra": sra, "sllv": sllv, "srlv": srlv, "srav": srav,
+            "dsll": dsll, "dsrl": dsrl, "dsra": dsra, "dsll32": dsll32, "dsrl32": dsrl32, "dsra32": dsra32,
+            "dsllv": dsllv, "dsrlv": dsrlv, "dsrav": dsrav,
+            # Overflow exceptions aren't modelled
+            "add": addu, "addu": addu, "sub": subu, "subu": subu,
+            "dadd": daddu, "daddu": daddu, "dsub": dsubu, "dsubu": dsubu,
+            "and": and_, "or": or_, "xor": xor, "nor": nor, "slt": slt, "sltu": sltu,
+            "movz": movz, "movn": movn,
+            "addi": addiu, "addiu": addiu, "daddi": daddiu, "daddiu": daddiu,
+            "slti": slti, "sltiu": sltiu, "andi": andi, "ori": ori, "xori": xori, "lui": lui,
+            "mfhi": mfhi, "mflo": mflo, "mthi": mthi, "mtlo": mtlo,
+            "mult": mult, "multu": multu, "div": div, "divu": divu,
+            "break": break_,
+            "lb": lb, "lbu": lbu, "lh": lh, "lhu": lhu, "lw": lw, "lwu": lwu, "ld": ld, "lq": lq,
+            "sb": store(1), "sh": store(2), "sw": store(4), "sd": store(8), "sq": store(16, 0xF),
+            "lwl": lwl, "lwr": lwr, "ldl": ldl, "ldr": ldr,
+            "swl": swl, "swr": swr, "sdl": sdl, "sdr": sdr,
+        }
+
+    def _make_branch_handlers(self) -> Dict[str, BranchHandler]:
+        # Branch handlers return the target when taken and None otherwise. They
+        # run before the delay slot, which is what the condition sees on hardware.
+        r = self.regs
+        interpreter = self
+
+        def link(addr: int) -> None:
+            r[RA_REG] = addr + 8
+
+        def j(i, addr): return i.branch_dest
+        def jal(i, addr):
+            link(addr)
+            return i.branch_dest
+        def jr(i, addr): return r[i.reg1] & M32
+        def jalr(i, addr):
+            target = r[i.reg1] & M32
+            link(addr)
+            return target
+
+        def beq(i, addr): return i.branch_dest if r[i.reg1] == r[i.reg2] else None
+        def bne(i, addr): return i.branch_dest if r[i.reg1] != r[i.reg2] else None
+        def blez(i, addr): return i.branch_dest if signed64(r[i.reg1]) <= 0 else None
+        def bgtz(i, addr): return i.branch_dest if signed64(r[i.reg1]) > 0 else None
+        def bltz(i, addr): return i.branch_dest if signed64(r[i.reg1]) < 0 else None
+        def bgez(i, addr): return i.branch_dest if signed64(r[i.reg1]) >= 0 else None
+        def bltzal(i, addr):
+            target = bltz(i, addr)
+            link(addr)
+            return target
+        def bgezal(i, addr):
+            target = bgez(i, addr)
+            link(addr)
+            return target
+
+        def syscall(i, addr):
+            handler = interpreter.syscall_handler
+            if handler is None or not handler(interpreter):
+                raise _Stop(StopReason.Syscall)
+            return None
+
+        return {
+            "j": j, "jal": jal, "jr": jr, "jalr": jalr,
+            "beq": beq, "bne": bne, "blez": blez, "bgtz": bgtz, "bltz": bltz, "bgez": bgez,
+            "beql": beq, "bnel": bne, "blezl": blez, "bgtzl": bgtz, "bltzl": bltz, "bgezl": bgez,
+            "bltzal": bltzal, "bgezal": bgezal, "bltzall": bltzal, "bgezall": bgezal,
+            "syscall": syscall,
+        }
@@ -0,0 +1,201 @@
+from enum import Enum, auto, unique
+from typing import Dict, List, Tuple
+
+# EE physical memory as seen from the kernel and user segments. Main RAM is
+# reachable through several mirrors which only differ in caching:
+#   0x0xxxxxxx cached, 0x2xxxxxxx uncached, 0x3xxxxxxx uncached accelerated,
+#   0x8xxxxxxx kseg0 (cached), 0xAxxxxxxx kseg1 (uncached)
+# kseg0/kseg1 also mirror the hardware registers and BIOS at 0x9/0xB.
+
+@unique
+class RegionKind(Enum):
+    RAM = auto()
+    Scratchpad = auto()
+    HardwareRegisters = auto()
+    VUMemory = auto()
+    BIOS = auto()
+
+class MemoryRegion:
+    __slots__ = ["name", "start", "end", "kind"]
+
+    name: str
+    start: int
+    end: int
+    kind: RegionKind
+
+    def __init__(self, name: str, start: int, end: int, kind: RegionKind):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.kind = kind
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+RAM_SIZE = 0x02000000
+SCRATCHPAD_START = 0x70000000
+SCRATCHPAD_SIZE = 0x4000
+
+regions: List[MemoryRegion] = [
+    MemoryRegion(".ram", 0x00000000, RAM_SIZE, RegionKind.RAM),
+    MemoryRegion(".ee_regs", 0x10000000, 0x10010000, RegionKind.HardwareRegisters),
+    MemoryRegion(".vu_mem", 0x11000000, 0x11010000, RegionKind.VUMemory),
+    MemoryRegion(".gs_regs", 0x12000000, 0x12002000, RegionKind.HardwareRegisters),
+    MemoryRegion(".bios", 0x1FC00000, 0x20000000, RegionKind.BIOS),
+    MemoryRegion(".scratchpad", SCRATCHPAD_START, SCRATCHPAD_START + SCRATCHPAD_SIZE, RegionKind.Scratchpad),
+]
+
+# Mask applied to an address to strip its mirror bits, indexed by its top nibble
+_ALIAS_MASKS: Tuple[int, ...] = (
+    0xFFFFFFFF, # 0x0 cached RAM, already canonical
+    0xFFFFFFFF, # 0x1 hardware registers, BIOS
+    0x0FFFFFFF, # 0x2 uncached RAM
+    0x0FFFFFFF, # 0x3 uncached accelerated RAM
+    0xFFFFFFFF,
+    0xFFFFFFFF,
+    0xFFFFFFFF,
+    0xFFFFFFFF, # 0x7 scratchpad
+    0x1FFFFFFF, # 0x8 kseg0 RAM
+    0x1FFFFFFF, # 0x9 kseg0 hardware registers, BIOS
+    0x1FFFFFFF, # 0xA kseg1 RAM
+    0x1FFFFFFF, # 0xB kseg1 hardware registers, BIOS
+    0xFFFFFFFF,
+    0xFFFFFFFF,
+    0xFFFFFFFF,
+    0xFFFFFFFF,
+)
+
+def canonicalize(addr: int) -> int:
+    """
+    Maps a mirrored address to the one it aliases, e.g. 0x80100000 -> 0x00100000.
+    """
+    return addr & _ALIAS_MASKS[addr >> 28]
+
+def _dma_channel(name: str, base: int) -> Dict[int, Tuple[str, int]]:
+    return {
+        base + 0x00: (f"{name}_CHCR", 4),
+        base + 0x10: (f"{name}_MADR", 4),
+        base + 0x20: (f"{name}_QWC", 4),
+        base + 0x30: (f"{name}_TADR", 4),
+        base + 0x40: (f"{name}_ASR0", 4),
+        base + 0x50: (f"{name}_ASR1", 4),
+        base + 0x80: (f"{name}_SADR", 4),
+    }
+
+def _vif(name: str, base: int) -> Dict[int, Tuple[str, int]]:
+    registers = {
+        base + 0x00: (f"{name}_STAT", 4),
+        base + 0x10: (f"{name}_FBRST", 4),
+        base + 0x20: (f"{name}_ERR", 4),
+        base + 0x30: (f"{name}_MARK", 4),
+        base + 0x40: (f"{name}_CYCLE", 4),
+        base + 0x50: (f"{name}_MODE", 4),
+        base + 0x60: (f"{name}_NUM", 4),
+        base + 0x70: (f"{name}_MASK", 4),
+        base + 0x80: (f"{name}_CODE", 4),
+        base + 0x90: (f"{name}_ITOPS", 4),
+        base + 0xD0: (f"{name}_ITOP", 4),
+    }
+    for i in range(4):
+        registers[base + 0x100 + i * 0x10] = (f"{name}_R{i}", 4)
+        registers[base + 0x140 + i * 0x10] = (f"{name}_C{i}", 4)
+    return registers
+
+# address -> (name, size)
+hardware_registers: Dict[int, Tuple[str, int]] = {
+    # Timers
+    0x10000000: ("T0_COUNT", 4),
+    0x10000010: ("T0_MODE", 4),
+    0x10000020: ("T0_COMP", 4),
+    0x10000030: ("T0_HOLD", 4),
+    0x10000800: ("T1_COUNT", 4),
+    0x10000810: ("T1_MODE", 4),
+    0x10000820: ("T1_COMP", 4),
+    0x10000830: ("T1_HOLD", 4),
+    0x10001000: ("T2_COUNT", 4),
+    0x10001010: ("T2_MODE", 4),
+    0x10001020: ("T2_COMP", 4),
+    0x10001800: ("T3_COUNT", 4),
+    0x10001810: ("T3_MODE", 4),
+    0x10001820: ("T3_COMP", 4),
+
+    # IPU
+    0x10002000: ("IPU_CMD", 8),
+    0x10002010: ("IPU_CTRL", 4),
+    0x10002020: ("IPU_BP", 4),
+    0x10002030: ("IPU_TOP", 8),
+
+    # GIF
+    0x10003000: ("GIF_CTRL", 4),
+    0x10003010: ("GIF_MODE", 4),
+    0x10003020: ("GIF_STAT", 4),
+    0x10003040: ("GIF_TAG0", 4),
+    0x10003050: ("GIF_TAG1", 4),
+    0x10003060: ("GIF_TAG2", 4),
+    0x10003070: ("GIF_TAG3", 4),
+    0x10003080: ("GIF_CNT", 4),
+    0x10003090: ("GIF_P3CNT", 4),
+    0x100030A0: ("GIF_P3TAG", 4),
+
+    # VIF
+    **_vif("VIF0", 0x10003800),
+    **_vif("VIF1", 0x10003C00),
+    0x10003CA0: ("VIF1_BASE", 4),
+    0x10003CB0: ("VIF1_OFST", 4),
+    0x10003CC0: ("VIF1_TOPS", 4),
+    0x10003CE0: ("VIF1_TOP", 4),
+
+    # FIFOs
+    0x10004000: ("VIF0_FIFO", 16),
+    0x10005000: ("VIF1_FIFO", 16),
+    0x10006000: ("GIF_FIFO", 16),
+    0x10007000: ("IPU_OUT_FIFO", 16),
+    0x10007010: ("IPU_IN_FIFO", 16),
+
+    # DMAC
+    **_dma_channel("D0", 0x10008000), # VIF0
+    **_dma_channel("D1", 0x10009000), # VIF1
+    **_dma_channel("D2", 0x1000A000), # GIF
+    **_dma_channel("D3", 0x1000B000), # fromIPU
+    **_dma_channel("D4", 0x1000B400), # toIPU
+    **_dma_channel("D5", 0x1000C000), # SIF0
+    **_dma_channel("D6", 0x1000C400), # SIF1
+    **_dma_channel("D7", 0x1000C800), # SIF2
+    **_dma_channel("D8", 0x1000D000), # fromSPR
+    **_dma_channel("D9", 0x1000D400), # toSPR
+    0x1000E000: ("D_CTRL", 4),
+    0x1000E010: ("D_STAT", 4),
+    0x1000E020: ("D_PCR", 4),
+    0x1000E030: ("D_SQWC", 4),
+    0x1000E040: ("D_RBSR", 4),
+    0x1000E050: ("D_RBOR", 4),
+    0x1000E060: ("D_STADR", 4),
+    0x1000F520: ("D_ENABLER", 4),
+    0x1000F590: ("D_ENABLEW", 4),
+
+    # INTC
+    0x1000F000: ("INTC_STAT", 4),
+    0x1000F010: ("INTC_MASK", 4),
+
+    # GS privileged registers
+    0x12000000: ("GS_PMODE", 8),
+    0x12000010: ("GS_SMODE1", 8),
+    0x12000020: ("GS_SMODE2", 8),
+    0x12000030: ("GS_SRFSH", 8),
+    0x12000040: ("GS_SYNCH1", 8),
+    0x12000050: ("GS_SYNCH2", 8),
+    0x12000060: ("GS_SYNCV", 8),
+    0x12000070: ("GS_DISPFB1", 8),
+    0x12000080: ("GS_DISPLAY1", 8),
+    0x12000090: ("GS_DISPFB2", 8),
+    0x120000A0: ("GS_DISPLAY2", 8),
+    0x120000B0: ("GS_EXTBUF", 8),
+    0x120000C0: ("GS_EXTDATA", 8),
+    0x120000D0: ("GS_EXTWRITE", 8),
+    0x120000E0: ("GS_BGCOLOR", 8),
+    0x12001000: ("GS_CSR", 8),
+    0x12001010: ("GS_IMR", 8),
+    0x12001040: ("GS_BUSDIR", 8),
+    0x12001080: ("GS_SIGLBLID", 8),
+}
@@ -0,0 +1,23 @@
+from typing import Dict
+
+from binaryninja.architecture import RegisterInfo, RegisterName
+
+from .cop0.registers import registers as cop0_registers
+from .ee.registers import registers as ee_registers
+from .fpu.registers import c_registers as fpu_c_registers
+from .fpu.registers import registers as fpu_registers
+from .vu0.registers import c_registers as vu0_c_registers
+from .vu0.registers import f_registers as vu0_f_registers
+from .vu0.registers import i_registers as vu0_i_registers
+
+# Every register the EE architecture exposes, merged once when this is first imported
+# rather than from seven dicts at class definition
+registers: Dict[RegisterName, RegisterInfo] = {
+    **ee_registers,
+    **cop0_registers,
+    **fpu_registers,
+    **fpu_c_registers,
+    **vu0_i_registers,
+    **vu0_f_registers,
+    **vu0_c_registers,
+}
@@ -0,0 +1,100 @@
+from enum import IntEnum, unique
+
+# VIFcode layout:
+# bits 0-15:  IMMEDIATE
+# bits 16-23: NUM (0 means 256)
+# bits 24-30: CMD
+# bit 31:     IRQ
+
+@unique
+class VifCommand(IntEnum):
+    NOP = 0x00
+    STCYCL = 0x01
+    OFFSET = 0x02
+    BASE = 0x03
+    ITOP = 0x04
+    STMOD = 0x05
+    MSKPATH3 = 0x06
+    MARK = 0x07
+    FLUSHE = 0x10
+    FLUSH = 0x11
+    FLUSHA = 0x13
+    MSCAL = 0x14
+    MSCALF = 0x15
+    MSCNT = 0x17
+    STMASK = 0x20
+    STROW = 0x30
+    STCOL = 0x31
+    MPG = 0x4A
+    DIRECT = 0x50
+    DIRECTHL = 0x51
+    UNPACK = 0x60
+    """
+    0x60-0x7F, the low five bits select the format and masking
+    """
+
+VIF_CMD_MASK = 0x7F000000
+VIF_IRQ = 0x80000000
+
+def vif_immediate(code: int) -> int:
+    return code & 0xFFFF
+
+def vif_num(code: int) -> int:
+    return ((code >> 16) & 0xFF) or 256
+
+def vif_cmd(code: int) -> int:
+    return (code >> 24) & 0x7F
+
+def is_unpack(cmd: int) -> bool:
+    return cmd & 0x60 == 0x60
+
+# Everything but UNPACK, whose low bits select a format
+vif_commands = frozenset(command.value for command in VifCommand if command != VifCommand.UNPACK)
+
+# UNPACK formats indexed by bits 0-3 (vn << 2 | vl), None for the invalid ones
+unpack_formats = (
+    "S-32", "S-16", "S-8", None,
+    "V2-32", "V2-16", "V2-8", None,
+    "V3-32", "V3-16", "V3-8", None,
+    "V4-32", "V4-16", "V4-8", "V4-5",
+)
+
+def is_vif_command(cmd: int) -> bool:
+    if is_unpack(cmd):
+        return unpack_formats[cmd & 0xF] is not None
+    return cmd in vif_commands
+
+def unpack_length(code: int, cl: int, wl: int) -> int:
+    """
+    Bytes of data following an UNPACK, NUM counts the quadwords written to VU
+    memory so with WL > CL some of them are filled rather than read.
+    """
+    cmd = vif_cmd(code)
+    num = vif_num(code)
+    if wl > cl:
+        num = cl * (num // wl) + min(num % wl, cl)
+
+    vn = (cmd >> 2) & 0x3
+    vl = cmd & 0x3
+    bits = (32 >> vl) * (vn + 1)
+    return (num * bits + 31) // 32 * 4
+
+def vif_payload_length(code: int, cl: int, wl: int) -> int:
+    """
+    Bytes of data following the VIFcode, with CL/WL from the last STCYCL
+    """
+    cmd = vif_cmd(code)
+    if is_unpack(cmd):
+        return unpack_length(code, cl, wl)
+
+    match cmd:
+        case VifCommand.STMASK:
+            return 4
+        case VifCommand.STROW | VifCommand.STCOL:
+            return 16
+        case VifCommand.MPG:
+            return vif_num(code) * 8
+        case VifCommand.DIRECT | VifCommand.DIRECTHL:
+            return (vif_immediate(code) or 0x10000) * 16
+        case _:
+            return 0
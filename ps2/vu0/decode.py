@@ -1,11 +1,14 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
 from ..instruction import Instruction, InstructionType
 from .registers import (
-    get_f_name,
-    get_i_name,
+    f_register_names,
+    i_register_names,
     Q_REGISTER,
     ACC_REGISTER,
     I_REGISTER,
     R_REGISTER,
+    P_REGISTER,
     CMSAR0_REGISTER
 )
 
@@ -20,7 +23,7 @@ component_bits: list[str] = [
 # bit 1: w
 # bit 2: z
 # bit 3: y
-# bit 4: z
+# bit 4: x
 field_bits_to_string = [
     'invalid',
     'w',
@@ -29,7 +32,7 @@ field_bits_to_string = [
     'y',
     'yw',
     'yz',
-    'yxw',
+    'yzw',
     'x',
     'xw',
     'xz',
@@ -46,862 +49,366 @@ def component_bits_to_string(bits: int):
 def component_id_to_string(id: int):
     return component_bits[id & 0x03]
 
-def decode_destination_register_index(opcode: int) -> int:
-    return (opcode >> 6) & 0x1F
-
-def decode_source_register_index(opcode: int) -> int:
-    return (opcode >> 11) & 0x1F
-
-def decode_temp_register_index(opcode: int) -> int:
-    return (opcode >> 16) & 0x1F
-
-def decode_destination_component_bits(opcode: int) -> int:
-    return (opcode >> 21) & 0x0F
-
-def decode_broadcast_component_id(opcode: int) -> int:
-    return (opcode >> 0)  & 0x03
-
-def decode_source_component_id(opcode: int) -> int:
-    return (opcode >> 21) & 0x03
-
-def decode_temp_component_id(opcode: int) -> int:
-    return (opcode >> 23) & 0x03
-
-def decode_immediate_value(opcode: int) -> int:
-    return (opcode >> 5) & 0x1F
-
-def decode_destination_register_name_float(opcode: int) -> int:
-    return get_f_name(decode_destination_register_index(opcode))
-
-def decode_destination_register_name_int(opcode: int) -> int:
-    return get_i_name(decode_destination_register_index(opcode))
-
-def decode_source_register_name_float(opcode: int) -> int:
-    return get_f_name(decode_source_register_index(opcode))
-
-def decode_source_register_name_int(opcode: int) -> int:
-    return get_i_name(decode_source_register_index(opcode))
-
-def decode_temp_register_name_float(opcode: int) -> int:
-    return get_f_name(decode_temp_register_index(opcode))
+# A register field is (shift, names): the name is names[(opcode >> shift) & 0x1F].
+# Fixed registers use a table holding the same name 32 times so every field
+# decodes the same way.
+RegisterField = Tuple[int, Sequence[str]]
+
+def _fixed(name: str) -> RegisterField:
+    return (0, (name,) * 32)
+
+# Integer register fields are 5 bits wide but only address $vi0-$vi15
+_I_NAMES = tuple(i_register_names[i & 0x0F] for i in range(32))
+_F_NAMES = tuple(f_register_names)
+
+FD: RegisterField = (6, _F_NAMES)
+FS: RegisterField = (11, _F_NAMES)
+FT: RegisterField = (16, _F_NAMES)
+ID: RegisterField = (6, _I_NAMES)
+IS: RegisterField = (11, _I_NAMES)
+IT: RegisterField = (16, _I_NAMES)
+ACC = _fixed(ACC_REGISTER)
+Q = _fixed(Q_REGISTER)
+I = _fixed(I_REGISTER)
+R = _fixed(R_REGISTER)
+CMSAR0 = _fixed(CMSAR0_REGISTER)
+
+def _imm5(opcode: int) -> int:
+    imm = (opcode >> 6) & 0x1F
+    return imm - 0x20 if imm & 0x10 else imm
+
+def _imm15(opcode: int) -> int:
+    return (opcode >> 6) & 0x7FFF
+
+class Recipe:
+    """
+    Everything needed to decode one VU0 macro instruction: its mnemonic, where each
+    register comes from and which component fields it has.
+    """
+    __slots__ = [
+        "name", "type", "reg1", "reg2", "reg3", "broadcast", "destination", "source0", "source1", "operand"
+    ]
+
+    name: str
+    type: InstructionType
+    reg1: Optional[RegisterField]
+    reg2: Optional[RegisterField]
+    reg3: Optional[RegisterField]
+    broadcast: bool
+    """
+    Broadcast component in bits 0-1
+    """
+    destination: bool
+    """
+    Destination component mask in bits 21-24
+    """
+    source0: bool
+    """
+    fs component in bits 21-22
+    """
+    source1: bool
+    """
+    ft component in bits 23-24
+    """
+    operand: Optional[Callable[[int], int]]
+
+    def __init__(self, name: str, reg1: Optional[RegisterField] = None, reg2: Optional[RegisterField] = None,
+                 reg3: Optional[RegisterField] = None, broadcast: bool = False, destination: bool = False,
+                 source0: bool = False, source1: bool = False, operand: Optional[Callable[[int], int]] = None,
+                 type: InstructionType = InstructionType.GenericInt):
+        self.name = name
+        self.type = type
+        self.reg1 = reg1
+        self.reg2 = reg2
+        self.reg3 = reg3
+        self.broadcast = broadcast
+        self.destination = destination
+        self.source0 = source0
+        self.source1 = source1
+        self.operand = operand
+
+def _table(size: int, entries: List[Tuple[Sequence[int], Recipe]]) -> Tuple[Optional[Recipe], ...]:
+    table: List[Optional[Recipe]] = [None] * size
+    for indices, recipe in entries:
+        for index in indices:
+            table[index] = recipe
+    return tuple(table)
+
+def _bc(first: int) -> range:
+    # The 4 broadcast variants of an instruction occupy consecutive slots
+    return range(first, first + 4)
+
+# Indexed by bits 0-5, 0x3C-0x3F continue in SPECIAL2_TABLE
+SPECIAL_TABLE = _table(64, [
+    # VF[fd].comp = VF[fs].comp + VF[ft].bcomp
+    (_bc(0x00), Recipe("vadd", FD, FS, FT, broadcast=True, destination=True)),
+    # VF[fd].comp = VF[fs].comp - VF[ft].bcomp
+    (_bc(0x04), Recipe("vsub", FD, FS, FT, broadcast=True, destination=True)),
+    # VF[fd].comp = ACC.comp + (VF[fs].comp * VF[ft].bcomp)
+    (_bc(0x08), Recipe("vmadd", FD, FS, FT, broadcast=True, destination=True)),
+    # VF[fd].comp = ACC.comp - (VF[fs].comp * VF[ft].bcomp)
+    (_bc(0x0C), Recipe("vmsub", FD, FS, FT, broadcast=True, destination=True)),
+    # VF[fd].comp = max(VF[fs].comp, VF[ft].bcomp)
+    (_bc(0x10), Recipe("vmax", FD, FS, FT, broadcast=True, destination=True)),
+    # VF[fd].comp = min(VF[fs].comp, VF[ft].bcomp)
+    (_bc(0x14), Recipe("vmini", FD, FS, FT, broadcast=True, destination=True)),
+    # VF[fd].comp = VF[fs].comp * VF[ft].bcomp
+    (_bc(0x18), Recipe("vmul", FD, FS, FT, broadcast=True, destination=True)),
+    # VF[fd].comp = VF[fs].comp * Q
+    ((0x1C,), Recipe("vmulq", FD, FS, Q, destination=True)),
+    # VF[fd].comp = max(VF[fs].comp, I)
+    ((0x1D,), Recipe("vmaxi", FD, FS, I, destination=True)),
+    # VF[fd].comp = VF[fs].comp * I
+    ((0x1E,), Recipe("vmuli", FD, FS, I, destination=True)),
+    # VF[fd].comp = min(VF[fs].comp, I)
+    ((0x1F,), Recipe("vminii", FD, FS, I, destination=True)),
+    # VF[fd].comp = VF[fs].comp + Q
+    ((0x20,), Recipe("vaddq", FD, FS, Q, destination=True)),
+    # VF[fd].comp = ACC + (VF[fs].comp * Q)
+    ((0x21,), Recipe("vmaddq", FD, FS, Q, destination=True)),
+    # VF[fd].comp = VF[fs].comp + I
+    ((0x22,), Recipe("vaddi", FD, FS, I, destination=True)),
+    # VF[fd].comp = ACC.comp + (VF[fs].comp * I)
+    ((0x23,), Recipe("vmaddi", FD, FS, I, destination=True)),
+    # VF[fd].comp = VF[fs].comp - Q
+    ((0x24,), Recipe("vsubq", FD, FS, Q, destination=True)),
+    # VF[fd].comp = ACC.comp - (VF[fs].comp * Q)
+    ((0x25,), Recipe("vmsubq", FD, FS, Q, destination=True)),
+    # VF[fd].comp = VF[fs.comp] - I
+    ((0x26,), Recipe("vsubi", FD, FS, I, destination=True)),
+    # VF[fd] = ACC.comp - (VF[fs].comp * I)
+    ((0x27,), Recipe("vmsubi", FD, FS, I, destination=True)),
+    # VF[fd].comp = VF[fs].comp + VF[ft].comp
+    ((0x28,), Recipe("vadd", FD, FS, FT, destination=True)),
+    # VF[vd].comp = ACC.comp + (VF[fs] * VF[ft])
+    ((0x29,), Recipe("vmadd", FD, FS, FT, destination=True)),
+    # VF[fd].comp = VF[fs].comp * VF[ft].comp
+    ((0x2A,), Recipe("vmul", FD, FS, FT, destination=True)),
+    # VF[fd].comp = max(VF[fs].comp, VF[ft].comp)
+    ((0x2B,), Recipe("vmax", FD, FS, FT, destination=True)),
+    # VF[fd].comp = VF[fs].comp - VF[ft].comp
+    ((0x2C,), Recipe("vsub", FD, FS, FT, destination=True)),
+    # VF[fd].comp = ACC.comp - (VF[fs].comp * VF[vt].comp)
+    ((0x2D,), Recipe("vmsub", FD, FS, FT, destination=True)),
+    # VF[fd].xyz = ACC.xyz - VF[fs].xyz * VF[ft].xyz (hardcoded to xyz)
+    ((0x2E,), Recipe("vopmsub", FD, FS, FT, destination=True)),
+    # VF[fd].comp = min(VF[fs].comp, VF[ft].comp)
+    ((0x2F,), Recipe("vmini", FD, FS, FT, destination=True)),
+    # VI[id] = VI[is] + VI[it]
+    ((0x30,), Recipe("viadd", ID, IS, IT)),
+    # VI[id] = VI[is] - VI[it]
+    ((0x31,), Recipe("visub", ID, IS, IT)),
+    # VI[it] = VI[is] + imm
+    ((0x32,), Recipe("viaddi", IT, IS, operand=_imm5)),
+    # VI[id] = VI[is] & VI[it]
+    ((0x34,), Recipe("viand", ID, IS, IT)),
+    # VI[id] = VI[is] | VI[it]
+    ((0x35,), Recipe("vior", ID, IS, IT)),
+    # call addr
+    ((0x38,), Recipe("vcallms", operand=_imm15)),
+    # call CMSAR0
+    ((0x39,), Recipe("vcallmsr", CMSAR0)),
+])
+
+# Indexed by bits 0-1 and 6-10
+SPECIAL2_TABLE = _table(128, [
+    # ACC.comp = VF[fs].comp + VF[ft].bcomp
+    (_bc(0x00), Recipe("vadda", ACC, FS, FT, broadcast=True, destination=True)),
+    # ACC.comp = VF[fs].comp - VF[ft].bcomp
+    (_bc(0x04), Recipe("vsuba", ACC, FS, FT, broadcast=True, destination=True)),
+    # ACC.comp = ACC.comp + (VF[fs].comp * VF[ft].bcomp)
+    (_bc(0x08), Recipe("vmadda", ACC, FS, FT, broadcast=True, destination=True)),
+    # ACC.comp = ACC.comp - (VF[fs].comp * VF[ft].bcomp)
+    (_bc(0x0C), Recipe("vmsuba", ACC, FS, FT, broadcast=True, destination=True)),
+    # VF[ft] = ToF32FromFixedPoint0(VF[fs])
+    ((0x10,), Recipe("vitof0", FT, FS, destination=True)),
+    # VF[ft] = ToF32FromFixedPoint4(VF[fs])
+    ((0x11,), Recipe("vitof4", FT, FS, destination=True)),
+    # VF[ft] = ToF32FromFixedPoint12(VF[fs])
+    ((0x12,), Recipe("vitof12", FT, FS, destination=True)),
+    # VF[ft] = ToF32FromFixedPoint15(VF[fs])
+    ((0x13,), Recipe("vitof15", FT, FS, destination=True)),
+    # VF[ft] = ToFixedPoint0FromF32(VF[fs])
+    ((0x14,), Recipe("vftoi0", FT, FS, destination=True)),
+    # VF[ft] = ToFixedPoint4FromF32(VF[fs])
+    ((0x15,), Recipe("vftoi4", FT, FS, destination=True)),
+    # VF[ft] = ToFixedPoint12FromF32(VF[fs])
+    ((0x16,), Recipe("vftoi12", FT, FS, destination=True)),
+    # VF[ft] = ToFixedPoint15FromF32(VF[fs])
+    ((0x17,), Recipe("vftoi15", FT, FS, destination=True)),
+    # ACC.comp = VF[fs].comp * VF[ft].bcomp
+    (_bc(0x18), Recipe("vmula", ACC, FS, FT, broadcast=True, destination=True)),
+    # ACC.comp = VF[fs].comp * Q
+    ((0x1C,), Recipe("vmulaq", ACC, FS, Q, destination=True)),
+    # VF[ft].comp = abs(VF[fs].comp)
+    ((0x1D,), Recipe("vabs", FT, FS, destination=True)),
+    # ACC.comp = VF[fs].comp * I
+    ((0x1E,), Recipe("vmulai", ACC, FS, I, destination=True)),
+    # CF = clip(VF[fs].xyz, VF[ft].w) (hardcoded to w and xyz)
+    ((0x1F,), Recipe("vclip", FS, FT, broadcast=True, destination=True)),
+    # ACC.comp = VF[fs].comp + Q
+    ((0x20,), Recipe("vaddaq", ACC, FS, Q, destination=True)),
+    # ACC.comp = ACC.comp + (VF[fs].comp * Q)
+    ((0x21,), Recipe("vmaddaq", ACC, FS, Q, destination=True)),
+    # ACC.comp = VF[fs].comp + I
+    ((0x22,), Recipe("vaddai", ACC, FS, I, destination=True)),
+    # ACC.comp = ACC.comp + (VF[fs].comp * I)
+    ((0x23,), Recipe("vmaddai", ACC, FS, I, destination=True)),
+    # ACC.comp = ACC.comp - (VF[fs].comp * Q)
+    ((0x25,), Recipe("vmsubaq", ACC, FS, Q, destination=True)),
+    # ACC.comp = VF[fs].comp - I
+    ((0x26,), Recipe("vsubai", ACC, FS, I, destination=True)),
+    # ACC.comp = ACC.comp - (VF[fs].comp * I)
+    ((0x27,), Recipe("vmsubai", ACC, FS, I, destination=True)),
+    # ACC.comp = VF[fs].comp + VF[ft].comp
+    ((0x28,), Recipe("vadda", ACC, FS, FT, destination=True)),
+    # ACC.comp = ACC.comp + (VF[fs].comp * VF[ft].comp)
+    ((0x29,), Recipe("vmadda", ACC, FS, FT, destination=True)),
+    # ACC.comp = VF[fs].comp * VF[ft].comp
+    ((0x2A,), Recipe("vmula", ACC, FS, FT, destination=True)),
+    # ACC.comp = VF[fs].comp - VF[ft].comp
+    ((0x2C,), Recipe("vsuba", ACC, FS, FT, destination=True)),
+    # ACC.comp = ACC.comp - (VF[fs].comp * VF[ft].comp)
+    ((0x2D,), Recipe("vmsuba", ACC, FS, FT, destination=True)),
+    # ACC.xyz = VF[fs].xyz * VF[ft].xyz (hardcoded to xyz)
+    ((0x2E,), Recipe("vopmula", ACC, FS, FT, destination=True)),
+    ((0x2F,), Recipe("vnop")),
+    # VF[ft].comp = VF[fs].comp
+    ((0x30,), Recipe("vmove", FT, FS, destination=True)),
+    # VF[ft].comp = rotate_right(VF[fs])
+    ((0x31,), Recipe("vmr32", FT, FS, destination=True)),
+    # VF[ft].comp = read(VI[is]).comp, VI[is]++
+    ((0x34,), Recipe("vlqi", FT, IS, destination=True)),
+    # write(VI[it], VF[fs].comp), VI[it]++
+    ((0x35,), Recipe("vsqi", FS, IT, destination=True)),
+    # VF[ft] = read(--VI[is])
+    ((0x36,), Recipe("vlqd", FT, IS, destination=True)),
+    # write(--VI[it], VF[fs].comp)
+    ((0x37,), Recipe("vsqd", FS, IT, destination=True)),
+    # Q = VF[fs].fsf / VF[ft].ftf
+    ((0x38,), Recipe("vdiv", Q, FS, FT, source0=True, source1=True)),
+    # Q = sqrt(VF[ft].ftf)
+    ((0x39,), Recipe("vsqrt", Q, FT, source1=True)),
+    # Q = VF[fs].fsf / sqrt(VF[ft].ftf)
+    ((0x3A,), Recipe("vrsqrt", Q, FS, FT, source0=True, source1=True)),
+    ((0x3B,), Recipe("vwaitq")),
+    # VI[it] = trunc16(VF[fs].fsf)
+    ((0x3C,), Recipe("vmtir", IT, FS, source0=True)),
+    # VF[ft].comp = VI[is]
+    ((0x3D,), Recipe("vmfir", FT, IS, destination=True)),
+    # VI[it].comp = read(VI[is]).comp
+    ((0x3E,), Recipe("vilwr", IT, IS, destination=True)),
+    # write(VI[is], read(VI[it]).comp)
+    ((0x3F,), Recipe("viswr", IT, IS, destination=True)),
+    # VF[ft].comp = rand(R)
+    ((0x40,), Recipe("vrnext", FT, R, destination=True)),
+    # VF[ft].comp = R
+    ((0x41,), Recipe("vrget", FT, R, destination=True)),
+    # R = VF[fs].fsf
+    ((0x42,), Recipe("vrinit", R, FS, source0=True)),
+    # R = VF[fs].fsf ^ R
+    ((0x43,), Recipe("vrxor", R, FS, source0=True)),
+])
+
+def special2_index(opcode: int) -> int:
+    return opcode & 3 | (opcode >> 4) & 0x7C
+
+def decode_recipe(recipe: Optional[Recipe], opcode: int) -> Instruction:
+    instruction = Instruction()
+    if recipe is None:
+        return instruction
+
+    instruction.type = recipe.type
+    instruction.name = recipe.name
+
+    if recipe.reg1 is not None:
+        shift, names = recipe.reg1
+        instruction.reg1 = names[(opcode >> shift) & 0x1F]
+    if recipe.reg2 is not None:
+        shift, names = recipe.reg2
+        instruction.reg2 = names[(opcode >> shift) & 0x1F]
+    if recipe.reg3 is not None:
+        shift, names = recipe.reg3
+        instruction.reg3 = names[(opcode >> shift) & 0x1F]
+
+    if recipe.broadcast:
+        instruction.broadcast_component = opcode & 0x03
+    if recipe.destination:
+        instruction.destination_components = (opcode >> 21) & 0x0F
+    if recipe.source0:
+        instruction.source0_component = (opcode >> 21) & 0x03
+    if recipe.source1:
+        instruction.source1_component = (opcode >> 23) & 0x03
+    if recipe.operand is not None:
+        instruction.operand = recipe.operand(opcode)
 
-def decode_temp_register_name_int(opcode: int) -> int:
-    return get_i_name(decode_temp_register_index(opcode))
+    return instruction
 
 def decode_cop2_special(opcode: int, addr: int) -> Instruction:
-    instruction = Instruction()
-    IT = InstructionType
-
     op = opcode & 0x3F
+    if op >= 0x3C:
+        return decode_recipe(SPECIAL2_TABLE[special2_index(opcode)], opcode)
+    return decode_recipe(SPECIAL_TABLE[op], opcode)
 
-    instruction.type = IT.GenericInt
-
-    match op:
-        case 0x00 | 0x01 | 0x02 | 0x03:
-            # vaddbc
-            # VF[fd].comp = VF[fs].comp + VF[ft].bcomp
-            instruction.name = "vadd"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-
-        case 0x04 | 0x05 | 0x06 | 0x07:
-            # vsubbc
-            # VF[fd].comp = VF[fs].comp - VF[ft].bcomp
-            instruction.name = "vsub"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x08 | 0x09 | 0x0A | 0x0B:
-            # vmaddbc
-            # VF[fd].comp = ACC.comp + (VF[fs].comp * VF[ft].bcomp)
-            instruction.name = "vmadd"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x0C | 0x0D | 0x0E | 0x0F:
-            # vmsubbc
-            # VF[fd].comp = ACC.comp - (VF[fs].comp * VF[ft].bcomp)
-            instruction.name = "vmsub"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x10 | 0x11 | 0x12 | 0x13:
-            # vmaxbc
-            # VF[fd].comp = max(VF[fs].comp, VF[ft].bcomp)
-            instruction.name = "vmax"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x14 | 0x15 | 0x16 | 0x17:
-            # vminibc
-            # VF[fd].comp = min(VF[fs].comp, VF[ft].bcomp)
-            instruction.name = "vmini"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x18 | 0x19 | 0x1A | 0x1B:
-            # vmulbc
-            # VF[fd].comp = VF[fs].comp + VF[ft].bcomp
-            instruction.name = "vmul"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x1C:
-            # vmulq
-            # VF[fd].comp = VF[fs].comp * Q
-            instruction.name = "vmulq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x1D:
-            # vmaxi
-            # VF[fd].comp = max(VF[fs].comp, I)
-            instruction.name = "vmaxi"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x1E:
-            # vmuli
-            # VF[fd].comp = VF[fs].comp * I
-            instruction.name = "vmuli"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x1F:
-            # vminii
-            # VF[fd].comp = min(VF[fs].comp, I)
-            instruction.name = "vminii"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x20:
-            # vaddq
-            # VF[fd].comp = VF[fs].comp + Q
-            instruction.name = "vaddq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x21:
-            # vmaddq
-            # VF[fd].comp = ACC + (VF[fs].comp * Q)
-            instruction.name = "vmaddq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x22:
-            # vaddi
-            # VF[fd].comp = VF[fs].comp + I
-            instruction.name = "vaddi"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x23:
-            # vmaddi
-            # VF[fd].comp = ACC.comp + (VF[fs].comp * I)
-            instruction.name = "vmaddi"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x24:
-            # vsubq
-            # VF[fd].comp = VF[fs].comp - Q
-            instruction.name = "vsubq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x25:
-            # vmsubq
-            # VF[fd].comp = ACC.comp - (VF[fs].comp * Q)
-            instruction.name = "vmsubq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x26:
-            # vsubi
-            # VF[fd].comp = VF[fs.comp] - I
-            instruction.name = "vsubi"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x27:
-            # vmsubi
-            # VF[fd] = ACC.comp - (VF[fs].comp * I)
-            instruction.name = "vmsubi"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x28:
-            # vadd
-            # VF[fd].comp = VF[fs].comp + VF[ft].comp
-            instruction.name = "vadd"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x29:
-            # vmadd
-            # VF[vd].comp = ACC.comp + (VF[fs] * VF[ft])
-            instruction.name = "vmadd"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2A:
-            # vmul
-            # VF[fd].comp = VF[fs].comp * VF[ft].comp
-            instruction.name = "vmul"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2B:
-            # vmax
-            # VF[fd].comp = max(VF[fs].comp, VF[ft].comp)
-            instruction.name = "vmax"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2C:
-            # vsub
-            # VF[fd].comp = VF[fs].comp - VF[ft].comp
-            instruction.name = "vsub"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2D:
-            # vmsub
-            # VF[fd].comp = ACC.comp - (VF[fs].comp * VF[vt].comp)
-            instruction.name = "vmsub"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2E:
-            # vopmsub
-            # VF[fd].xyz = ACC.xyz - VF[fs].xyz * VF[ft].xyz
-            instruction.name = "vopmsub"
-
-            # hardcoded to xyz
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2F:
-            # vmini
-            # VF[fd].comp = min(VF[fs].comp, VF[ft].comp)
-            instruction.name = "vmini"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_destination_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x30:
-            # viadd
-            # VI[id] = VI[is] + VI[it]
-            instruction.name = "viadd"
-
-            instruction.reg1 = decode_destination_register_name_int(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x31:
-            # visub
-            # VI[id] = VI[is] - VI[it]
-            instruction.name = "visub"
-
-            instruction.reg1 = decode_destination_register_name_int(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-            instruction.reg3 = decode_temp_register_name_int(opcode)
-        case 0x32:
-            # viaddi
-            # VI[it] = VI[is] + immm
-            instruction.name = "viaddi"
-
-            instruction.operand = decode_immediate_value(opcode)
-
-            instruction.reg1 = decode_temp_register_name_int(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-        case 0x34:
-            # viand
-            # VI[id] = VI[is] & VI[it]
-            instruction.name = "viand"
-
-            instruction.reg1 = decode_destination_register_name_int(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-            instruction.reg3 = decode_temp_register_name_int(opcode)
-        case 0x35:
-            # vior
-            # VI[id] = VI[is] | VI[it]
-            instruction.name = "vior"
-
-            instruction.reg1 = decode_destination_register_name_int(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-            instruction.reg3 = decode_temp_register_name_int(opcode)
-        case 0x38:
-            # vcallms
-            # call addr
-            instruction.name = "vcallms"
-            instruction.operand = (opcode >> 6) & 0x7FFF
-        case 0x39:
-            # vcallmsr
-            # call CMSAR0
-            instruction.name = "vcallmsr"
-            instruction.reg1 = CMSAR0_REGISTER
-        case 0x3C | 0x3D | 0x3E | 0x3F:
-            return decode_cop2_special2(opcode, addr)
+def decode_cop2_special2(opcode: int, addr: int) -> Instruction:
+    return decode_recipe(SPECIAL2_TABLE[special2_index(opcode)], opcode)
 
-    return instruction
+# Display strings for every mnemonic/register and component combination, built once
+# so rendering VU code only does lookups
 
-def decode_cop2_special2(opcode: int, addr: int) -> Instruction:
-    op = opcode & 3 | (opcode >> 4) & 0x7C
+_SUFFIXED_REGISTERS = list(f_register_names) + list(i_register_names) + [
+    Q_REGISTER, ACC_REGISTER, I_REGISTER, R_REGISTER, P_REGISTER, CMSAR0_REGISTER
+]
 
-    instruction = Instruction()
-    IT = InstructionType
-
-    instruction.type = IT.GenericInt
-
-    match op:
-        case 0x00 | 0x01 | 0x02 | 0x03:
-            # vaddabc
-            # ACC.comp = VF[fs].comp + VF[ft].bcomp
-            instruction.name = "vadda"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x04 | 0x05 | 0x06 | 0x07:
-            # vsubabc
-            # ACC.comp = VF[fs].comp - VF[ft].bcomp
-            instruction.name = "vsuba"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x08 | 0x09 | 0x0A | 0x0B:
-            # vmaddabc
-            # ACC.comp = ACC.comp + (VF[fs].comp * VF[ft].bcomp)
-            instruction.name = "vmadda"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x0C | 0x0D | 0x0E | 0x0F:
-            # vmsubabc
-            # ACC.comp = ACC.comp - (VF[fs].comp * VF[ft].bcomp)
-            instruction.name = "vmsuba"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x10:
-            # vitof0
-            # VF[ft] = ToF32FromFixedPoint0(VF[fs])
-            instruction.name = "vitof0"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x11:
-            # vitof4
-            # VF[ft] = ToF32FromFixedPoint4(VF[fs])
-            instruction.name = "vitof4"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x12:
-            # vitof12
-            # VF[ft] = ToF32FromFixedPoint12(VF[fs])
-            instruction.name = "vitof12"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x13:
-            # vitof15
-            # VF[ft] = ToF32FromFixedPoint15(VF[fs])
-            instruction.name = "vitof15"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x14:
-            # vftoi0
-            # VF[ft] = ToFixedPoint0FromF32(VF[fs])
-            instruction.name = "vftoi0"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x15:
-            # vftoi4
-            # VF[ft] = ToFixedPoint4FromF32(VF[fs])
-            instruction.name = "vftoi4"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x16:
-            # vftoi12
-            # VF[ft] = ToFixedPoint12FromF32(VF[fs])
-            instruction.name = "vftoi12"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x17:
-            # vftoi15
-            # VF[ft] = ToFixedPoint15FromF32(VF[fs])
-            instruction.name = "vftoi15"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x18 | 0x19 | 0x1A | 0x1B:
-            # vmulabc
-            # ACC.comp = VF[fs].comp * VF[ft].bcomp
-            instruction.name = "vmula"
-
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x1C:
-            # vmulaq
-            # ACC.comp = VF[fs].comp * Q
-            instruction.name = "vmulaq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x1D:
-            # vabs
-            # VF[ft].comp = abs(VF[fs].comp)
-            instruction.name = "vabs"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x1E:
-            # vmulai
-            # ACC.comp = VF[fs].comp * I
-            instruction.name = "vmulai"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x1F:
-            # vclip
-            # CF = clip(VF[fs].xyz, VF[ft].w)
-            instruction.name = "vclip"
-
-            # harcoded to w and xyz
-            instruction.broadcast_component    = decode_broadcast_component_id(opcode)
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_source_register_name_float(opcode)
-            instruction.reg2 = decode_temp_register_name_float(opcode)
-        case 0x20:
-            # vaddaq
-            # ACC.comp = VF[fs].comp + Q
-            instruction.name = "vaddaq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x21:
-            # vmaddaq
-            # ACC.comp = ACC.comp + (VF[fs].comp * Q)
-            instruction.name = "vmaddaq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x22:
-            # vaddai
-            # ACC.comp = VF[fs].comp + I
-            instruction.name = "vaddai"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x23:
-            # vmaddai
-            # ACC.comp = ACC.comp + (VF[fs].comp * I)
-            instruction.name = "vmaddai"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x25:
-            # vmsubaq
-            # ACC.comp = ACC.comp - (VF[fs].comp * Q)
-            instruction.name = "vmsubaq"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = Q_REGISTER
-        case 0x26:
-            # vsubai
-            # ACC.comp = VF[fs].comp - I
-            instruction.name = "vsubai"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x27:
-            # vmsubai
-            # ACC.comp = ACC.comp - (VF[fs].comp * I)
-            instruction.name = "vmsubai"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = I_REGISTER
-        case 0x28:
-            # vadda ACC.comp = VF[fs].comp + VF[ft].comp
-            instruction.name = "vadda"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x29:
-            # vmadda
-            # ACC.comp = ACC.comp + (VF[fs].comp * VF[ft].comp)
-            instruction.name = "vmadda"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2A:
-            # vmula
-            # ACC.comp = VF[fs].comp * VF[ft].comp
-            instruction.name = "vmula"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2C:
-            # vsuba
-            # ACC.comp = VF[fs].comp - VF[ft].comp
-            instruction.name = "vsuba"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2D:
-            # vmsuba
-            # ACC.comp = ACC.comp - (VF[fs].comp * VF[ft].comp)
-            instruction.name = "vmsuba"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2E:
-            # vopmula
-            # ACC.xyz = VF[fs].xyz * VF[ft].xyz
-            instruction.name = "vopmula"
-
-            # hardcoded to xyz
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = ACC_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x2F:
-            # vnop
-            instruction.name = "vnop"
-        case 0x30:
-            # vmove
-            # VF[ft].comp = VF[fs].comp
-            instruction.name = "vmove"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x31:
-            # vmr32
-            # VF[ft].comp = rotate_right(VF[ft])
-            instruction.name = "vmr32"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x34:
-            # vlqi
-            # VF[ft].comp = read(VI[is]).comp
-            # VF[ft]++
-            instruction.name = "vlqi"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-        case 0x35:
-            # vsqi
-            # write(VI[it], VF[fs].comp)
-            # VI[it]++
-            instruction.name = "vsqi"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_source_register_name_float(opcode)
-            instruction.reg2 = decode_temp_register_name_int(opcode)
-        case 0x36:
-            # vlqd
-            # VF[ft] = read(VI[is]--)
-            instruction.name = "vlqd"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-        case 0x37:
-            # vsqd
-            # write(VI[it]--, VF[fs].comp)
-            instruction.name = "vsqd"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_source_register_name_float(opcode)
-            instruction.reg2 = decode_temp_register_name_int(opcode)
-        case 0x38:
-            # vdiv
-            # Q = VF[fs].fsf / VF[ft].ftf
-            instruction.name = "vdiv"
-
-            instruction.source0_component = decode_source_component_id(opcode)
-            instruction.source1_component = decode_temp_component_id(opcode)
-
-            instruction.reg1 = Q_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x39:
-            # vsrqt
-            # Q = sqrt(VF[ft].ftf)
-            instruction.name = "vsqrt"
-
-            instruction.source1_component = decode_temp_component_id(opcode)
-
-            instruction.reg1 = Q_REGISTER
-            instruction.reg2 = decode_temp_register_name_float(opcode)
-        case 0x3A:
-            # vrsqrt
-            # Q = VF[fs].fsf / sqrt(VF[ft].ftf)
-            instruction.name = "vrsqrt"
-
-            instruction.source0_component = decode_source_component_id(opcode)
-            instruction.source1_component = decode_temp_component_id(opcode)
-
-            instruction.reg1 = Q_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-            instruction.reg3 = decode_temp_register_name_float(opcode)
-        case 0x3B:
-            # vwaitq
-            instruction.name = "vwaitq"
-        case 0x3C:
-            # vmtir
-            # VI[it] = trunc16(VF[fs].fsf)
-            instruction.name = "vmtir"
-
-            instruction.source0_component = decode_source_component_id(opcode)
-
-            instruction.reg1 = decode_temp_register_name_int(opcode)
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x3D:
-            # vmfir
-            # VF[ft].comp = VI[is]
-            instruction.name = "vmfir"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-        case 0x3E:
-            # vilwr
-            # VI[it].comp = read(VI[is]).comp
-            instruction.name = "vilwr"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_int(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-        case 0x3F:
-            # viswr
-            # write(VI[is], read(VI[it]).comp)
-            instruction.name = "viswr"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_int(opcode)
-            instruction.reg2 = decode_source_register_name_int(opcode)
-        case 0x40:
-            # vrnext
-            # VF[ft].comp = rand(R)
-            instruction.name = "vrnext"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = R_REGISTER
-        case 0x41:
-            # vrget
-            # VF[ft].comp = R
-            instruction.name = "vrget"
-
-            instruction.destination_components = decode_destination_component_bits(opcode)
-
-            instruction.reg1 = decode_temp_register_name_float(opcode)
-            instruction.reg2 = R_REGISTER
-        case 0x42:
-            # vrinit
-            # R = VF[fs].fsf
-            instruction.name = "vrinit"
-
-            instruction.source0_component = decode_source_component_id(opcode)
-
-            instruction.reg1 = R_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-        case 0x43:
-            # vrxor
-            # R = VF[fs].fsf ^ R
-            instruction.name = "vrxor"
-
-            instruction.source0_component = decode_source_component_id(opcode)
-
-            instruction.reg1 = R_REGISTER
-            instruction.reg2 = decode_source_register_name_float(opcode)
-
-    return instruction
\ No newline at end of file
+# register -> name with each destination mask, indexed like field_bits_to_string
+register_components: Dict[str, Tuple[str, ...]] = {
+    register: tuple(register + bits for bits in field_bits_to_string) for register in _SUFFIXED_REGISTERS
+}
+
+# register -> name with each single component, indexed like component_bits
+register_component: Dict[str, Tuple[str, ...]] = {
+    register: tuple(register + component for component in component_bits) for register in _SUFFIXED_REGISTERS
+}
+
+def _display_name(name: str, broadcast: Optional[int], destination: Optional[int]) -> str:
+    # vaddx.xyz
+    if broadcast is not None:
+        name += component_id_to_string(broadcast)
+    if destination is not None:
+        name += f".{component_bits_to_string(destination)}"
+    return name
+
+# (mnemonic, broadcast component, destination mask) -> displayed mnemonic
+display_names: Dict[Tuple[str, Optional[int], Optional[int]], str] = {}
+
+def add_display_names(recipes) -> None:
+    for recipe in recipes:
+        if recipe is None:
+            continue
+        broadcasts = range(4) if recipe.broadcast else (None,)
+        destinations = range(16) if recipe.destination else (None,)
+        for broadcast in broadcasts:
+            for destination in destinations:
+                display_names[(recipe.name, broadcast, destination)] = \
+                    _display_name(recipe.name, broadcast, destination)
+
+add_display_names(SPECIAL_TABLE)
+add_display_names(SPECIAL2_TABLE)
+
+def display_name(name: str, broadcast: Optional[int], destination: Optional[int]) -> str:
+    display = display_names.get((name, broadcast, destination))
+    if display is None:
+        display = _display_name(name, broadcast, destination)
+    return display
+
+def register_with_components(register: str, bits: int) -> str:
+    names = register_components.get(register)
+    if names is None:
+        return register + component_bits_to_string(bits)
+    return names[bits]
+
+def register_with_component(register: str, id: int) -> str:
+    names = register_component.get(register)
+    if names is None:
+        return register + component_id_to_string(id)
+    return names[id & 0x03]
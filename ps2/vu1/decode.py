@@ -0,0 +1,285 @@
+import struct
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+from ..instruction import Instruction, InstructionType
+from ..vu0.decode import (
+    FS, FT, IS, IT,
+    SPECIAL_TABLE, SPECIAL2_TABLE,
+    Recipe,
+    add_display_names,
+    decode_recipe,
+    display_name,
+    register_with_component,
+    register_with_components,
+    special2_index,
+    _fixed,
+)
+from ..vu0.registers import I_REGISTER, P_REGISTER
+
+# VU micro mode executes 64-bit pairs: the upper word (FMAC) in the high half and
+# the lower word (FDIV/EFU/integer/branch) in the low half. The upper and lower
+# special encodings are the COP2 macro ones without the COP2 prefix, so the
+# tables are derived from the VU0 ones.
+
+UPPER_FLAG_I = 1 << 31
+UPPER_FLAG_E = 1 << 30
+UPPER_FLAG_M = 1 << 29
+UPPER_FLAG_D = 1 << 28
+UPPER_FLAG_T = 1 << 27
+
+UPPER_FLAGS = (
+    (UPPER_FLAG_I, "i"),
+    (UPPER_FLAG_E, "e"),
+    (UPPER_FLAG_M, "m"),
+    (UPPER_FLAG_D, "d"),
+    (UPPER_FLAG_T, "t"),
+)
+
+UPPER_NOP = 0x000002FF
+LOWER_NOP = 0x8000033C
+
+P = _fixed(P_REGISTER)
+
+def _micro(recipe: Optional[Recipe]) -> Optional[Recipe]:
+    # Micro mode mnemonics drop the macro mode v prefix
+    if recipe is None:
+        return None
+    return Recipe(recipe.name[1:], recipe.reg1, recipe.reg2, recipe.reg3, recipe.broadcast,
+                  recipe.destination, recipe.source0, recipe.source1, recipe.operand, recipe.type)
+
+def _imm11(word: int) -> int:
+    imm = word & 0x7FF
+    return imm - 0x800 if imm & 0x400 else imm
+
+def _imm12(word: int) -> int:
+    return ((word >> 10) & 0x800) | (word & 0x7FF)
+
+def _imm15(word: int) -> int:
+    return ((word >> 10) & 0x7800) | (word & 0x7FF)
+
+def _imm24(word: int) -> int:
+    return word & 0xFFFFFF
+
+# FMAC operations, everything from 0x30 on is a lower instruction
+UPPER_TABLE = tuple(_micro(recipe) if i < 0x30 else None for i, recipe in enumerate(SPECIAL_TABLE))
+UPPER_SPECIAL2_TABLE = tuple(_micro(recipe) if i < 0x30 else None for i, recipe in enumerate(SPECIAL2_TABLE))
+
+# Integer operations (bit 31 set, bits 0-5 below 0x3C)
+LOWER_SPECIAL_TABLE = tuple(
+    _micro(recipe) if 0x30 <= i < 0x38 else None for i, recipe in enumerate(SPECIAL_TABLE)
+)
+
+def _lower_special2() -> Tuple[Optional[Recipe], ...]:
+    table: List[Optional[Recipe]] = [
+        _micro(recipe) if i >= 0x30 else None for i, recipe in enumerate(SPECIAL2_TABLE)
+    ]
+    efu: List[Tuple[int, Recipe]] = [
+        # VF[ft].comp = P
+        (0x64, Recipe("mfp", FT, P, destination=True)),
+        # VI[it] = TOP
+        (0x68, Recipe("xtop", IT)),
+        # VI[it] = ITOP
+        (0x69, Recipe("xitop", IT)),
+        # GIF transfer from VU1 memory at VI[is]
+        (0x6C, Recipe("xgkick", IS)),
+        # P = f(VF[fs])
+        (0x70, Recipe("esadd", P, FS)),
+        (0x71, Recipe("ersadd", P, FS)),
+        (0x72, Recipe("eleng", P, FS)),
+        (0x73, Recipe("erleng", P, FS)),
+        (0x74, Recipe("eatanxy", P, FS)),
+        (0x75, Recipe("eatanxz", P, FS)),
+        (0x76, Recipe("esum", P, FS)),
+        # P = f(VF[fs].fsf)
+        (0x78, Recipe("esqrt", P, FS, source0=True)),
+        (0x79, Recipe("ersqrt", P, FS, source0=True)),
+        (0x7A, Recipe("ercpr", P, FS, source0=True)),
+        (0x7B, Recipe("waitp")),
+        (0x7C, Recipe("esin", P, FS, source0=True)),
+        (0x7D, Recipe("eatan", P, FS, source0=True)),
+        (0x7E, Recipe("eexp", P, FS, source0=True)),
+    ]
+    for index, recipe in efu:
+        table[index] = recipe
+    return tuple(table)
+
+LOWER_SPECIAL2_TABLE = _lower_special2()
+
+def _lower_table() -> Tuple[Optional[Recipe], ...]:
+    IT_ = InstructionType
+    table: List[Optional[Recipe]] = [None] * 64
+    entries: List[Tuple[int, Recipe]] = [
+        # VF[ft].comp = read(VI[is] + imm)
+        (0x00, Recipe("lq", FT, IS, destination=True, operand=_imm11, type=IT_.LoadStore)),
+        # write(VI[it] + imm, VF[fs].comp)
+        (0x01, Recipe("sq", FS, IT, destination=True, operand=_imm11, type=IT_.LoadStore)),
+        # VI[it] = read(VI[is] + imm).comp
+        (0x04, Recipe("ilw", IT, IS, destination=True, operand=_imm11, type=IT_.LoadStore)),
+        # write(VI[is] + imm, VI[it]).comp
+        (0x05, Recipe("isw", IT, IS, destination=True, operand=_imm11, type=IT_.LoadStore)),
+        (0x08, Recipe("iaddiu", IT, IS, operand=_imm15)),
+        (0x09, Recipe("isubiu", IT, IS, operand=_imm15)),
+        # Clipping flag operations
+        (0x10, Recipe("fceq", operand=_imm24)),
+        (0x11, Recipe("fcset", operand=_imm24)),
+        (0x12, Recipe("fcand", operand=_imm24)),
+        (0x13, Recipe("fcor", operand=_imm24)),
+        # Status flag operations
+        (0x14, Recipe("fseq", IT, operand=_imm12)),
+        (0x15, Recipe("fsset", operand=_imm12)),
+        (0x16, Recipe("fsand", IT, operand=_imm12)),
+        (0x17, Recipe("fsor", IT, operand=_imm12)),
+        # MAC flag operations
+        (0x18, Recipe("fmeq", IT, IS)),
+        (0x1A, Recipe("fmand", IT, IS)),
+        (0x1B, Recipe("fmor", IT, IS)),
+        (0x1C, Recipe("fcget", IT)),
+        # Branches, operand is the offset in instructions from the delay slot
+        (0x20, Recipe("b", operand=_imm11, type=IT_.Branch)),
+        (0x21, Recipe("bal", IT, operand=_imm11, type=IT_.Branch)),
+        (0x24, Recipe("jr", IS, type=IT_.Branch)),
+        (0x25, Recipe("jalr", IT, IS, type=IT_.Branch)),
+        (0x28, Recipe("ibeq", IT, IS, operand=_imm11, type=IT_.Branch)),
+        (0x29, Recipe("ibne", IT, IS, operand=_imm11, type=IT_.Branch)),
+        (0x2C, Recipe("ibltz", IS, operand=_imm11, type=IT_.Branch)),
+        (0x2D, Recipe("ibgtz", IS, operand=_imm11, type=IT_.Branch)),
+        (0x2E, Recipe("iblez", IS, operand=_imm11, type=IT_.Branch)),
+        (0x2F, Recipe("ibgez", IS, operand=_imm11, type=IT_.Branch)),
+    ]
+    for index, recipe in entries:
+        table[index] = recipe
+    return tuple(table)
+
+LOWER_TABLE = _lower_table()
+
+for _recipes in (UPPER_TABLE, UPPER_SPECIAL2_TABLE, LOWER_SPECIAL_TABLE, LOWER_SPECIAL2_TABLE, LOWER_TABLE):
+    add_display_names(_recipes)
+
+def _nop() -> Instruction:
+    instruction = Instruction()
+    instruction.type = InstructionType.GenericInt
+    instruction.name = "nop"
+    return instruction
+
+# Decoding doesn't depend on the address, so results are shared by word.
+# Callers must not modify them.
+
+@lru_cache(maxsize=1 << 14)
+def decode_upper(word: int) -> Instruction:
+    if word & 0x07FFFFFF == UPPER_NOP:
+        return _nop()
+
+    op = word & 0x3F
+    if op >= 0x3C:
+        return decode_recipe(UPPER_SPECIAL2_TABLE[special2_index(word)], word)
+    return decode_recipe(UPPER_TABLE[op], word)
+
+@lru_cache(maxsize=1 << 14)
+def decode_lower(word: int) -> Instruction:
+    if word == LOWER_NOP:
+        return _nop()
+
+    if word & 0x80000000:
+        op = word & 0x3F
+        if op >= 0x3C:
+            return decode_recipe(LOWER_SPECIAL2_TABLE[special2_index(word)], word)
+        return decode_recipe(LOWER_SPECIAL_TABLE[op], word)
+
+    return decode_recipe(LOWER_TABLE[word >> 25], word)
+
+def decode_loi(word: int) -> Instruction:
+    # With the upper I bit set the lower word is a float loaded into I
+    instruction = Instruction()
+    instruction.type = InstructionType.GenericInt
+    instruction.name = "loi"
+    instruction.reg1 = I_REGISTER
+    instruction.operand = struct.unpack("<f", word.to_bytes(4, "little"))[0]
+    return instruction
+
+class MicroInstruction:
+    __slots__ = ["upper", "lower", "flags"]
+
+    upper: Instruction
+    lower: Instruction
+    flags: int
+    """
+    I/E/M/D/T bits of the upper word
+    """
+
+    def __init__(self, upper: Instruction, lower: Instruction, flags: int):
+        self.upper = upper
+        self.lower = lower
+        self.flags = flags
+
+    @property
+    def valid(self) -> bool:
+        return self.upper.type != InstructionType.UNDEFINED and self.lower.type != InstructionType.UNDEFINED
+
+    @property
+    def ends_program(self) -> bool:
+        return bool(self.flags & UPPER_FLAG_E)
+
+def decode_pair(lower_word: int, upper_word: int) -> MicroInstruction:
+    flags = upper_word & 0xF8000000
+    if flags & UPPER_FLAG_I:
+        lower = decode_loi(lower_word)
+    else:
+        lower = decode_lower(lower_word)
+    return MicroInstruction(decode_upper(upper_word), lower, flags)
+
+def decode_pairs(words: Sequence[int]) -> List[MicroInstruction]:
+    """
+    Decodes a run of little endian words as lower/upper pairs.
+    """
+    return [decode_pair(words[i], words[i + 1]) for i in range(0, len(words) - 1, 2)]
+
+def _register(instruction: Instruction, register: str, position: int) -> str:
+    # Same component placement as the macro mode disassembly
+    if position == 1:
+        if instruction.source0_component is not None:
+            return register_with_component(register, instruction.source0_component)
+    elif position == 2:
+        if instruction.broadcast_component is not None and instruction.reg3 is None:
+            return register_with_component(register, instruction.broadcast_component)
+        if instruction.source1_component is not None:
+            return register_with_component(register, instruction.source1_component)
+    elif instruction.broadcast_component is not None:
+        return register_with_component(register, instruction.broadcast_component)
+
+    if instruction.destination_components is not None and register[1:3] == "vf":
+        return register_with_components(register, instruction.destination_components)
+    return register
+
+def format_instruction(instruction: Instruction, addr: int = 0) -> str:
+    """
+    Text for one half of a pair, addr is the pair's address for branch targets.
+    """
+    if instruction.type == InstructionType.UNDEFINED:
+        return "(invalid)"
+
+    name = display_name(instruction.name, instruction.broadcast_component, instruction.destination_components)
+    registers = [r for r in (instruction.reg1, instruction.reg2, instruction.reg3) if r is not None]
+
+    if instruction.type == InstructionType.LoadStore:
+        return f"{name} {_register(instruction, registers[0], 1)}, {instruction.operand}({registers[1]})"
+
+    operands = [_register(instruction, register, i + 1) for i, register in enumerate(registers)]
+    if instruction.operand is not None:
+        if instruction.type == InstructionType.Branch:
+            operands.append(hex(addr + 8 + instruction.operand * 8))
+        elif isinstance(instruction.operand, float):
+            operands.append(f"{instruction.operand}f")
+        else:
+            operands.append(hex(instruction.operand) if abs(instruction.operand) >= 10 else str(instruction.operand))
+
+    if not operands:
+        return name
+    return f"{name} {', '.join(operands)}"
+
+def format_pair(pair: MicroInstruction, addr: int = 0) -> str:
+    flags = "".join(f"[{flag}]" for bit, flag in UPPER_FLAGS if pair.flags & bit and bit != UPPER_FLAG_I)
+    upper = format_instruction(pair.upper, addr)
+    if flags:
+        upper = f"{upper} {flags}"
+    return f"{upper:<40} {format_instruction(pair.lower, addr)}"
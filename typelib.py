@@ -0,0 +1,118 @@
+import hashlib
+import os
+from typing import Optional, Set
+
+from binaryninja import Architecture, BinaryView, TypeLibrary, log_info, log_warn, user_directory
+
+# The PS2 SDK types are compiled from types/ps2_ee.h into a type library the first
+# time a view needs them, then cached under the user directory keyed by a hash of
+# the header. Loading the binary library is far cheaper than parsing the header on
+# every open. A library shipped next to the header is used instead when present.
+
+TYPES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "types")
+TYPE_HEADER_PATH = os.path.join(TYPES_DIRECTORY, "ps2_ee.h")
+TYPE_LIBRARY_PATH = os.path.join(TYPES_DIRECTORY, "ps2_ee.bntl")
+
+TYPE_LIBRARY_NAME = "ps2_ee"
+# Fixed so rebuilt libraries replace the old one in saved databases
+TYPE_LIBRARY_GUID = "6c1f0b58-3c4e-4b35-9a1e-2f0d7d3e5a17"
+
+_library: Optional[TypeLibrary] = None
+_object_names: Set[str] = set()
+
+def build_type_library(header: str, output: str) -> None:
+    """
+    Parses header against the EmotionEngine platform and writes the library to output.
+    """
+    arch = Architecture["EmotionEngine"]
+    platform = arch.standalone_platform
+
+    with open(header, "r") as f:
+        source = f.read()
+
+    result = platform.parse_types_from_source(source, filename=os.path.basename(header))
+
+    library = TypeLibrary.new(arch, TYPE_LIBRARY_NAME)
+    library.guid = TYPE_LIBRARY_GUID
+    library.add_platform(platform)
+
+    for name, type in result.types.items():
+        library.add_named_type(name, type)
+    for name, type in result.functions.items():
+        library.add_named_object(name, type)
+
+    library.finalize()
+
+    # Written beside and renamed so a concurrent open never loads half a library
+    temp_path = f"{output}.{os.getpid()}.tmp"
+    library.write_to_file(temp_path)
+    os.replace(temp_path, output)
+    log_info(f"Built PS2 type library with {len(result.types)} types and {len(result.functions)} functions")
+
+def cached_library_path() -> str:
+    with open(TYPE_HEADER_PATH, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    return os.path.join(user_directory(), "ps2-bn", "types", f"{TYPE_LIBRARY_NAME}-{digest}.bntl")
+
+def _library_path() -> Optional[str]:
+    if os.path.isfile(TYPE_LIBRARY_PATH):
+        return TYPE_LIBRARY_PATH
+
+    path = cached_library_path()
+    if os.path.isfile(path):
+        return path
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        build_type_library(TYPE_HEADER_PATH, path)
+    except (OSError, SyntaxError) as e:
+        log_warn(f"Failed to build the PS2 type library: {e}")
+        return None
+    return path
+
+def load_type_library() -> Optional[TypeLibrary]:
+    """
+    Loads and registers the library once, building it first if needed. None when it
+    couldn't be built.
+    """
+    global _library, _object_names
+    if _library is not None:
+        return _library
+
+    path = _library_path()
+    if path is None:
+        return None
+
+    _library = TypeLibrary.load_from_file(path)
+    # Makes it available to every view on the EE platform
+    _library.register()
+    _object_names = {str(name) for name in _library.named_objects}
+    return _library
+
+def apply_type_library(view: BinaryView) -> int:
+    """
+    Adds the library to the view and applies its prototypes to every function named
+    after an SDK function. Returns the number of functions typed.
+    """
+    library = load_type_library()
+    if library is None:
+        return 0
+
+    view.add_type_library(library)
+
+    typed = 0
+    for function in view.functions:
+        name = function.name
+        if name not in _object_names:
+            # Kernel entry points are often named with a leading underscore
+            name = name.lstrip("_")
+            if name not in _object_names:
+                continue
+
+        type = view.import_library_object(name, library)
+        if type is not None:
+            function.set_auto_type(type)
+            typed += 1
+
+    log_info(f"Applied SDK prototypes to {typed} functions")
+    return typed
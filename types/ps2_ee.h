@@ -0,0 +1,527 @@
+/*
+ * PS2 EE SDK types and prototypes: kernel, libdma, libgraph, libpad and the
+ * GS/DMAC register layouts. typelib.py compiles this into a type library the
+ * first time a view needs it and caches the result under the user directory.
+ *
+ * The EE ABI has 64-bit longs, so the SDK integer types are spelled out here
+ * instead of relying on the platform's long size.
+ */
+
+typedef unsigned char u_char;
+typedef unsigned short u_short;
+typedef unsigned int u_int;
+typedef unsigned long long u_long;
+
+typedef struct {
+    u_int w[4];
+} u_long128;
+
+typedef struct {
+    float x, y, z, w;
+} sceVu0FVECTOR;
+
+typedef struct {
+    int x, y, z, w;
+} sceVu0IVECTOR;
+
+typedef sceVu0FVECTOR sceVu0FMATRIX[4];
+
+/* ------------------------------------------------------------------ kernel */
+
+struct ThreadParam {
+    int status;
+    void (*entry)(void *);
+    void *stack;
+    int stackSize;
+    void *gpReg;
+    int initPriority;
+    int currentPriority;
+    u_int attr;
+    u_int option;
+    int waitType;
+    int waitId;
+    int wakeupCount;
+};
+
+struct SemaParam {
+    int currentCount;
+    int maxCount;
+    int initCount;
+    int numWaitThreads;
+    u_int attr;
+    u_int option;
+};
+
+typedef struct {
+    u_int data;
+    u_int addr;
+    u_int size;
+    u_int mode;
+} sceSifDmaData;
+
+void ResetEE(int init_bitfield);
+void SetGsCrt(short interlace, short omode, short ffmd);
+void Exit(int status);
+int LoadExecPS2(const char *filename, int argc, char **argv);
+int ExecPS2(void *entry, void *gp, int argc, char **argv);
+
+int AddIntcHandler(int cause, int (*handler)(int cause), int next);
+int RemoveIntcHandler(int cause, int handler_id);
+int AddDmacHandler(int channel, int (*handler)(int channel), int next);
+int RemoveDmacHandler(int channel, int handler_id);
+int EnableIntc(int cause);
+int DisableIntc(int cause);
+int EnableDmac(int channel);
+int DisableDmac(int channel);
+int iEnableIntc(int cause);
+int iDisableIntc(int cause);
+int iEnableDmac(int channel);
+int iDisableDmac(int channel);
+int SetAlarm(u_short time, void (*callback)(int alarm_id, u_short time, void *arg), void *arg);
+int iSetAlarm(u_short time, void (*callback)(int alarm_id, u_short time, void *arg), void *arg);
+int ReleaseAlarm(int alarm_id);
+int iReleaseAlarm(int alarm_id);
+
+int CreateThread(struct ThreadParam *param);
+int DeleteThread(int thread_id);
+int StartThread(int thread_id, void *arg);
+void ExitThread(void);
+void ExitDeleteThread(void);
+int TerminateThread(int thread_id);
+int iTerminateThread(int thread_id);
+int ChangeThreadPriority(int thread_id, int priority);
+int iChangeThreadPriority(int thread_id, int priority);
+int RotateThreadReadyQueue(int priority);
+int iRotateThreadReadyQueue(int priority);
+int ReleaseWaitThread(int thread_id);
+int iReleaseWaitThread(int thread_id);
+int GetThreadId(void);
+int ReferThreadStatus(int thread_id, struct ThreadParam *info);
+int iReferThreadStatus(int thread_id, struct ThreadParam *info);
+int SleepThread(void);
+int WakeupThread(int thread_id);
+int iWakeupThread(int thread_id);
+int CancelWakeupThread(int thread_id);
+int iCancelWakeupThread(int thread_id);
+int SuspendThread(int thread_id);
+int iSuspendThread(int thread_id);
+int ResumeThread(int thread_id);
+int iResumeThread(int thread_id);
+
+void *SetupThread(void *gp, void *stack, int stack_size, void *args, void (*root)(void));
+void SetupHeap(void *heap, int heap_size);
+void *EndOfHeap(void);
+
+int CreateSema(struct SemaParam *param);
+int DeleteSema(int sema_id);
+int iDeleteSema(int sema_id);
+int SignalSema(int sema_id);
+int iSignalSema(int sema_id);
+int WaitSema(int sema_id);
+int PollSema(int sema_id);
+int iPollSema(int sema_id);
+int ReferSemaStatus(int sema_id, struct SemaParam *info);
+int iReferSemaStatus(int sema_id, struct SemaParam *info);
+
+int EnableIntcHandler(int cause);
+int iEnableIntcHandler(int cause);
+int DisableIntcHandler(int cause);
+int iDisableIntcHandler(int cause);
+int EnableDmacHandler(int channel);
+int iEnableDmacHandler(int channel);
+int DisableDmacHandler(int channel);
+int iDisableDmacHandler(int channel);
+
+void EnableCache(int cache);
+void DisableCache(int cache);
+void FlushCache(int operation);
+void iFlushCache(int operation);
+u_int GetCop0(int reg);
+u_int iGetCop0(int reg);
+
+u_long GsGetIMR(void);
+u_long iGsGetIMR(void);
+u_long GsPutIMR(u_long imr);
+u_long iGsPutIMR(u_long imr);
+
+u_int SifSetDma(sceSifDmaData *sdd, int len);
+u_int isceSifSetDma(sceSifDmaData *sdd, int len);
+int SifDmaStat(u_int id);
+int isceSifDmaStat(u_int id);
+void SifSetDChain(void);
+void isceSifSetDChain(void);
+int SifSetReg(u_int reg, u_int value);
+int SifGetReg(u_int reg);
+void ExecOSD(int argc, char **argv);
+int GetMemorySize(void);
+
+/* ------------------------------------------------------------------ libdma */
+
+typedef struct {
+    u_int DIR: 1;
+    u_int p0: 1;
+    u_int MOD: 2;
+    u_int ASP: 2;
+    u_int TTE: 1;
+    u_int TIE: 1;
+    u_int STR: 1;
+    u_int p1: 7;
+    u_int TAG: 16;
+} tD_CHCR;
+
+typedef struct {
+    u_int QWC: 16;
+    u_int p0: 16;
+} tD_QWC;
+
+typedef struct {
+    tD_CHCR chcr;
+    u_int p0[3];
+    void *madr;
+    u_int p1[3];
+    u_int qwc;
+    u_int p2[3];
+    void *tadr;
+    u_int p3[3];
+    void *as0;
+    u_int p4[3];
+    void *as1;
+    u_int p5[3];
+    u_int p6[4];
+    u_int p7[4];
+    void *sadr;
+    u_int p8[3];
+} sceDmaChan;
+
+typedef struct {
+    u_char sts;
+    u_char std;
+    u_char mfd;
+    u_char rcycle;
+    u_short express;
+    u_short notify;
+    u_short sqwc;
+    u_short tqwc;
+    void *rbadr;
+    u_int rbmsk;
+} sceDmaEnv;
+
+typedef struct {
+    u_short qwc;
+    u_char mark;
+    u_char id;
+    void *next;
+    u_int p[2];
+} sceDmaTag;
+
+int sceDmaReset(int mode);
+int sceDmaPutEnv(sceDmaEnv *env);
+sceDmaEnv *sceDmaGetEnv(sceDmaEnv *env);
+int sceDmaPutStallAddr(u_int addr);
+sceDmaChan *sceDmaGetChan(int id);
+void sceDmaSend(sceDmaChan *d, void *tag);
+void sceDmaSendN(sceDmaChan *d, void *addr, int size);
+void sceDmaSendI(sceDmaChan *d, void *addr, int size);
+void sceDmaRecv(sceDmaChan *d);
+void sceDmaRecvN(sceDmaChan *d, void *addr, int size);
+void sceDmaRecvI(sceDmaChan *d, void *addr, int size);
+int sceDmaSync(sceDmaChan *d, int mode, int timeout);
+int sceDmaWatch(sceDmaChan *d, void *addr, int mode, int timeout);
+u_int sceDmaPause(sceDmaChan *d);
+u_int sceDmaRestart(sceDmaChan *d, u_int chcr);
+
+/* ---------------------------------------------------------------- libgraph */
+
+typedef struct {
+    u_long EN1: 1;
+    u_long EN2: 1;
+    u_long CRTMD: 3;
+    u_long MMOD: 1;
+    u_long AMOD: 1;
+    u_long SLBG: 1;
+    u_long ALP: 8;
+    u_long p0: 48;
+} sceGsPmode;
+
+typedef struct {
+    u_long INT: 1;
+    u_long FFMD: 1;
+    u_long DPMS: 2;
+    u_long p0: 60;
+} sceGsSmode2;
+
+typedef struct {
+    u_long FBP: 9;
+    u_long FBW: 6;
+    u_long PSM: 5;
+    u_long p0: 12;
+    u_long DBX: 11;
+    u_long DBY: 11;
+    u_long p1: 10;
+} sceGsDispfb;
+
+typedef struct {
+    u_long DX: 12;
+    u_long DY: 11;
+    u_long MAGH: 4;
+    u_long MAGV: 2;
+    u_long p0: 3;
+    u_long DW: 12;
+    u_long DH: 11;
+    u_long p1: 9;
+} sceGsDisplay;
+
+typedef struct {
+    u_long R: 8;
+    u_long G: 8;
+    u_long B: 8;
+    u_long p0: 40;
+} sceGsBgcolor;
+
+typedef struct {
+    u_long SIGNAL: 1;
+    u_long FINISH: 1;
+    u_long HSINT: 1;
+    u_long VSINT: 1;
+    u_long EDWINT: 1;
+    u_long p0: 3;
+    u_long FLUSH: 1;
+    u_long RESET: 1;
+    u_long p1: 2;
+    u_long NFIELD: 1;
+    u_long FIELD: 1;
+    u_long FIFO: 2;
+    u_long REV: 8;
+    u_long ID: 8;
+    u_long p2: 32;
+} sceGsCsr;
+
+typedef struct {
+    u_long FBP: 9;
+    u_long p0: 7;
+    u_long FBW: 6;
+    u_long p1: 2;
+    u_long PSM: 6;
+    u_long p2: 2;
+    u_long FBMSK: 32;
+} sceGsFrame;
+
+typedef struct {
+    u_long ZBP: 9;
+    u_long p0: 15;
+    u_long PSM: 4;
+    u_long p1: 4;
+    u_long ZMSK: 1;
+    u_long p2: 31;
+} sceGsZbuf;
+
+typedef struct {
+    u_long OFX: 16;
+    u_long p0: 16;
+    u_long OFY: 16;
+    u_long p1: 16;
+} sceGsXyoffset;
+
+typedef struct {
+    u_long SCAX0: 11;
+    u_long p0: 5;
+    u_long SCAX1: 11;
+    u_long p1: 5;
+    u_long SCAY0: 11;
+    u_long p2: 5;
+    u_long SCAY1: 11;
+    u_long p3: 5;
+} sceGsScissor;
+
+typedef struct {
+    u_long ATE: 1;
+    u_long ATST: 3;
+    u_long AREF: 8;
+    u_long AFAIL: 2;
+    u_long DATE: 1;
+    u_long DATM: 1;
+    u_long ZTE: 1;
+    u_long ZTST: 2;
+    u_long p0: 45;
+} sceGsTest;
+
+typedef struct {
+    u_long PRIM: 3;
+    u_long IIP: 1;
+    u_long TME: 1;
+    u_long FGE: 1;
+    u_long ABE: 1;
+    u_long AA1: 1;
+    u_long FST: 1;
+    u_long CTXT: 1;
+    u_long FIX: 1;
+    u_long p0: 53;
+} sceGsPrim;
+
+typedef struct {
+    u_long NLOOP: 15;
+    u_long EOP: 1;
+    u_long p0: 30;
+    u_long PRE: 1;
+    u_long PRIM: 11;
+    u_long FLG: 2;
+    u_long NREG: 4;
+    u_long REGS0: 4;
+    u_long REGS1: 4;
+    u_long REGS2: 4;
+    u_long REGS3: 4;
+    u_long REGS4: 4;
+    u_long REGS5: 4;
+    u_long REGS6: 4;
+    u_long REGS7: 4;
+    u_long REGS8: 4;
+    u_long REGS9: 4;
+    u_long REGS10: 4;
+    u_long REGS11: 4;
+    u_long REGS12: 4;
+    u_long REGS13: 4;
+    u_long REGS14: 4;
+    u_long REGS15: 4;
+} sceGifTag;
+
+typedef struct {
+    sceGsPmode pmode;
+    sceGsSmode2 smode2;
+    sceGsDispfb dispfb;
+    sceGsDisplay display;
+    sceGsBgcolor bgcolor;
+} sceGsDispEnv;
+
+typedef struct {
+    sceGsFrame frame1;
+    u_long frame1addr;
+    sceGsZbuf zbuf1;
+    u_long zbuf1addr;
+    sceGsXyoffset xyoffset1;
+    u_long xyoffset1addr;
+    sceGsScissor scissor1;
+    u_long scissor1addr;
+    u_long prmodecont;
+    u_long prmodecontaddr;
+    u_long colclamp;
+    u_long colclampaddr;
+    u_long dthe;
+    u_long dtheaddr;
+    sceGsTest test1;
+    u_long test1addr;
+} sceGsDrawEnv1;
+
+typedef struct {
+    sceGsFrame frame2;
+    u_long frame2addr;
+    sceGsZbuf zbuf2;
+    u_long zbuf2addr;
+    sceGsXyoffset xyoffset2;
+    u_long xyoffset2addr;
+    sceGsScissor scissor2;
+    u_long scissor2addr;
+    u_long prmodecont;
+    u_long prmodecontaddr;
+    u_long colclamp;
+    u_long colclampaddr;
+    u_long dthe;
+    u_long dtheaddr;
+    sceGsTest test2;
+    u_long test2addr;
+} sceGsDrawEnv2;
+
+typedef struct {
+    sceGsTest testa;
+    u_long testaaddr;
+    sceGsPrim prim;
+    u_long primaddr;
+    u_long rgbaq;
+    u_long rgbaqaddr;
+    u_long xyz2a;
+    u_long xyz2aaddr;
+    u_long xyz2b;
+    u_long xyz2baddr;
+    u_long xyz2c;
+    u_long xyz2caddr;
+    u_long xyz2d;
+    u_long xyz2daddr;
+    sceGsTest testb;
+    u_long testbaddr;
+} sceGsClear;
+
+typedef struct {
+    sceGsDispEnv disp[2];
+    sceGifTag giftag0;
+    sceGsDrawEnv1 draw0;
+    sceGsClear clear0;
+    sceGifTag giftag1;
+    sceGsDrawEnv1 draw1;
+    sceGsClear clear1;
+} sceGsDBuff;
+
+typedef struct {
+    sceGsDispEnv disp[2];
+    sceGifTag giftag0;
+    sceGsDrawEnv1 draw01;
+    sceGsDrawEnv2 draw02;
+    sceGsClear clear0;
+    sceGifTag giftag1;
+    sceGsDrawEnv1 draw11;
+    sceGsDrawEnv2 draw12;
+    sceGsClear clear1;
+} sceGsDBuffDc;
+
+typedef struct {
+    sceGifTag giftag;
+    u_long bitbltbuf;
+    u_long bitbltbufaddr;
+    u_long trxpos;
+    u_long trxposaddr;
+    u_long trxreg;
+    u_long trxregaddr;
+    u_long trxdir;
+    u_long trxdiraddr;
+    sceGifTag giftag1;
+} sceGsLoadImage;
+
+void sceGsResetGraph(short mode, short inter, short omode, short ffmode);
+void sceGsResetPath(void);
+int sceGsSyncV(int mode);
+int sceGsSyncPath(int mode, u_short timeout);
+void sceGsPutDispEnv(sceGsDispEnv *disp);
+int sceGsPutDrawEnv(sceGifTag *giftag);
+void sceGsSetDefDispEnv(sceGsDispEnv *disp, short psm, short w, short h, short dx, short dy);
+int sceGsSetDefDrawEnv(sceGsDrawEnv1 *draw, short psm, short w, short h, short ztest, short zpsm);
+int sceGsSetDefDrawEnv2(sceGsDrawEnv2 *draw, short psm, short w, short h, short ztest, short zpsm);
+int sceGsSetDefClear(sceGsClear *cp, short ztest, short x, short y, short w, short h,
+                     u_char r, u_char g, u_char b, u_char a, u_int z);
+void sceGsSetDefDBuff(sceGsDBuff *db, short psm, short w, short h, short ztest, short zpsm, short clear);
+void sceGsSetDefDBuffDc(sceGsDBuffDc *db, short psm, short w, short h, short ztest, short zpsm, short clear);
+int sceGsSwapDBuff(sceGsDBuff *db, int id);
+int sceGsSwapDBuffDc(sceGsDBuffDc *db, int id);
+int sceGsSetDefLoadImage(sceGsLoadImage *lp, short dbp, short dbw, short dpsm, short x, short y, short w, short h);
+int sceGsExecLoadImage(sceGsLoadImage *lp, u_long128 *srcaddr);
+int sceGsExecStoreImage(void *sp, u_long128 *dstaddr);
+void *sceGsSyncVCallback(int (*func)(int));
+sceGsDBuff *sceGsGetGParam(void);
+
+/* ------------------------------------------------------------------ libpad */
+
+int scePadInit(int mode);
+int scePadEnd(void);
+int scePadPortOpen(int port, int slot, u_long128 *addr);
+int scePadPortClose(int port, int slot);
+int scePadRead(int port, int slot, u_char *rdata);
+int scePadGetState(int port, int slot);
+int scePadGetReqState(int port, int slot);
+int scePadSetReqState(int port, int slot, int state);
+int scePadInfoMode(int port, int slot, int term, int offs);
+int scePadSetMainMode(int port, int slot, int offs, int lock);
+int scePadInfoAct(int port, int slot, int actno, int term);
+int scePadSetActAlign(int port, int slot, const u_char *data);
+int scePadSetActDirect(int port, int slot, const u_char *data);
+int scePadInfoPressMode(int port, int slot);
+int scePadEnterPressMode(int port, int slot);
+int scePadExitPressMode(int port, int slot);
+int scePadGetSlotMax(int port);
+void scePadStateIntToStr(int state, u_char *str);
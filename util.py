@@ -1,4 +1,9 @@
-from typing import Any, Callable, Dict, List
+import importlib
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Set
 
 class Functor:
     __slots__ = ["__func", "__args", "__kwargs"]
@@ -15,3 +20,68 @@ class Functor:
     def __call__(self, *args, **kwargs):
         # Arguments provided in __call__ are positioned after those provided when instantiated
         self.__func(*(self.__args + args), **(self.__kwargs | kwargs))
+
+# Held while a lazy module executes, by module name
+_lazy_locks: Dict[str, threading.RLock] = {}
+_lazy_loading: Set[str] = set()
+
+class _LazyModule(ModuleType):
+    """
+    A module which hasn't been executed yet. The first attribute access executes it
+    under the module's lock and only then makes it an ordinary module, so threads
+    touching it meanwhile wait instead of seeing it half initialized. importlib's
+    LazyLoader swaps the class before executing, which lets them through.
+    """
+    def __getattribute__(self, attr: str) -> Any:
+        name = ModuleType.__getattribute__(self, "__name__")
+        with _lazy_locks[name]:
+            # Checked again under the lock, and left alone while the module's own
+            # code runs on this thread
+            if type(self) is _LazyModule and name not in _lazy_loading:
+                _lazy_loading.add(name)
+                try:
+                    ModuleType.__getattribute__(self, "__spec__").loader.exec_module(self)
+                    self.__class__ = ModuleType
+                finally:
+                    _lazy_loading.discard(name)
+        return ModuleType.__getattribute__(self, attr)
+
+def lazy_import(name: str, package: Optional[str] = None) -> ModuleType:
+    """
+    Returns the module without executing it until one of its attributes is first
+    used, after which it is an ordinary module. name may be relative to package.
+    Modules imported this way need to be accessed as module.attr, a from import
+    loads them straight away. Safe to first use from several threads at once.
+    """
+    name = importlib.util.resolve_name(name, package)
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    parent, _, child = name.rpartition(".")
+    if parent:
+        importlib.import_module(parent)
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    module = importlib.util.module_from_spec(spec)
+    _lazy_locks.setdefault(name, threading.RLock())
+    module.__class__ = _LazyModule
+    sys.modules[name] = module
+
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+def lazy_function(name: str, package: Optional[str], attr: str) -> Callable:
+    """
+    A function calling module.attr, which only imports the module when called.
+    For callbacks registered at startup, e.g. plugin commands.
+    """
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(name, package), attr)(*args, **kwargs)
+
+    call.__name__ = attr
+    return call